@@ -1,23 +1,47 @@
 import os
 import sys
+# 记录启动时的工作目录，命令行参数中的相对路径以此为准
+LAUNCH_DIR = os.getcwd()
 # 将当前工作目录设置为程序所在的目录，确保无论从哪里执行，其工作目录都正确设置为程序本身的位置，避免路径错误。
 os.chdir(os.path.dirname(sys.executable) if getattr(sys, 'frozen', False)else os.path.dirname(os.path.abspath(__file__)))
 
-from PyQt5.QtCore import Qt
-from PyQt5.QtWidgets import QApplication
-from app.main_window import MainWindow
+if __name__ == "__main__":
+    # 打包环境下进程池的子进程以 --multiprocessing-fork 参数启动本程序，须在解析命令行与启动界面之前处理
+    from multiprocessing import freeze_support
+    freeze_support()
 
+# 命令行模式: python MRobot.py generate --project <项目目录>，无需界面与 PyQt5
+if __name__ == "__main__" and len(sys.argv) > 1 and sys.argv[1] == "generate":
+    from app.tools.project_generator import main
+    sys.exit(main(sys.argv[2:], cwd=LAUNCH_DIR))
 
-# 启用 DPI 缩放
-QApplication.setHighDpiScaleFactorRoundingPolicy(Qt.HighDpiScaleFactorRoundingPolicy.PassThrough)
-QApplication.setAttribute(Qt.AA_EnableHighDpiScaling) # 启用高 DPI 缩放
-QApplication.setAttribute(Qt.AA_UseHighDpiPixmaps) # 使用高 DPI 图标
+# 串口接收性能基准: python MRobot.py bench-serial [--format ...] [--baud ...] [--channels ...]
+if __name__ == "__main__" and len(sys.argv) > 1 and sys.argv[1] == "bench-serial":
+    from app.tools.serial_benchmark import main
+    sys.exit(main(sys.argv[2:]))
+
+
+def run_gui():
+    """启动图形界面；PyQt5 与界面模块只在这里导入，进程池的子进程（以 __mp_main__ 重新导入本文件）不会加载"""
+    from PyQt5.QtCore import Qt
+    from PyQt5.QtWidgets import QApplication
+    from app.main_window import MainWindow
+
+    # 启用 DPI 缩放
+    QApplication.setHighDpiScaleFactorRoundingPolicy(Qt.HighDpiScaleFactorRoundingPolicy.PassThrough)
+    QApplication.setAttribute(Qt.AA_EnableHighDpiScaling) # 启用高 DPI 缩放
+    QApplication.setAttribute(Qt.AA_UseHighDpiPixmaps) # 使用高 DPI 图标
 
-if __name__ == "__main__":
     app = QApplication(sys.argv)
     app.setAttribute(Qt.AA_DontCreateNativeWidgetSiblings) # 避免创建原生窗口小部件的兄弟窗口
 
     w = MainWindow()
 
-    sys.exit(app.exec_()) # 启动应用程序并进入主事件循环
-    # 注意：在 PyQt5 中，exec_() 是一个阻塞调用，直到应用程序退出。
+    exit_code = app.exec_() # 启动应用程序并进入主事件循环
+    # 注意：在 PyQt5 中，exec_() 是一个阻塞调用，直到应用程序退出；在此之前须持有窗口的引用
+    del w
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(run_gui())
@@ -93,9 +93,8 @@ class CodeGenerateInterface(QWidget):
 
     def on_task_code_btn_clicked(self):
         # 检查是否开启 FreeRTOS
-        ioc_files = [f for f in os.listdir(self.project_path) if f.endswith('.ioc')]
-        if ioc_files:
-            ioc_path = os.path.join(self.project_path, ioc_files[0])
+        ioc_path = analyzing_ioc.find_ioc_file(self.project_path)
+        if ioc_path:
             if not analyzing_ioc.is_freertos_enabled_from_ioc(ioc_path):
                 InfoBar.error(
                     title="错误",
@@ -128,9 +127,8 @@ class CodeGenerateInterface(QWidget):
 
     def on_freertos_task_btn_clicked(self):
         # 检查是否开启 FreeRTOS
-        ioc_files = [f for f in os.listdir(self.project_path) if f.endswith('.ioc')]
-        if ioc_files:
-            ioc_path = os.path.join(self.project_path, ioc_files[0])
+        ioc_path = analyzing_ioc.find_ioc_file(self.project_path)
+        if ioc_path:
             if not analyzing_ioc.is_freertos_enabled_from_ioc(ioc_path):
                 InfoBar.error(
                     title="错误",
@@ -266,52 +264,22 @@ class CodeGenerateInterface(QWidget):
     def generate_code(self):
         """生成所有代码，包括未加载页面"""
         try:
-            # 先收集所有页面名（从CSV配置文件读取）
-            from app.tools.code_generator import CodeGenerator  # 在方法内重新导入确保可用
-            csv_path = os.path.join(CodeGenerator.get_assets_dir("User_code"), "config.csv")
-            all_class_names = []
-            if os.path.exists(csv_path):
-                with open(csv_path, newline='', encoding='utf-8') as f:
-                    reader = csv.reader(f)
-                    for row in reader:
-                        row = [cell.strip() for cell in row if cell.strip()]
-                        if not row:
-                            continue
-                        main_title = row[0]
-                        for sub in row[1:]:
-                            class_name = f"{main_title}_{sub}".replace("-", "_")
-                            all_class_names.append(class_name)
-
-            # 创建所有页面对象（无论是否点击过）
-            bsp_pages = []
-            component_pages = []
-            device_pages = []
-            for class_name in all_class_names:
-                widget = self._get_or_create_page(class_name)
-                if widget:
-                    if hasattr(widget, '_generate_bsp_code_internal') and widget not in bsp_pages:
-                        bsp_pages.append(widget)
-                    elif hasattr(widget, '_generate_component_code_internal') and widget not in component_pages:
-                        component_pages.append(widget)
-                    elif hasattr(widget, '_generate_device_code_internal') and widget not in device_pages:
-                        device_pages.append(widget)
-
-            # 确保导入成功
-            from app.code_page.bsp_interface import bsp
-            from app.code_page.component_interface import component
-            from app.code_page.device_interface import device
-
-            # 生成 BSP 代码
-            bsp_result = bsp.generate_bsp(self.project_path, bsp_pages)
-
-            # 生成 Component 代码  
-            component_result = component.generate_component(self.project_path, component_pages)
-
-            # 生成 Device 代码
-            device_result = device.generate_device(self.project_path, device_pages)
+            # 已打开的页面以界面状态为准，其余项目直接按项目中的YAML配置生成，无需创建页面
+            from app.tools.project_generator import ProjectGenerator
+            generator = ProjectGenerator(self.project_path)
+            results = generator.generate(self.page_cache)
+
+            # 刷新已打开设备页面的BSP组合框选项
+            for page in self.page_cache.values():
+                if hasattr(page, 'refresh_bsp_combos'):
+                    try:
+                        page.refresh_bsp_combos()
+                    except Exception as e:
+                        print(f"刷新页面 {getattr(page, 'device_name', 'Unknown')} 的BSP选项失败: {e}")
 
             # 合并结果信息
-            combined_result = f"BSP代码生成:\n{bsp_result}\n\nComponent代码生成:\n{component_result}\n\nDevice代码生成:\n{device_result}"
+            combined_result = ProjectGenerator.format_results(results)
+            combined_result += "\n\n" + ProjectGenerator.format_file_stats(generator.file_stats)
 
             InfoBar.success(
                 title="代码生成结果",
@@ -338,9 +306,8 @@ class CodeGenerateInterface(QWidget):
 
     def _get_freertos_status(self):
         """获取FreeRTOS状态"""
-        ioc_files = [f for f in os.listdir(self.project_path) if f.endswith('.ioc')]
-        if ioc_files:
-            ioc_path = os.path.join(self.project_path, ioc_files[0])
+        ioc_path = analyzing_ioc.find_ioc_file(self.project_path)
+        if ioc_path:
             return "开启" if analyzing_ioc.is_freertos_enabled_from_ioc(ioc_path) else "未开启"
         return "未找到.ioc文件"
 
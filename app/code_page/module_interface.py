@@ -6,7 +6,6 @@ from qfluentwidgets import (
 from PyQt5.QtCore import Qt
 from app.tools.code_generator import CodeGenerator
 import os
-import shutil
 import csv
 
 
@@ -196,7 +195,7 @@ class ModulePage(QWidget):
                 if os.path.isfile(src_file):
                     if os.path.exists(dst_file):
                         continue
-                    shutil.copy2(src_file, dst_file)
+                    CodeGenerator.copy_dependency_file(src_file, dst_file)
                     file_count += 1
                     print(f"生成文件: {dst_file}")
             
@@ -247,9 +246,9 @@ class ModulePage(QWidget):
         template_h = os.path.join(template_dir, "config.h")
         
         if not os.path.exists(config_c) and os.path.exists(template_c):
-            shutil.copy2(template_c, config_c)
+            CodeGenerator.copy_dependency_file(template_c, config_c)
             print(f"生成 config.c")
         
         if not os.path.exists(config_h) and os.path.exists(template_h):
-            shutil.copy2(template_h, config_h)
+            CodeGenerator.copy_dependency_file(template_h, config_h)
             print(f"生成 config.h")
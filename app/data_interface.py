@@ -9,65 +9,23 @@ from PyQt5.QtWidgets import QScrollArea, QWidget
 from qfluentwidgets import theme, Theme
 from PyQt5.QtWidgets import QDoubleSpinBox
 from .tools.code_task_config import TaskConfigDialog
+from .tools.analyzing_ioc import IocModel
+from .tools.code_generator import CodeGenerator
 
 import os
 import requests
 import zipfile
 import io
 import re
-import shutil
-import yaml
-import textwrap
-from jinja2 import Template
-
-def preserve_all_user_regions(new_code, old_code):
-    import re
-    pattern = re.compile(
-        r"/\*\s*(USER [A-Z0-9_ ]+)\s*BEGIN\s*\*/(.*?)/\*\s*\1\s*END\s*\*/",
-        re.DOTALL
-    )
-    old_regions = {m.group(1): m.group(2) for m in pattern.finditer(old_code or "")}
-    def repl(m):
-        region = m.group(1)
-        old_content = old_regions.get(region)
-        if old_content is not None:
-            return m.group(0).replace(m.group(2), old_content)
-        return m.group(0)
-    return pattern.sub(repl, new_code)
-
-def save_with_preserve(path, new_code):
-    if os.path.exists(path):
-        with open(path, "r", encoding="utf-8") as f:
-            old_code = f.read()
-        new_code = preserve_all_user_regions(new_code, old_code)
-    with open(path, "w", encoding="utf-8") as f:
-        f.write(new_code)
 
 class IocConfig:
     def __init__(self, ioc_path):
         self.ioc_path = ioc_path
-        self.config = {}
-        self._parse()
-
-    def _parse(self):
-        with open(self.ioc_path, encoding='utf-8') as f:
-            for line in f:
-                line = line.strip()
-                if not line or line.startswith('#'):
-                    continue
-                if '=' in line:
-                    key, value = line.split('=', 1)
-                    self.config[key.strip()] = value.strip()
+        self.model = IocModel.load(ioc_path)
+        self.config = self.model.config
 
     def is_freertos_enabled(self):
-        ip_keys = [k for k in self.config if k.startswith('Mcu.IP')]
-        for k in ip_keys:
-            if self.config[k] == 'FREERTOS':
-                return True
-        for k in self.config:
-            if k.startswith('FREERTOS.'):
-                return True
-        return False
+        return self.model.freertos_enabled
 
 class HomePageWidget(QWidget):
     def __init__(self, parent=None, on_choose_project=None, on_update_template=None):
@@ -413,7 +371,6 @@ class DataInterface(QWidget):
         return files
 
     def generate_code(self):
-        import shutil
         from app.tools.code_generator import CodeGenerator
         base_dir = CodeGenerator.get_assets_dir("User_code")
         user_dir = os.path.join(self.project_path, "User")
@@ -432,7 +389,7 @@ class DataInterface(QWidget):
                 os.makedirs(os.path.dirname(dst_c), exist_ok=True)
                 with open(src_c, 'r', encoding='utf-8') as f:
                     content = f.read()
-                save_with_preserve(dst_c, content)
+                CodeGenerator.save_with_preserve(dst_c, content)
                 copied.append(dst_c)
             if os.path.exists(src_h):
                 if os.path.exists(dst_h):
@@ -441,7 +398,7 @@ class DataInterface(QWidget):
                     os.makedirs(os.path.dirname(dst_h), exist_ok=True)
                     with open(src_h, 'r', encoding='utf-8') as f:
                         content = f.read()
-                    save_with_preserve(dst_h, content)
+                    CodeGenerator.save_with_preserve(dst_h, content)
                     copied.append(dst_h)
         msg = f"已拷贝 {len(copied)} 个文件到 User 目录"
         if skipped:
@@ -455,7 +412,6 @@ class DataInterface(QWidget):
         self.show_user_code_files()
 
     def generate_freertos_task(self):
-        import re
         # 尝试查找 freertos.c 或 app_freertos.c (G4系列使用 app_freertos.c)
         freertos_path = None
         possible_names = ["freertos.c", "app_freertos.c"]
@@ -515,8 +471,7 @@ class DataInterface(QWidget):
             error_msgs.append("未找到 /* USER CODE BEGIN StartDefaultTask */ 区域，无法插入终止代码。")
 
         if changed:
-            with open(freertos_path, "w", encoding="utf-8") as f:
-                f.write(code)
+            CodeGenerator.write_if_changed(freertos_path, code)
             InfoBar.success(
                 title="生成成功",
                 content="FreeRTOS任务代码已自动生成！",
@@ -578,104 +533,5 @@ class DataInterface(QWidget):
                 )
 
     def generate_task_code(self, task_list):
-        from app.tools.code_generator import CodeGenerator
-        template_dir = CodeGenerator.get_assets_dir("User_code/task")
-        output_dir = os.path.join(self.project_path, "User", "task")
-        os.makedirs(output_dir, exist_ok=True)
-
-        user_task_h_tpl = os.path.join(template_dir, "user_task.h.template")
-        user_task_c_tpl = os.path.join(template_dir, "user_task.c.template")
-        init_c_tpl = os.path.join(template_dir, "init.c.template")
-        task_c_tpl = os.path.join(template_dir, "task.c.template")
-
-        freq_tasks = [t for t in task_list if t.get("freq_control", True)]
-
-        def render_template(path, context):
-            with open(path, encoding="utf-8") as f:
-                tpl = Template(f.read())
-            return tpl.render(**context)
-
-        context_h = {
-            "thread_definitions": "\n".join([f"        osThreadId_t {t['name']};" for t in task_list]),
-            "freq_definitions": "\n".join([f"        float {t['name']};" for t in freq_tasks]),
-            "stack_definitions": "\n".join([f"        UBaseType_t {t['name']};" for t in task_list]),
-            "last_up_time_definitions": "\n".join([f"        float {t['name']};" for t in freq_tasks]),
-            "task_frequency_definitions": "\n".join([f"#define {t['name'].upper()}_FREQ ({t['frequency']})" for t in freq_tasks]),
-            "task_init_delay_definitions": "\n".join([f"#define {t['name'].upper()}_INIT_DELAY ({t['delay']})" for t in task_list]),
-            "task_attr_declarations": "\n".join([f"extern const osThreadAttr_t attr_{t['name']};" for t in task_list]),
-            "task_function_declarations": "\n".join([f"void {t['function']}(void *argument);" for t in task_list]),
-        }
-        user_task_h_path = os.path.join(output_dir, "user_task.h")
-        new_user_task_h = render_template(user_task_h_tpl, context_h)
-        save_with_preserve(user_task_h_path, new_user_task_h)
-
-        context_c = {
-            "task_attr_definitions": "\n".join([
-                f"const osThreadAttr_t attr_{t['name']} = {{\n"
-                f"    .name = \"{t['name']}\",\n"
-                f"    .priority = osPriorityNormal,\n"
-                f"    .stack_size = {t['stack']} * 4,\n"
-                f"}};"
-                for t in task_list
-            ])
-        }
-        user_task_c_path = os.path.join(output_dir, "user_task.c")
-        user_task_c = render_template(user_task_c_tpl, context_c)
-        save_with_preserve(user_task_c_path, user_task_c)
-
-        thread_creation_code = "\n".join([
-            f"  task_runtime.thread.{t['name']} = osThreadNew({t['function']}, NULL, &attr_{t['name']});"
-            for t in task_list
-        ])
-        context_init = {
-            "thread_creation_code": thread_creation_code,
-        }
-        init_c_path = os.path.join(output_dir, "init.c")
-        init_c = render_template(init_c_tpl, context_init)
-        save_with_preserve(init_c_path, init_c)
-
-        for t in task_list:
-            desc = t.get("description", "")
-            desc_wrapped = "\n    ".join(textwrap.wrap(desc, 20))
-            
-            # 检查是否是预设任务
-            if t.get("preset_task"):
-                # 使用预设任务的代码
-                preset_task_name = t["preset_task"]
-                from app.tools.code_generator import CodeGenerator
-                task_template_dir = CodeGenerator.get_assets_dir("User_code/task/template_task")
-                preset_task_file = os.path.join(task_template_dir, f"{preset_task_name}.c")
-                
-                if os.path.exists(preset_task_file):
-                    # 直接复制预设任务文件
-                    task_c_path = os.path.join(output_dir, f"{t['name']}.c")
-                    with open(preset_task_file, 'r', encoding='utf-8') as f:
-                        preset_code = f.read()
-                    
-                    # 如果任务名称不同，需要替换函数名
-                    if preset_task_name != t["name"]:
-                        # 替换任务函数名
-                        preset_code = preset_code.replace(f"Task_{preset_task_name}", t["function"])
-                        preset_code = preset_code.replace(f"    {preset_task_name} Task", f"    {t['name']} Task")
-                    
-                    save_with_preserve(task_c_path, preset_code)
-                    continue
-            
-            # 使用默认模板生成任务代码
-            context_task = {
-                "task_name": t["name"],
-                "task_function": t["function"],
-                "task_frequency": f"{t['name'].upper()}_FREQ" if t.get("freq_control", True) else None,
-                "task_delay": f"{t['name'].upper()}_INIT_DELAY",
-                "task_description": desc_wrapped,
-                "freq_control": t.get("freq_control", True)
-            }
-            with open(task_c_tpl, encoding="utf-8") as f:
-                tpl = Template(f.read())
-            code = tpl.render(**context_task)
-            task_c_path = os.path.join(output_dir, f"{t['name']}.c")
-            save_with_preserve(task_c_path, code)
-
-        config_yaml_path = os.path.join(output_dir, "config.yaml")
-        with open(config_yaml_path, "w", encoding="utf-8") as f:
-            yaml.safe_dump(task_list, f, allow_unicode=True)
\ No newline at end of file
+        from app.tools.project_generator import generate_task_code
+        generate_task_code(self.project_path, task_list)
\ No newline at end of file
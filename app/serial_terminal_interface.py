@@ -1,80 +1,113 @@
+import os
+import re
 import serial
 import serial.tools.list_ports
+import numpy as np
 import pyqtgraph as pg
-import struct
 import time
-from datetime import datetime
 from collections import deque
 from PyQt5.QtCore import Qt, QThread, pyqtSignal, QTimer
-from PyQt5.QtGui import QTextCursor
 from PyQt5.QtWidgets import QVBoxLayout, QHBoxLayout, QSizePolicy, QStackedWidget
-from PyQt5.QtWidgets import QWidget
+from PyQt5.QtWidgets import QWidget, QFileDialog, QScrollArea
 from qfluentwidgets import (
-    FluentIcon, PushButton, ComboBox, TextEdit, LineEdit, CheckBox,
+    FluentIcon, PushButton, ComboBox, PlainTextEdit, LineEdit, CheckBox,
     SubtitleLabel, BodyLabel, HorizontalSeparator, PrimaryPushButton,
-    isDarkTheme, qconfig, CardWidget, StrongBodyLabel, CaptionLabel
+    isDarkTheme, qconfig, CardWidget, StrongBodyLabel, CaptionLabel, Slider
 )
+from app.tools.serial_decoders import (
+    AutoDecoder, BinaryFrameDecoder, JustFloatDecoder, TextLineDecoder, make_frame_spec, parse_hex_bytes
+)
+from app.tools.serial_capture import CaptureFile, CaptureReplayReader, CaptureWriter
+from app.tools.serial_log import LogBuffer, LogMatcher
+from app.tools.serial_format import DisplaySettings, format_hex, format_timestamp
+from app.tools.serial_mux import SerialReceiver
+from app.tools.serial_reader import SerialReader
+from app.tools.serial_session import SerialSession
+from app.tools.serial_transmit import TransmitScheduler, compile_script, encode_frame, parse_hex
+from app.tools.spectrum import WINDOWS, SpectrumAnalyzer
+from app.tools.waveform_trigger import TRIGGER_TYPES, Trigger
 
 class SerialReadThread(QThread):
-    data_received = pyqtSignal(str)
-    raw_data_received = pyqtSignal(bytes)
+    """
+    所有串口会话（以及录制回放）共用的接收线程：在线程中运行 SerialReceiver，
+    一个 selector 同时等待全部串口，信号带上会话名
+    """
+    data_received = pyqtSignal(str, str)        # 会话名, 格式化后的文本
+    raw_data_received = pyqtSignal(str, bytes)  # 会话名, 原始数据
+    stats_updated = pyqtSignal(str, dict)       # 会话名, 接收统计
+    source_finished = pyqtSignal(str)           # 回放结束或串口读取出错
 
-    def __init__(self, ser, parent_widget=None):
+    def __init__(self, display_settings=None):
         super().__init__()
-        self.ser = ser
-        self.parent_widget = parent_widget
-        self._running = True
-        self.buffer = bytearray()
-        self.batch_size = 8192
+        self.receiver = SerialReceiver(
+            display_settings,
+            on_raw=self.raw_data_received.emit,
+            on_text=self.data_received.emit,
+            on_stats=self.stats_updated.emit,
+            on_finished=self.source_finished.emit,
+        )
+
+    def add_source(self, name, reader):
+        """界面线程调用，添加一个数据源（SerialReader 或 CaptureReplayReader）"""
+        self.receiver.add_source(name, reader)
+
+    def remove_source(self, name):
+        """界面线程调用，返回后接收线程不再读取该串口，可以安全关闭"""
+        self.receiver.remove_source(name)
+
+    def set_capture_writer(self, name, writer):
+        self.receiver.set_capture_writer(name, writer)
+
+    def set_display_settings(self, settings):
+        """界面线程调用，整体替换显示设置快照"""
+        self.receiver.set_display_settings(settings)
 
     def run(self):
-        while self._running: 
-            if self.ser and self.ser.is_open:
-                try:
-                    if self.ser.in_waiting:
-                        bytes_to_read = min(self.ser.in_waiting, self.batch_size)
-                        raw_data = self.ser.read(bytes_to_read)
-                        if raw_data:
-                            self.buffer.extend(raw_data)
-                            self.raw_data_received.emit(bytes(raw_data))
-                            
-                            # 检查显示设置
-                            is_hex_receive = True
-                            is_timestamp = True
-                            if self.parent_widget:
-                                if hasattr(self.parent_widget, 'hex_receive_checkbox'):
-                                    is_hex_receive = self.parent_widget.hex_receive_checkbox.isChecked()
-                                if hasattr(self.parent_widget, 'timestamp_checkbox'):
-                                    is_timestamp = self.parent_widget.timestamp_checkbox.isChecked()
-                            
-                            # 格式化数据
-                            if is_hex_receive:
-                                display_data = ' '.join([f'{b:02X}' for b in raw_data])
-                            else:
-                                try:
-                                    display_data = raw_data.decode('utf-8', errors='replace')
-                                except:
-                                    display_data = ' '.join([f'{b:02X}' for b in raw_data])
-                            
-                            if display_data:
-                                if is_timestamp:
-                                    timestamp = datetime.now().strftime("[%H:%M:%S.%f")[:-3] + "] "
-                                    data_to_send = timestamp + display_data + '\n'
-                                else:
-                                    data_to_send = display_data + '\n'
-                                self.data_received.emit(data_to_send)
-                        
-                except Exception as e:
-                    print(f"串口读取错误: {e}")
-            
-            self.msleep(1)
+        self.receiver.run()
+
+    def stop(self):
+        self.receiver.stop()
+        self.wait()
+        self.receiver.close()
+
+
+class LogSearchThread(QThread):
+    """
+    在后台线程中搜索接收日志的快照（LogBuffer.snapshot），逐块发出匹配的行
+    快照之后新增的行由界面线程在追加时增量匹配
+    """
+    matches_found = pyqtSignal(int, list)  # 搜索序号, [(绝对行号, 行), ...]
+    search_finished = pyqtSignal(int)      # 搜索序号
+
+    def __init__(self, generation, matcher, snapshot):
+        super().__init__()
+        self.generation = generation
+        self.matcher = matcher
+        self.snapshot = snapshot
+        self._stop = False
+
+    def run(self):
+        for batch in self.matcher.search_lines(self.snapshot, lambda: self._stop):
+            self.matches_found.emit(self.generation, batch)
+        self.search_finished.emit(self.generation)
 
     def stop(self):
-        self._running = False
+        self._stop = True
         self.wait()
 
 
 class SerialTerminalInterface(QWidget):
+    MAX_VIEW_LINES = 10000  # 接收区显示的最大行数
+    REPLAY_SPEEDS = {'1x': 1.0, '10x': 10.0, '最大': 0}  # 回放倍速，0 为不等待
+    ALL_SESSIONS = '全部'
+    MIN_AUTO_SEND_INTERVAL = 1  # 自动发送最小间隔(ms)
+    FFT_SIZES = (256, 512, 1024, 2048, 4096, 8192, 16384)
+    MAX_TRIGGER_SAMPLES = 100000  # 触发前/后最多保留的采样数
+    TRIGGER_MODES = {'自动': 'auto', '单次': 'single'}
+    # 数据面板的统计范围 -> 滑动窗口采样数，None 为全程
+    STATS_SCOPES = {'全程': None, '最近 1000 点': 1000, '最近 10000 点': 10000, '最近 100000 点': 100000}
+    DEFAULT_STATS_WINDOW = 10000
+
     def __init__(self, parent=None):
         super().__init__(parent=parent)
         self.setObjectName("serialTerminalInterface")
@@ -92,13 +125,17 @@ class SerialTerminalInterface(QWidget):
         basic_layout.addWidget(self.refresh_btn)
         basic_layout.addWidget(BodyLabel("波特率:"))
         self.baud_combo = ComboBox()
-        self.baud_combo.addItems(['115200', '9600', '57600', '38400', '19200', '4800'])
+        self.baud_combo.addItems([
+            '115200', '9600', '57600', '38400', '19200', '4800',
+            '230400', '460800', '921600', '2000000', '4000000'
+        ])
         self.baud_combo.setCurrentText('9600')
         basic_layout.addWidget(self.baud_combo)
         
         self.connect_btn = PrimaryPushButton("连接串口")
         self.connect_btn.clicked.connect(self.toggle_connection)
         basic_layout.addWidget(self.connect_btn)
+        self.port_combo.currentTextChanged.connect(self.update_connect_button)
         
         # 展开/折叠按钮
         self.expand_btn = PushButton(FluentIcon.DOWN, "高级设置")
@@ -136,12 +173,86 @@ class SerialTerminalInterface(QWidget):
         detail_layout.addStretch()
         advanced_main_layout.addLayout(detail_layout)
         
+        # 波形数据格式行
+        format_layout = QHBoxLayout()
+        format_layout.addWidget(BodyLabel("波形数据:"))
+        self.wave_format_combo = ComboBox()
+        self.wave_format_combo.addItems(['自动', '文本', 'VOFA JustFloat', '二进制帧'])
+        self.wave_format_combo.setCurrentText('自动')
+        format_layout.addWidget(self.wave_format_combo)
+        
+        format_layout.addWidget(BodyLabel("帧头:"))
+        self.frame_header_edit = LineEdit()
+        self.frame_header_edit.setText("A5 5A")
+        self.frame_header_edit.setMaximumWidth(100)
+        format_layout.addWidget(self.frame_header_edit)
+        
+        format_layout.addWidget(BodyLabel("长度字段:"))
+        self.frame_length_combo = ComboBox()
+        self.frame_length_combo.addItems(['无', 'uint8', 'uint16'])
+        self.frame_length_combo.setCurrentText('无')
+        format_layout.addWidget(self.frame_length_combo)
+        
+        format_layout.addWidget(BodyLabel("负载:"))
+        self.frame_payload_edit = LineEdit()
+        self.frame_payload_edit.setText("<8f")
+        self.frame_payload_edit.setPlaceholderText("struct格式，如 <8f、<4h2f")
+        self.frame_payload_edit.setMaximumWidth(120)
+        format_layout.addWidget(self.frame_payload_edit)
+        
+        format_layout.addWidget(BodyLabel("校验:"))
+        self.frame_crc_combo = ComboBox()
+        self.frame_crc_combo.addItems(['无', 'CRC8', 'CRC16'])
+        self.frame_crc_combo.setCurrentText('无')
+        format_layout.addWidget(self.frame_crc_combo)
+        format_layout.addStretch()
+        advanced_main_layout.addLayout(format_layout)
+        
+        self.wave_format_combo.currentTextChanged.connect(self.update_data_decoder)
+        self.frame_length_combo.currentTextChanged.connect(self.update_data_decoder)
+        self.frame_crc_combo.currentTextChanged.connect(self.update_data_decoder)
+        self.frame_header_edit.editingFinished.connect(self.update_data_decoder)
+        self.frame_payload_edit.editingFinished.connect(self.update_data_decoder)
+        
+        # 录制/回放行
+        capture_layout = QHBoxLayout()
+        capture_layout.addWidget(BodyLabel("录制:"))
+        self.capture_btn = PushButton(FluentIcon.SAVE, "开始录制")
+        self.capture_btn.clicked.connect(self.toggle_capture)
+        capture_layout.addWidget(self.capture_btn)
+        
+        self.replay_btn = PushButton(FluentIcon.PLAY, "回放录制")
+        self.replay_btn.clicked.connect(self.toggle_replay)
+        capture_layout.addWidget(self.replay_btn)
+        
+        capture_layout.addWidget(BodyLabel("速度:"))
+        self.replay_speed_combo = ComboBox()
+        self.replay_speed_combo.addItems(list(self.REPLAY_SPEEDS))
+        self.replay_speed_combo.setCurrentText('1x')
+        self.replay_speed_combo.currentTextChanged.connect(self.update_replay_speed)
+        capture_layout.addWidget(self.replay_speed_combo)
+        
+        # 回放进度，拖动后从对应时间继续回放
+        self.replay_slider = Slider(Qt.Horizontal)
+        self.replay_slider.setRange(0, 1000)
+        self.replay_slider.setEnabled(False)
+        self.replay_slider.sliderReleased.connect(self.seek_replay)
+        capture_layout.addWidget(self.replay_slider, 1)
+        
+        self.capture_status_label = CaptionLabel("")
+        capture_layout.addWidget(self.capture_status_label)
+        advanced_main_layout.addLayout(capture_layout)
+        
         main_layout.addWidget(self.advanced_widget)
         main_layout.addWidget(HorizontalSeparator())
 
         # 初始化状态变量
-        self.ser = None
-        self.read_thread = None
+        self.sessions = {}  # 会话名（串口号） -> SerialSession，多个串口可同时打开
+        self.session_stats = {}  # 会话名 -> 最近一次接收统计
+        self.read_thread = None  # 所有会话共用的接收线程
+        self.capture_writer = None  # 录制中的 CaptureWriter
+        self.capture_session = None  # 正在录制的会话名
+        self.replay_session = None  # 回放会话名
         self.is_chart_mode = False  # 默认使用文本模式
         self.is_paused = False
 
@@ -185,7 +296,11 @@ class SerialTerminalInterface(QWidget):
             "• 波形图显示：\n"
             "  发送格式化数据（逗号或空格分隔的数值）\n"
             "  如: 1.2, 3.4, 5.6\n"
-            "  系统将自动识别数据通道并创建波形\n\n"
+            "  系统将自动识别数据通道并创建波形\n"
+            "  也支持 VOFA+ FireWater/JustFloat\n"
+            "• 二进制帧：\n"
+            "  在高级设置中配置帧头、长度字段、\n"
+            "  负载格式(struct)与CRC校验\n\n"
         )
         usage_content.setWordWrap(True)
         usage_content.setAlignment(Qt.AlignmentFlag.AlignLeft)
@@ -206,6 +321,12 @@ class SerialTerminalInterface(QWidget):
         self.mode_toggle_btn.clicked.connect(self.toggle_display_mode)
         switch_layout.addWidget(self.mode_toggle_btn)
         
+        # 波形模式下在时域波形与频谱之间切换
+        self.spectrum_btn = PushButton("频谱")
+        self.spectrum_btn.clicked.connect(self.toggle_spectrum_view)
+        self.spectrum_btn.setVisible(False)
+        switch_layout.addWidget(self.spectrum_btn)
+        
         self.pause_btn = PushButton(FluentIcon.PAUSE, "暂停接收")
         self.pause_btn.clicked.connect(self.toggle_pause_receive)
         switch_layout.addWidget(self.pause_btn)
@@ -216,27 +337,80 @@ class SerialTerminalInterface(QWidget):
         
         self.hex_receive_checkbox = CheckBox("HEX接收  ")
         self.hex_receive_checkbox.setChecked(True)
+        self.hex_receive_checkbox.stateChanged.connect(self.update_display_settings)
         switch_layout.addWidget(self.hex_receive_checkbox)
         
         self.timestamp_checkbox = CheckBox("时间戳")
         self.timestamp_checkbox.setChecked(True)
+        self.timestamp_checkbox.stateChanged.connect(self.update_display_settings)
         switch_layout.addWidget(self.timestamp_checkbox)
         
+        # 会话选择：波形、发送与波形格式设置作用于所选会话，“全部”为按时间对齐的合并视图
+        switch_layout.addWidget(BodyLabel("会话:"))
+        self.session_combo = ComboBox()
+        self.session_combo.addItem(self.ALL_SESSIONS)
+        self.session_combo.currentTextChanged.connect(self.on_session_changed)
+        switch_layout.addWidget(self.session_combo)
+        
         switch_layout.addStretch()
+        
+        # 接收统计
+        self.rx_stats_label = CaptionLabel("")
+        switch_layout.addWidget(self.rx_stats_label)
         right_layout.addLayout(switch_layout)
         
         # 创建堆叠布局用于切换显示内容
         self.display_stack = QStackedWidget()
         
-        # 原始数据显示页面
-        self.text_edit = TextEdit()
+        # 原始数据显示页面：接收日志保存在环形缓冲中，界面只保留最近 MAX_VIEW_LINES 行
+        self.log_buffer = LogBuffer()
+        log_page = QWidget()
+        log_layout = QVBoxLayout(log_page)
+        log_layout.setContentsMargins(0, 0, 0, 0)
+        log_layout.setSpacing(8)
+        
+        # 日志搜索：回车后在后台线程搜索全部日志，只显示匹配的行，之后新收到的匹配行实时追加
+        search_layout = QHBoxLayout()
+        self.search_input = LineEdit()
+        self.search_input.setPlaceholderText("搜索接收日志，回车只显示匹配行")
+        self.search_input.setClearButtonEnabled(True)
+        self.search_input.returnPressed.connect(self.apply_log_filter)
+        search_layout.addWidget(self.search_input, 1)
+        
+        self.search_regex_checkbox = CheckBox("正则")
+        search_layout.addWidget(self.search_regex_checkbox)
+        self.search_case_checkbox = CheckBox("区分大小写")
+        search_layout.addWidget(self.search_case_checkbox)
+        
+        self.search_clear_btn = PushButton("显示全部")
+        self.search_clear_btn.clicked.connect(self.clear_log_filter)
+        self.search_clear_btn.setEnabled(False)
+        search_layout.addWidget(self.search_clear_btn)
+        
+        self.search_status_label = CaptionLabel("")
+        search_layout.addWidget(self.search_status_label)
+        log_layout.addLayout(search_layout)
+        
+        self.text_edit = PlainTextEdit()
         self.text_edit.setReadOnly(True)
+        self.text_edit.setUndoRedoEnabled(False)
+        self.text_edit.setMaximumBlockCount(self.MAX_VIEW_LINES)
         self.text_edit.setMinimumWidth(400)
-        self.display_stack.addWidget(self.text_edit)
+        log_layout.addWidget(self.text_edit, 1)
+        self.display_stack.addWidget(log_page)
+        
+        self.log_filter = None  # 筛选中的 LogMatcher
+        self.log_search_thread = None
+        self.log_search_generation = 0
+        self.log_filter_matches = 0
+        self.log_filter_pending = deque(maxlen=self.MAX_VIEW_LINES)  # 后台搜索期间新增的匹配行
         
         # 波形图显示页面
         self.setup_chart_widget()
         
+        # 频谱显示页面，与波形图共用各会话的通道存储
+        self.setup_spectrum_widget()
+        
         right_layout.addWidget(self.display_stack)
         center_hbox.addWidget(right_widget, 1)
         
@@ -277,24 +451,28 @@ class SerialTerminalInterface(QWidget):
         self.auto_send_interval.setMaximumWidth(80)
         bottom_hbox.addWidget(self.auto_send_interval)
         
+        self.tx_stats_label = CaptionLabel("")
+        bottom_hbox.addWidget(self.tx_stats_label)
+        
         bottom_hbox.addStretch()
         main_layout.addLayout(bottom_hbox)
 
-        # 数据解析相关
-        self.data_buffer = bytearray()
-        self.max_data_points = 5000
-        self.data_history = {}  # 动态存储数据
-        self.data_timestamps = deque(maxlen=self.max_data_points)
-        self.data_channels = []  # 数据通道列表
+        # 数据解析相关：每个会话有独立的解码器与通道存储（SerialSession）
+        self.max_data_points = 1_000_000  # 每个通道保留的采样数
+        self.data_channels = []  # 当前显示的通道名列表
+        self.session_channels = {}  # 会话名 -> 该会话在图中的通道名列表
         
         # 图表更新定时器
         self.chart_timer = QTimer()
         self.chart_timer.timeout.connect(self.update_charts)
         self.chart_timer.setInterval(50)
         
-        # 自动发送定时器
-        self.auto_send_timer = QTimer()
-        self.auto_send_timer.timeout.connect(self.auto_send_data)
+        # 自动发送：独立的发送线程（TransmitScheduler），界面每秒刷新发送统计
+        self.transmitter = None
+        self.transmit_sessions = []  # 自动发送的目标会话名
+        self.tx_stats_timer = QTimer()
+        self.tx_stats_timer.timeout.connect(self.update_tx_stats)
+        self.tx_stats_timer.setInterval(1000)
         
         # 监听主题变化
         qconfig.themeChangedFinished.connect(self.on_theme_changed)
@@ -306,7 +484,14 @@ class SerialTerminalInterface(QWidget):
         chart_main_layout.setContentsMargins(0, 0, 0, 0)
         chart_main_layout.setSpacing(8)
         
-        # 左侧：波形图
+        # 左侧：触发设置与波形图
+        plot_container = QWidget()
+        plot_layout = QVBoxLayout(plot_container)
+        plot_layout.setContentsMargins(0, 0, 0, 0)
+        plot_layout.setSpacing(8)
+        self.setup_trigger_bar()
+        plot_layout.addLayout(self.trigger_layout)
+        
         self.main_plot = pg.PlotWidget()
         self.apply_plot_style()
         self.main_plot.setTitle('实时数据波形图', size='14pt')
@@ -316,8 +501,9 @@ class SerialTerminalInterface(QWidget):
         self.main_plot.setAntialiasing(True)
         self.main_plot.setMouseEnabled(x=True, y=True)
         self.main_plot.enableAutoRange()
+        plot_layout.addWidget(self.main_plot, 1)
         
-        chart_main_layout.addWidget(self.main_plot, 3)
+        chart_main_layout.addWidget(plot_container, 3)
         
         # 右侧：实时数据显示面板
         self.setup_data_display_panel()
@@ -329,10 +515,124 @@ class SerialTerminalInterface(QWidget):
         # 初始化曲线字典
         self.curves = {}
         
+    def setup_trigger_bar(self):
+        """设置触发栏：任一通道的边沿/电平触发，触发后波形图冻结显示采集到的片段，采集在后台继续"""
+        self.trigger_layout = QHBoxLayout()
+        self.trigger_checkbox = CheckBox("触发")
+        self.trigger_checkbox.stateChanged.connect(self.update_trigger)
+        self.trigger_layout.addWidget(self.trigger_checkbox)
+        
+        self.trigger_channel_combo = ComboBox()
+        self.trigger_channel_combo.setMinimumWidth(100)
+        self.trigger_channel_combo.currentTextChanged.connect(self.update_trigger)
+        self.trigger_layout.addWidget(self.trigger_channel_combo)
+        
+        self.trigger_type_combo = ComboBox()
+        self.trigger_type_combo.addItems(list(TRIGGER_TYPES.values()))
+        self.trigger_type_combo.currentTextChanged.connect(self.update_trigger)
+        self.trigger_layout.addWidget(self.trigger_type_combo)
+        
+        self.trigger_layout.addWidget(BodyLabel("电平:"))
+        self.trigger_level_input = LineEdit()
+        self.trigger_level_input.setText("0")
+        self.trigger_level_input.setFixedWidth(80)
+        self.trigger_level_input.editingFinished.connect(self.update_trigger)
+        self.trigger_layout.addWidget(self.trigger_level_input)
+        
+        self.trigger_layout.addWidget(BodyLabel("触发前/后:"))
+        self.trigger_pre_input = LineEdit()
+        self.trigger_pre_input.setText("500")
+        self.trigger_pre_input.setFixedWidth(70)
+        self.trigger_pre_input.editingFinished.connect(self.update_trigger)
+        self.trigger_layout.addWidget(self.trigger_pre_input)
+        self.trigger_post_input = LineEdit()
+        self.trigger_post_input.setText("500")
+        self.trigger_post_input.setFixedWidth(70)
+        self.trigger_post_input.editingFinished.connect(self.update_trigger)
+        self.trigger_layout.addWidget(self.trigger_post_input)
+        
+        self.trigger_mode_combo = ComboBox()
+        self.trigger_mode_combo.addItems(list(self.TRIGGER_MODES.keys()))
+        self.trigger_mode_combo.currentTextChanged.connect(self.update_trigger)
+        self.trigger_layout.addWidget(self.trigger_mode_combo)
+        
+        self.trigger_arm_btn = PushButton("重新触发")
+        self.trigger_arm_btn.clicked.connect(self.update_trigger)
+        self.trigger_layout.addWidget(self.trigger_arm_btn)
+        
+        self.trigger_layout.addStretch()
+        self.trigger_status_label = CaptionLabel("")
+        self.trigger_layout.addWidget(self.trigger_status_label)
+        
+        self.trigger_session = None  # 设置了触发的会话名
+        self.trigger_shown_id = 0  # 已显示的片段编号
+        self.trigger_lines = []  # 触发时刻与触发电平的参考线
+        
+    def setup_spectrum_widget(self):
+        """设置频谱显示区域"""
+        spectrum_container = QWidget()
+        spectrum_layout = QVBoxLayout(spectrum_container)
+        spectrum_layout.setContentsMargins(0, 0, 0, 0)
+        spectrum_layout.setSpacing(8)
+        
+        # 频谱参数
+        params_layout = QHBoxLayout()
+        params_layout.addWidget(BodyLabel("点数:"))
+        self.fft_size_combo = ComboBox()
+        self.fft_size_combo.addItems([str(size) for size in self.FFT_SIZES])
+        self.fft_size_combo.setCurrentText('1024')
+        self.fft_size_combo.currentTextChanged.connect(self.update_spectrum_params)
+        params_layout.addWidget(self.fft_size_combo)
+        
+        params_layout.addWidget(BodyLabel("窗函数:"))
+        self.fft_window_combo = ComboBox()
+        self.fft_window_combo.addItems(list(WINDOWS))
+        self.fft_window_combo.currentTextChanged.connect(self.update_spectrum_params)
+        params_layout.addWidget(self.fft_window_combo)
+        
+        params_layout.addWidget(BodyLabel("平均帧数:"))
+        self.fft_frames_combo = ComboBox()
+        self.fft_frames_combo.addItems(['1', '4', '8', '16'])
+        self.fft_frames_combo.setCurrentText('4')
+        self.fft_frames_combo.currentTextChanged.connect(self.update_spectrum_params)
+        params_layout.addWidget(self.fft_frames_combo)
+        
+        params_layout.addWidget(BodyLabel("采样率(Hz):"))
+        self.fft_rate_input = LineEdit()
+        self.fft_rate_input.setPlaceholderText("自动")
+        self.fft_rate_input.setFixedWidth(90)
+        self.fft_rate_input.editingFinished.connect(self.update_spectrum_params)
+        params_layout.addWidget(self.fft_rate_input)
+        
+        self.fft_db_checkbox = CheckBox("dB")
+        self.fft_db_checkbox.setChecked(True)
+        self.fft_db_checkbox.stateChanged.connect(self.update_spectrum_params)
+        params_layout.addWidget(self.fft_db_checkbox)
+        
+        params_layout.addStretch()
+        self.spectrum_rate_label = CaptionLabel("")
+        params_layout.addWidget(self.spectrum_rate_label)
+        spectrum_layout.addLayout(params_layout)
+        
+        self.spectrum_plot = pg.PlotWidget()
+        self.spectrum_plot.setTitle('频谱', size='14pt')
+        self.spectrum_plot.showGrid(x=True, y=True, alpha=0.3)
+        self.spectrum_plot.setLabel('left', '幅值 (dB)')
+        self.spectrum_plot.setLabel('bottom', '频率 (Hz)')
+        self.spectrum_plot.setMouseEnabled(x=True, y=True)
+        self.spectrum_plot.enableAutoRange()
+        self.apply_plot_style()
+        spectrum_layout.addWidget(self.spectrum_plot, 1)
+        
+        self.display_stack.addWidget(spectrum_container)
+        
+        self.spectrum_analyzer = SpectrumAnalyzer(1024, 'hann', 4, True)
+        self.spectrum_curves = {}
+        
     def setup_data_display_panel(self):
-        """设置实时数据显示面板"""
+        """设置实时数据显示面板：每个通道的最新值与统计（全程或最近 N 个采样）"""
         self.data_display_panel = CardWidget()
-        self.data_display_panel.setFixedWidth(200)
+        self.data_display_panel.setFixedWidth(220)
         
         panel_layout = QVBoxLayout(self.data_display_panel)
         panel_layout.setContentsMargins(16, 16, 16, 16)
@@ -342,21 +642,34 @@ class SerialTerminalInterface(QWidget):
         title_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
         panel_layout.addWidget(title_label)
         
+        # 统计范围
+        self.stats_scope_combo = ComboBox()
+        self.stats_scope_combo.addItems(list(self.STATS_SCOPES.keys()))
+        self.stats_scope_combo.setCurrentText('最近 10000 点')
+        self.stats_scope_combo.currentTextChanged.connect(self.update_stats_scope)
+        panel_layout.addWidget(self.stats_scope_combo)
+        
         panel_layout.addWidget(HorizontalSeparator())
         panel_layout.addSpacing(8)
         
-        # 数据标签容器
+        # 数据标签容器，通道较多时滚动显示
         self.data_labels_container = QWidget()
         self.data_labels_layout = QVBoxLayout(self.data_labels_container)
         self.data_labels_layout.setContentsMargins(0, 0, 0, 0)
         self.data_labels_layout.setSpacing(8)
-        panel_layout.addWidget(self.data_labels_container)
+        self.data_labels_layout.addStretch()
+        scroll_area = QScrollArea()
+        scroll_area.setWidgetResizable(True)
+        scroll_area.setFrameShape(QScrollArea.NoFrame)
+        scroll_area.setStyleSheet("QScrollArea { background: transparent; }")
+        self.data_labels_container.setStyleSheet("background: transparent;")
+        scroll_area.setWidget(self.data_labels_container)
+        panel_layout.addWidget(scroll_area, 1)
         
         self.data_labels = {}
+        self.stats_labels = {}
         self.data_cards = {}
         
-        panel_layout.addStretch()
-        
     def get_theme_colors(self):
         """获取主题颜色"""
         colors = [
@@ -376,16 +689,20 @@ class SerialTerminalInterface(QWidget):
             bg_color = '#ffffff'
             text_color = '#333333'
         
-        self.main_plot.setBackground(bg_color)
-        
-        try:
-            axis_pen = pg.mkPen(color=text_color, width=1)
-            self.main_plot.getAxis('left').setPen(axis_pen)
-            self.main_plot.getAxis('bottom').setPen(axis_pen)
-            self.main_plot.getAxis('left').setTextPen(text_color)
-            self.main_plot.getAxis('bottom').setTextPen(text_color)
-        except Exception as e:
-            print(f"设置坐标轴样式错误: {e}")
+        plots = [self.main_plot]
+        if hasattr(self, 'spectrum_plot'):
+            plots.append(self.spectrum_plot)
+        for plot in plots:
+            plot.setBackground(bg_color)
+            
+            try:
+                axis_pen = pg.mkPen(color=text_color, width=1)
+                plot.getAxis('left').setPen(axis_pen)
+                plot.getAxis('bottom').setPen(axis_pen)
+                plot.getAxis('left').setTextPen(text_color)
+                plot.getAxis('bottom').setTextPen(text_color)
+            except Exception as e:
+                print(f"设置坐标轴样式错误: {e}")
 
     def on_theme_changed(self):
         """主题变化时更新样式"""
@@ -399,17 +716,52 @@ class SerialTerminalInterface(QWidget):
         if self.is_chart_mode:
             self.display_stack.setCurrentIndex(1)
             self.mode_toggle_btn.setText("切换到原始数据")
+            self.spectrum_btn.setText("频谱")
+            self.spectrum_btn.setVisible(True)
             self.hex_receive_checkbox.setVisible(False)
             self.timestamp_checkbox.setVisible(False)
-            if self.ser and self.ser.is_open:
+            if self.read_thread:
                 self.chart_timer.start()
         else:
             self.display_stack.setCurrentIndex(0)
             self.mode_toggle_btn.setText("切换到波形图")
+            self.spectrum_btn.setVisible(False)
             self.hex_receive_checkbox.setVisible(True)
             self.timestamp_checkbox.setVisible(True)
             self.chart_timer.stop()
 
+    def toggle_spectrum_view(self):
+        """波形模式下切换时域波形/频谱页面，两者由同一个图表定时器刷新"""
+        if self.display_stack.currentIndex() == 2:
+            self.display_stack.setCurrentIndex(1)
+            self.spectrum_btn.setText("频谱")
+        else:
+            self.display_stack.setCurrentIndex(2)
+            self.spectrum_btn.setText("时域波形")
+        self.update_charts()
+
+    def update_spectrum_params(self, *_args):
+        """频谱参数变化后下一次刷新重新计算"""
+        text = self.fft_rate_input.text().strip()
+        try:
+            sample_rate = float(text) if text else None
+        except ValueError:
+            sample_rate = None
+            self.append_log(f"{format_timestamp()}采样率格式错误: {text}")
+        if sample_rate is not None and sample_rate <= 0:
+            sample_rate = None
+        db = self.fft_db_checkbox.isChecked()
+        self.spectrum_analyzer.set_params(
+            size=int(self.fft_size_combo.currentText()),
+            window=self.fft_window_combo.currentText(),
+            frames=int(self.fft_frames_combo.currentText()),
+            db=db,
+            sample_rate=sample_rate,
+        )
+        self.spectrum_plot.setLabel('left', '幅值 (dB)' if db else '幅值')
+        self.spectrum_plot.enableAutoRange()
+        self.update_charts()
+
     def toggle_pause_receive(self):
         """切换暂停/恢复"""
         self.is_paused = not self.is_paused
@@ -422,15 +774,21 @@ class SerialTerminalInterface(QWidget):
 
     def clear_display(self):
         """清空显示"""
+        self.stop_log_search()
         self.text_edit.clear()
-        for key in self.data_history:
-            self.data_history[key].clear()
-        if hasattr(self, 'data_timestamps'):
-            self.data_timestamps.clear()
-        if hasattr(self, 'curves'):
-            for curve in self.curves.values():
-                curve.setData([], [])
-        self.data_buffer.clear()
+        self.log_buffer.clear()
+        self.log_filter_matches = 0
+        self.log_filter_pending.clear()
+        if self.log_filter is not None:
+            self.update_search_status()
+        for session in self.sessions.values():
+            session.clear()
+        for curve in self.curves.values():
+            curve.setData([], [])
+        for curve in self.spectrum_curves.values():
+            curve.setData([], [])
+        self.spectrum_analyzer.clear()
+        self.update_trigger()  # 重新等待触发
 
     def toggle_advanced_settings(self):
         """切换高级设置显示"""
@@ -457,12 +815,18 @@ class SerialTerminalInterface(QWidget):
             self.port_combo.addItem(port.device)
 
     def toggle_connection(self):
-        """切换连接状态"""
-        if self.ser and self.ser.is_open:
+        """连接/断开所选串口，已连接的其它串口不受影响"""
+        if self.port_combo.currentText() in self.sessions:
             self.disconnect_serial()
         else:
             self.connect_serial()
 
+    def update_connect_button(self):
+        if self.port_combo.currentText() in self.sessions:
+            self.connect_btn.setText("断开连接")
+        else:
+            self.connect_btn.setText("连接串口")
+
     def connect_serial(self):
         """连接串口"""
         port = self.port_combo.currentText()
@@ -486,7 +850,8 @@ class SerialTerminalInterface(QWidget):
         stop_bits = stop_bits_map[self.stop_bits_combo.currentText()]
         
         try:
-            self.ser = serial.Serial(
+            decoder = self.create_data_decoder()
+            ser = serial.Serial(
                 port=port,
                 baudrate=baud,
                 bytesize=data_bits,
@@ -495,99 +860,407 @@ class SerialTerminalInterface(QWidget):
                 timeout=0.1
             )
             
-            self.ser.reset_input_buffer()
-            self.ser.reset_output_buffer()
-            
-            self.connect_btn.setText("断开连接")
-            timestamp = datetime.now().strftime("[%H:%M:%S.%f")[:-3] + "] "
-            self.text_edit.append(f"{timestamp}已连接到 {port} @ {baud}")
+            ser.reset_input_buffer()
+            ser.reset_output_buffer()
             
-            self.read_thread = SerialReadThread(self.ser, self)
-            self.read_thread.data_received.connect(self.display_data)
-            self.read_thread.raw_data_received.connect(self.process_raw_data)
-            self.read_thread.start()
-            
-            if self.is_chart_mode:
-                self.chart_timer.start()
+            self.add_session(SerialSession(
+                port, ser, SerialReader(ser), decoder, self.max_data_points, self.stats_window()
+            ))
+            timestamp = format_timestamp()
+            self.append_log(f"{timestamp}已连接到 {port} @ {baud}")
                 
         except Exception as e:
-            timestamp = datetime.now().strftime("[%H:%M:%S.%f")[:-3] + "] "
-            self.text_edit.append(f"{timestamp}连接失败: {e}")
+            timestamp = format_timestamp()
+            self.append_log(f"{timestamp}连接失败: {e}")
 
     def disconnect_serial(self):
-        """断开串口"""
-        self.chart_timer.stop()
-        self.auto_send_timer.stop()  # 停止自动发送
-        if self.read_thread:
+        """断开所选串口"""
+        port = self.port_combo.currentText()
+        if port in self.sessions:
+            self.close_session(port)
+            timestamp = format_timestamp()
+            self.append_log(f"{timestamp}已断开 {port}")
+
+    def add_session(self, session):
+        """登记会话并交给共用的接收线程"""
+        self.sessions[session.name] = session
+        self.session_combo.addItem(session.name)
+        if self.read_thread is None:
+            self.read_thread = SerialReadThread(self.get_display_settings())
+            self.read_thread.data_received.connect(self.display_data)
+            self.read_thread.raw_data_received.connect(self.process_raw_data)
+            self.read_thread.stats_updated.connect(self.update_rx_stats)
+            self.read_thread.source_finished.connect(self.on_source_finished)
+            self.read_thread.start()
+        self.read_thread.add_source(session.name, session.reader)
+        self.update_connect_button()
+        self.rebuild_channels()
+        if self.is_chart_mode:
+            self.chart_timer.start()
+
+    def close_session(self, name):
+        """关闭会话；最后一个会话关闭后停止接收线程"""
+        session = self.sessions.pop(name, None)
+        if session is None:
+            return
+        if name == self.capture_session:
+            self.stop_capture()
+        if name in self.transmit_sessions:
+            self.auto_send_checkbox.setChecked(False)  # 停止自动发送
+        self.read_thread.remove_source(name)
+        session.close()
+        self.session_stats.pop(name, None)
+
+        if self.session_combo.currentText() == name:
+            self.session_combo.setCurrentText(self.ALL_SESSIONS)
+        self.session_combo.removeItem(self.session_combo.findText(name))
+        if not self.sessions:
+            self.chart_timer.stop()
             self.read_thread.stop()
             self.read_thread = None
-        if self.ser:
-            self.ser.close()
-            self.ser = None
-        self.connect_btn.setText("连接串口")
-        timestamp = datetime.now().strftime("[%H:%M:%S.%f")[:-3] + "] "
-        self.text_edit.append(f"{timestamp}已断开连接")
-
-    def display_data(self, data):
-        """显示接收数据"""
+            self.rx_stats_label.setText("")
+        self.update_connect_button()
+        self.rebuild_channels()
+
+    def on_source_finished(self, name):
+        """回放到文件末尾，或串口读取出错（如设备被拔出）"""
+        if name not in self.sessions:
+            return
+        if name == self.replay_session:
+            self.update_charts()
+            self.stop_replay()
+        else:
+            self.close_session(name)
+            timestamp = format_timestamp()
+            self.append_log(f"{timestamp}{name} 读取出错，已断开")
+
+    def selected_session(self):
+        """会话下拉框选中的会话，选“全部”时为 None"""
+        return self.sessions.get(self.session_combo.currentText())
+
+    def displayed_sessions(self):
+        """波形图显示的会话：选中的会话，或全部会话（合并视图）"""
+        session = self.selected_session()
+        return [session] if session is not None else list(self.sessions.values())
+
+    def on_session_changed(self, _text):
+        self.rebuild_channels()
+        self.update_rx_stats_label()
+
+    def toggle_capture(self):
+        """开始/停止录制所选会话接收到的原始数据"""
+        if self.capture_writer:
+            self.stop_capture()
+            return
+        sessions = self.displayed_sessions()
+        if len(sessions) != 1:
+            timestamp = format_timestamp()
+            self.append_log(f"{timestamp}请先连接串口，并在“会话”中选择要录制的串口")
+            return
+        session = sessions[0]
+        path, _ = QFileDialog.getSaveFileName(self, "保存录制文件", "capture.mrcap", "串口录制 (*.mrcap)")
+        if not path:
+            return
+        meta = {'port': session.name}
+        if session.ser is not None:
+            meta['baudrate'] = session.ser.baudrate
+        try:
+            self.capture_writer = CaptureWriter(path, meta)
+        except OSError as e:
+            self.append_log(f"{format_timestamp()}录制失败: {e}")
+            return
+        self.capture_session = session.name
+        self.read_thread.set_capture_writer(session.name, self.capture_writer)
+        self.capture_btn.setText("停止录制")
+        self.append_log(f"{format_timestamp()}开始录制 {session.name}: {path}")
+
+    def stop_capture(self):
+        """停止录制，等待写线程写完剩余数据"""
+        writer = self.capture_writer
+        if writer is None:
+            return
+        if self.read_thread:
+            self.read_thread.set_capture_writer(self.capture_session, None)
+        self.capture_writer = None
+        self.capture_session = None
+        writer.close()
+        self.capture_btn.setText("开始录制")
+        self.capture_status_label.setText("")
+        self.append_log(
+            f"{format_timestamp()}录制已保存: {writer.path}（{writer.records} 块, {writer.bytes / 1024:.1f} KB）"
+        )
+
+    def toggle_replay(self):
+        """回放录制文件：作为一个会话接入接收线程，与实时数据走同样的显示与波形解析，可与实时数据对齐比较"""
+        if self.replay_session:
+            self.stop_replay()
+            return
+        try:
+            decoder = self.create_data_decoder()
+        except ValueError as e:
+            self.append_log(f"{format_timestamp()}波形数据格式错误: {e}")
+            return
+        path, _ = QFileDialog.getOpenFileName(self, "打开录制文件", "", "串口录制 (*.mrcap)")
+        if not path:
+            return
+        try:
+            capture = CaptureFile(path)
+        except (OSError, ValueError) as e:
+            self.append_log(f"{format_timestamp()}打开录制文件失败: {e}")
+            return
+        if not len(capture):
+            capture.close()
+            self.append_log(f"{format_timestamp()}录制文件为空: {path}")
+            return
+
+        speed = self.REPLAY_SPEEDS[self.replay_speed_combo.currentText()]
+        name = f"回放:{os.path.basename(path)}"
+        self.replay_session = name
+        self.add_session(SerialSession(
+            name, None, CaptureReplayReader(capture, speed), decoder, self.max_data_points, self.stats_window()
+        ))
+        self.replay_btn.setText("停止回放")
+        self.replay_slider.setEnabled(True)
+        self.replay_slider.setValue(0)
+        meta = capture.meta
+        self.append_log(
+            f"{format_timestamp()}开始回放 {path}（{meta.get('port', '')} @ {meta.get('baudrate', '')}, "
+            f"时长 {capture.duration_ns / 1e9:.1f} s）"
+        )
+
+    def replay_reader(self):
+        session = self.sessions.get(self.replay_session)
+        return session.reader if session is not None else None
+
+    def stop_replay(self):
+        """停止回放并关闭录制文件"""
+        reader = self.replay_reader()
+        if reader is None:
+            return
+        self.close_session(self.replay_session)
+        self.replay_session = None
+        reader.capture.close()
+        self.replay_btn.setText("回放录制")
+        self.replay_slider.setEnabled(False)
+        self.capture_status_label.setText("")
+        self.append_log(f"{format_timestamp()}回放结束")
+
+    def update_replay_speed(self, text):
+        reader = self.replay_reader()
+        if reader is not None:
+            reader.set_speed(self.REPLAY_SPEEDS[text])
+
+    def seek_replay(self):
+        """拖动进度条后跳转到对应时间"""
+        session = self.sessions.get(self.replay_session)
+        if session is None:
+            return
+        reader = session.reader
+        capture = reader.capture
+        target = int(capture.times[0]) + capture.duration_ns * self.replay_slider.value() // 1000
+        reader.seek(capture.find_time(target))
+        # 跳转前未解析完的半帧不能与跳转后的数据拼在一起，时间戳也从跳转处重新开始
+        session.decoder.reset()
+        session.last_sample_time = None
+
+    def update_capture_status(self):
+        """录制/回放进度，随接收统计每秒刷新"""
+        reader = self.replay_reader()
+        if self.capture_writer:
+            self.capture_status_label.setText(f"已录制 {self.capture_writer.bytes / 1048576:.1f} MB")
+        elif reader is not None:
+            capture = reader.capture
+            position = min(reader.position, len(capture) - 1)
+            elapsed = int(capture.times[position] - capture.times[0])
+            duration = capture.duration_ns
+            self.capture_status_label.setText(f"{elapsed / 1e9:.1f} / {duration / 1e9:.1f} s")
+            if not self.replay_slider.isSliderDown():
+                self.replay_slider.setValue(elapsed * 1000 // duration if duration else 1000)
+
+    def get_display_settings(self):
+        """当前显示设置的快照"""
+        return DisplaySettings(
+            hex_mode=self.hex_receive_checkbox.isChecked(),
+            timestamp=self.timestamp_checkbox.isChecked()
+        )
+
+    def update_display_settings(self):
+        """显示设置变化时通知接收线程"""
+        if self.read_thread:
+            self.read_thread.set_display_settings(self.get_display_settings())
+
+    def update_rx_stats(self, name, stats):
+        """记录某个会话的接收统计"""
+        if name in self.sessions:
+            self.session_stats[name] = stats
+            self.update_rx_stats_label()
+        self.update_capture_status()
+
+    def update_rx_stats_label(self):
+        """显示所选会话的接收统计，“全部”时显示合计"""
+        session = self.selected_session()
+        if session is None and len(self.sessions) == 1:
+            session = next(iter(self.sessions.values()))
+        if session is None:
+            total = sum(stats['bytes_per_sec'] for stats in self.session_stats.values())
+            text = f"{len(self.sessions)} 个会话  接收 {total / 1024:.1f} KB/s" if self.sessions else ""
+            self.rx_stats_label.setText(text)
+            return
+        stats = self.session_stats.get(session.name)
+        if stats is None:
+            self.rx_stats_label.setText("")
+            return
+        text = (
+            f"接收 {stats['bytes_per_sec'] / 1024:.1f} KB/s  "
+            f"{stats['reads_per_sec']:.0f} 次/s  "
+            f"最大延迟 {stats['max_latency_ms']:.2f} ms"
+        )
+        decoder = session.decoder
+        if isinstance(decoder, AutoDecoder) and decoder.decoder is not None:
+            text += f"  格式: {decoder.name}"
+            decoder = decoder.decoder
+        if isinstance(decoder, BinaryFrameDecoder):
+            text += f"  帧 {decoder.frames}  CRC错误 {decoder.crc_errors}"
+        elif isinstance(decoder, JustFloatDecoder):
+            text += f"  帧 {decoder.frames}  通道 {decoder.channels}"
+        self.rx_stats_label.setText(text)
+
+    def display_data(self, name, data):
+        """显示接收数据，同时打开多个会话时每行前加 [会话名]"""
         if self.is_paused:
             return
-            
-        self.text_edit.moveCursor(QTextCursor.End)
-        self.text_edit.insertPlainText(data)
-        self.text_edit.moveCursor(QTextCursor.End)
-        
-        if len(self.text_edit.toPlainText()) > 10000:
-            cursor = self.text_edit.textCursor()
-            cursor.movePosition(QTextCursor.Start)
-            cursor.movePosition(QTextCursor.NextCharacter, QTextCursor.KeepAnchor, 5000)
-            cursor.removeSelectedText()
-            self.text_edit.moveCursor(QTextCursor.End)
+        if len(self.sessions) > 1:
+            prefix = f"[{name}] "
+            body = data[:-1] if data.endswith('\n') else data
+            data = prefix + body.replace('\n', '\n' + prefix) + '\n'
+        self.write_log(data)
+
+    def append_log(self, text):
+        """显示一行状态/发送信息"""
+        self.write_log(text + '\n')
+
+    def write_log(self, text):
+        """追加到接收日志并显示；筛选时只对新增的完整行做匹配，不重新扫描历史"""
+        new_lines = self.log_buffer.append(text)
+        if self.log_filter is None:
+            # appendPlainText 自带换行；只有在视图位于底部时才自动滚动
+            self.text_edit.appendPlainText(text[:-1] if text.endswith('\n') else text)
+            return
+        if not new_lines:
+            return
+        lines = self.log_buffer.tail(new_lines)
+        matched = [lines[i] for i in self.log_filter.match_lines(lines)]
+        if not matched:
+            return
+        self.log_filter_matches += len(matched)
+        if self.log_search_thread is not None:
+            # 历史搜索尚未完成，先暂存，保证显示顺序
+            self.log_filter_pending.extend(matched)
+        else:
+            self.text_edit.appendPlainText('\n'.join(matched))
+            self.update_search_status()
+
+    def apply_log_filter(self):
+        """按搜索框内容筛选接收日志：后台线程搜索已有日志，新收到的行在追加时匹配"""
+        pattern = self.search_input.text()
+        if not pattern:
+            self.clear_log_filter()
+            return
+        try:
+            matcher = LogMatcher(
+                pattern, self.search_regex_checkbox.isChecked(), not self.search_case_checkbox.isChecked()
+            )
+        except re.error as e:
+            self.search_status_label.setText(f"正则错误: {e}")
+            return
+
+        self.stop_log_search()
+        self.log_filter = matcher
+        self.log_filter_matches = 0
+        self.log_filter_pending.clear()
+        self.text_edit.clear()
+        self.search_clear_btn.setEnabled(True)
+        self.search_status_label.setText("搜索中…")
+
+        self.log_search_generation += 1
+        thread = LogSearchThread(self.log_search_generation, matcher, self.log_buffer.snapshot())
+        thread.matches_found.connect(self.on_log_matches)
+        thread.search_finished.connect(self.on_log_search_finished)
+        self.log_search_thread = thread
+        thread.start()
+
+    def on_log_matches(self, generation, batch):
+        if generation != self.log_search_generation:
+            return
+        self.log_filter_matches += len(batch)
+        # 显示区只保留最近 MAX_VIEW_LINES 行，更早的匹配行不必交给控件
+        self.text_edit.appendPlainText('\n'.join(line for _, line in batch[-self.MAX_VIEW_LINES:]))
+
+    def on_log_search_finished(self, generation):
+        if generation != self.log_search_generation:
+            return
+        self.log_search_thread = None
+        if self.log_filter_pending:
+            self.text_edit.appendPlainText('\n'.join(self.log_filter_pending))
+            self.log_filter_pending.clear()
+        self.update_search_status()
+
+    def update_search_status(self):
+        self.search_status_label.setText(f"匹配 {self.log_filter_matches} 行 / 共 {len(self.log_buffer)} 行")
+
+    def stop_log_search(self):
+        """停止进行中的后台搜索，已发出但未处理的结果按搜索序号丢弃"""
+        thread = self.log_search_thread
+        if thread is None:
+            return
+        self.log_search_thread = None
+        self.log_search_generation += 1
+        thread.stop()
+
+    def clear_log_filter(self):
+        """取消筛选，显示区恢复为最近的日志"""
+        self.stop_log_search()
+        self.log_filter = None
+        self.log_filter_pending.clear()
+        self.search_clear_btn.setEnabled(False)
+        self.search_status_label.setText("")
+        self.text_edit.clear()
+        tail = self.log_buffer.tail(self.MAX_VIEW_LINES)
+        if tail:
+            self.text_edit.appendPlainText('\n'.join(tail))
 
     def send_data(self):
-        """发送数据"""
-        if self.ser and self.ser.is_open:
-            text = self.input_line.text()
+        """发送数据到所选会话（“全部”时发送到所有已连接的串口），内容与行尾合并为一次 write"""
+        targets = [session for session in self.displayed_sessions() if session.is_open]
+        if not targets:
+            return
+        text = self.input_line.text()
+        hex_mode = self.hex_send_checkbox.isChecked()
+        try:
+            frame = encode_frame(text, hex_mode, self.get_line_ending())
+        except ValueError:
+            timestamp = format_timestamp()
+            self.append_log(f"{timestamp}HEX格式错误")
+            return
+        sent_text = format_hex(self.parse_hex_string(text)) if hex_mode else text
+        for session in targets:
+            prefix = f"[{session.name}] " if len(self.sessions) > 1 else ""
             try:
-                if self.hex_send_checkbox.isChecked():
-                    hex_data = self.parse_hex_string(text)
-                    if hex_data is not None:
-                        self.ser.write(hex_data)
-                        line_ending = self.get_line_ending()
-                        if line_ending:
-                            self.ser.write(line_ending.encode())
-                        sent_hex = ' '.join([f'{b:02X}' for b in hex_data])
-                        timestamp = datetime.now().strftime("[%H:%M:%S.%f")[:-3] + "] "
-                        self.text_edit.append(f"{timestamp}发送: {sent_hex}")
-                    else:
-                        timestamp = datetime.now().strftime("[%H:%M:%S.%f")[:-3] + "] "
-                        self.text_edit.append(f"{timestamp}HEX格式错误")
-                else:
-                    data_to_send = text
-                    line_ending = self.get_line_ending()
-                    if line_ending:
-                        data_to_send += line_ending
-                    self.ser.write(data_to_send.encode())
-                    timestamp = datetime.now().strftime("[%H:%M:%S.%f")[:-3] + "] "
-                    self.text_edit.append(f"{timestamp}发送: {text}")
+                session.ser.write(frame)
+                timestamp = format_timestamp()
+                self.append_log(f"{timestamp}{prefix}发送: {sent_text}")
             except Exception as e:
-                timestamp = datetime.now().strftime("[%H:%M:%S.%f")[:-3] + "] "
-                self.text_edit.append(f"{timestamp}发送失败: {e}")
-            
-            # 只有在非自动发送模式下才清空输入框
-            if not self.auto_send_checkbox.isChecked():
-                self.input_line.clear()
+                timestamp = format_timestamp()
+                self.append_log(f"{timestamp}{prefix}发送失败: {e}")
+
+        # 只有在非自动发送模式下才清空输入框
+        if not self.auto_send_checkbox.isChecked():
+            self.input_line.clear()
 
     def parse_hex_string(self, hex_str):
         """解析十六进制字符串"""
         try:
-            hex_str = hex_str.replace(' ', '').replace('\t', '').upper()
-            if len(hex_str) % 2 != 0:
-                return None
-            byte_data = bytearray()
-            for i in range(0, len(hex_str), 2):
-                byte_data.append(int(hex_str[i:i+2], 16))
-            return bytes(byte_data)
+            return parse_hex(hex_str)
         except ValueError:
             return None
 
@@ -605,90 +1278,114 @@ class SerialTerminalInterface(QWidget):
     def update_input_placeholder(self):
         """更新输入框提示"""
         if self.hex_send_checkbox.isChecked():
-            self.input_line.setPlaceholderText("输入十六进制数据，如: AA 01 BB")
+            self.input_line.setPlaceholderText("输入十六进制数据，如: AA 01 BB；自动发送时可用 ; 分隔多帧")
         else:
-            self.input_line.setPlaceholderText("输入内容，回车发送")
+            self.input_line.setPlaceholderText("输入内容，回车发送；自动发送支持 htop;cali_gyro、set_kp {0:1:0.1}")
+
+    def create_data_decoder(self):
+        """根据高级设置中的波形数据格式创建解码器"""
+        wave_format = self.wave_format_combo.currentText()
+        if wave_format == '自动':
+            return AutoDecoder()
+        if wave_format == '文本':
+            return TextLineDecoder()
+        if wave_format == 'VOFA JustFloat':
+            return JustFloatDecoder()
+        length_formats = {'无': None, 'uint8': '<B', 'uint16': '<H'}
+        crc_types = {'无': None, 'CRC8': 'crc8', 'CRC16': 'crc16'}
+        spec = make_frame_spec(
+            parse_hex_bytes(self.frame_header_edit.text()),
+            self.frame_payload_edit.text().strip(),
+            length_formats[self.frame_length_combo.currentText()],
+            crc_types[self.frame_crc_combo.currentText()]
+        )
+        return BinaryFrameDecoder(spec)
+
+    def update_data_decoder(self):
+        """波形数据格式变化时为所选会话（“全部”时为所有会话）重建解码器"""
+        try:
+            for session in self.displayed_sessions():
+                session.set_decoder(self.create_data_decoder())
+        except ValueError as e:
+            self.append_log(f"{format_timestamp()}波形数据格式错误: {e}")
 
-    def process_raw_data(self, raw_data):
+    def process_raw_data(self, name, raw_data):
         """处理原始数据 - 自动解析数据结构"""
         if self.is_paused or not self.is_chart_mode:
             return
-            
-        self.data_buffer.extend(raw_data)
+        session = self.sessions.get(name)
+        if session is None:
+            return
         
         # 尝试解析数据包格式
-        self.auto_parse_data()
+        self.auto_parse_data(session, raw_data)
     
-    def auto_parse_data(self):
-        """自动解析数据格式"""
-        # 简单示例：假设数据是以空格或逗号分隔的浮点数
+    def auto_parse_data(self, session, raw_data):
+        """
+        自动解析数据格式：文本模式为逗号/空格/制表符/分号分隔的数值行（兼容 VOFA FireWater），
+        JustFloat 为 VOFA+ 浮点帧，二进制帧模式按高级设置中的帧格式解码，
+        自动模式根据数据内容在文本与 JustFloat 之间选择，不完整的行/帧留到下次
+        """
         try:
-            text_data = self.data_buffer.decode('utf-8', errors='ignore')
-            lines = text_data.strip().split('\n')
-            
-            for line in lines:
-                if not line.strip():
-                    continue
-                    
-                # 尝试解析为数值
-                values = []
-                for separator in [',', ' ', '\t', ';']:
-                    try:
-                        parts = [p.strip() for p in line.split(separator) if p.strip()]
-                        values = [float(p) for p in parts]
-                        if values:
-                            break
-                    except:
-                        continue
-                
-                if values:
-                    # 动态创建数据通道
-                    num_channels = len(values)
-                    if len(self.data_channels) != num_channels:
-                        self.create_data_channels(num_channels)
-                    
-                    # 存储数据
-                    current_time = time.time() * 1000
-                    self.data_timestamps.append(current_time)
-                    
-                    for i, value in enumerate(values):
-                        channel_name = f'CH{i+1}'
-                        if channel_name in self.data_history:
-                            self.data_history[channel_name].append(value)
-            
-            self.data_buffer.clear()
-            
+            if session.feed(raw_data):
+                channels = self.session_channels.get(session.name)
+                # 通道数变化时重建曲线
+                if channels is not None and len(channels) != session.store.channels:
+                    self.rebuild_channels()
         except Exception as e:
             print(f"数据解析错误: {e}")
-    
-    def create_data_channels(self, num_channels):
-        """创建数据通道"""
+
+    def rebuild_channels(self):
+        """按显示的会话重建曲线与数据卡片；合并视图中通道名带上会话名"""
         # 清除旧的
         self.data_channels.clear()
-        self.data_history.clear()
+        self.session_channels.clear()
         self.curves.clear()
-        if hasattr(self, 'main_plot'):
-            self.main_plot.clear()
+        for card in self.data_cards.values():
+            card.deleteLater()
+        self.data_cards.clear()
+        self.data_labels.clear()
+        self.stats_labels.clear()
+        self.main_plot.clear()
+        self.trigger_lines = []
+        self.spectrum_curves.clear()
+        self.spectrum_plot.clear()
+        self.spectrum_analyzer.clear()
         
         # 创建新的
         colors = self.get_theme_colors()
-        for i in range(num_channels):
-            channel_name = f'CH{i+1}'
-            self.data_channels.append(channel_name)
-            self.data_history[channel_name] = deque(maxlen=self.max_data_points)
-            
-            # 创建曲线
-            color = colors[i % len(colors)]
-            pen = pg.mkPen(color=color, width=2)
-            curve = self.main_plot.plot(pen=pen, name=channel_name)
-            self.curves[channel_name] = curve
-            
-            # 创建数据显示卡片
-            self.create_data_card(channel_name, color)
+        sessions = self.displayed_sessions()
+        for session in sessions:
+            names = []
+            for i in range(session.store.channels):
+                channel_name = f'CH{i+1}' if len(sessions) == 1 else f'{session.name} CH{i+1}'
+                names.append(channel_name)
+                self.data_channels.append(channel_name)
+                
+                # 创建曲线
+                color = colors[(len(self.data_channels) - 1) % len(colors)]
+                pen = pg.mkPen(color=color, width=2)
+                curve = self.main_plot.plot(pen=pen, name=channel_name)
+                self.curves[channel_name] = curve
+                self.spectrum_curves[channel_name] = self.spectrum_plot.plot(pen=pen, name=channel_name)
+                
+                # 创建数据显示卡片
+                self.create_data_card(channel_name, color)
+            self.session_channels[session.name] = names
         
         # 添加图例
-        if hasattr(self, 'main_plot'):
-            self.main_plot.addLegend()
+        self.main_plot.addLegend()
+        self.spectrum_plot.addLegend()
+        
+        # 触发通道列表，保留原来的选择；通道变化后重新设置触发
+        selected = self.trigger_channel_combo.currentText()
+        self.trigger_channel_combo.blockSignals(True)
+        self.trigger_channel_combo.clear()
+        self.trigger_channel_combo.addItems(self.data_channels)
+        if selected in self.data_channels:
+            self.trigger_channel_combo.setCurrentText(selected)
+        self.trigger_channel_combo.blockSignals(False)
+        self.update_trigger()
     
     def create_data_card(self, channel_name, color):
         """创建数据显示卡片"""
@@ -708,10 +1405,16 @@ class SerialTerminalInterface(QWidget):
         self.data_labels[channel_name] = value_label
         card_layout.addWidget(value_label)
         
+        stats_label = CaptionLabel("")
+        stats_label.setAlignment(Qt.AlignmentFlag.AlignLeft)
+        self.stats_labels[channel_name] = stats_label
+        card_layout.addWidget(stats_label)
+        
         self.apply_data_card_style(data_card, color)
         self.data_cards[channel_name] = data_card
         
-        self.data_labels_layout.addWidget(data_card)
+        # 保持末尾的 stretch，卡片从顶部排列
+        self.data_labels_layout.insertWidget(self.data_labels_layout.count() - 1, data_card)
     
     def apply_data_card_style(self, card_widget, accent_color):
         """应用数据卡片样式"""
@@ -733,58 +1436,277 @@ class SerialTerminalInterface(QWidget):
         card_widget.setStyleSheet(card_style)
 
     def update_charts(self):
-        """更新波形图"""
+        """
+        更新波形图：按绘图区像素宽度做 min/max 抽取，缩放后只抽取可见时间范围；
+        各会话的时间戳来自同一个时钟，合并视图中的曲线按时间对齐
+        """
         try:
+            if not self.curves:
+                return
+            if self.display_stack.currentIndex() == 2:
+                self.update_spectrum()
+                return
+            if self.trigger_session is not None and self.update_trigger_view():
+                return
             current_time = time.time() * 1000
-            
-            for channel_name, data in self.data_history.items():
-                if len(data) > 0 and channel_name in self.curves:
-                    timestamps = list(self.data_timestamps)
-                    y_data = list(data)
-                    
-                    if len(timestamps) >= len(y_data):
-                        used_timestamps = timestamps[-len(y_data):]
-                    else:
-                        used_timestamps = timestamps.copy()
-                        for i in range(len(y_data) - len(timestamps)):
-                            if used_timestamps:
-                                estimated_time = used_timestamps[-1] + 1
-                            else:
-                                estimated_time = current_time - (len(y_data) - i - 1)
-                            used_timestamps.append(estimated_time)
-                    
-                    x_data = [t - current_time for t in used_timestamps]
-                    self.curves[channel_name].setData(x_data, y_data, _callSync='off')
-                    
-                    # 更新数据标签
+
+            view_box = self.main_plot.getViewBox()
+            width = max(int(view_box.width()), 100)
+            t_min = t_max = None
+            if not view_box.autoRangeEnabled()[0]:
+                (x_min, x_max), _ = view_box.viewRange()
+                t_min, t_max = x_min + current_time, x_max + current_time
+
+            for session in self.displayed_sessions():
+                store = session.store
+                channels = self.session_channels.get(session.name)
+                if not len(store) or not channels or len(channels) != store.channels:
+                    continue
+                x_data, y_data = store.decimate(width, t_min, t_max)
+                x_data = x_data - current_time
+
+                for i, channel_name in enumerate(channels):
+                    self.curves[channel_name].setData(x_data, y_data[i], _callSync='off')
+
+                # 更新数据标签
+                latest = store.latest()
+                for i, channel_name in enumerate(channels):
                     if channel_name in self.data_labels:
-                        latest_value = data[-1]
-                        self.data_labels[channel_name].setText(f"{latest_value:.2f}")
-                        
+                        self.data_labels[channel_name].setText(f"{latest[i]:.2f}")
+                self.update_channel_stats(session, channels)
+
         except Exception as e:
             print(f"图表更新错误: {e}")
     
+    def trigger_target(self):
+        """触发通道对应的 (会话, 通道下标)，没有时返回 None"""
+        channel_name = self.trigger_channel_combo.currentText()
+        for name, channels in self.session_channels.items():
+            if channel_name in channels and name in self.sessions:
+                return self.sessions[name], channels.index(channel_name)
+        return None
+
+    def update_trigger(self, *_args):
+        """按触发栏的设置重新设置触发并开始等待；取消勾选时恢复实时波形"""
+        self.remove_trigger()
+        if not self.trigger_checkbox.isChecked():
+            return
+        target = self.trigger_target()
+        if target is None:
+            self.trigger_status_label.setText("没有可触发的通道")
+            return
+        try:
+            level = float(self.trigger_level_input.text())
+            pre = int(self.trigger_pre_input.text())
+            post = int(self.trigger_post_input.text())
+        except ValueError:
+            self.trigger_status_label.setText("触发参数格式错误")
+            return
+        pre = min(max(pre, 0), self.MAX_TRIGGER_SAMPLES)
+        post = min(max(post, 1), self.MAX_TRIGGER_SAMPLES)
+        kinds = {label: kind for kind, label in TRIGGER_TYPES.items()}
+        session, channel = target
+        trigger = Trigger(
+            channel, level, kinds[self.trigger_type_combo.currentText()], pre, post,
+            self.TRIGGER_MODES[self.trigger_mode_combo.currentText()]
+        )
+        trigger.arm(session.store)
+        session.trigger = trigger
+        self.trigger_session = session.name
+        self.trigger_status_label.setText("等待触发")
+
+    def remove_trigger(self):
+        session = self.sessions.get(self.trigger_session)
+        if session is not None:
+            session.trigger = None
+        self.trigger_session = None
+        self.trigger_shown_id = 0
+        for line in self.trigger_lines:
+            self.main_plot.removeItem(line)
+        self.trigger_lines = []
+        self.main_plot.setLabel('bottom', '时间 (ms)')
+        self.trigger_status_label.setText("")
+
+    def update_trigger_view(self):
+        """
+        显示最近一次触发采集的片段（横轴为相对触发时刻的时间），返回是否处于冻结显示
+        其它会话按相同的时间范围截取，合并视图中各会话的曲线仍然对齐；各通道统计继续实时更新
+        """
+        session = self.sessions.get(self.trigger_session)
+        trigger = session.trigger if session is not None else None
+        if trigger is None:
+            return False
+        states = {'armed': '等待触发', 'triggered': '已触发，采集中', 'stopped': '单次采集完成'}
+        self.trigger_status_label.setText(f"{states.get(trigger.state, '')}  已采集 {trigger.segment_id} 次")
+        segment = trigger.segment
+        if segment is None:
+            return False
+
+        if trigger.segment_id != self.trigger_shown_id:
+            self.trigger_shown_id = trigger.segment_id
+            t0 = segment['trigger_time']
+            t_first, t_last = segment['t'][0], segment['t'][-1]
+            for other in self.displayed_sessions():
+                channels = self.session_channels.get(other.name)
+                if not channels or len(channels) != other.store.channels:
+                    continue
+                if other is session:
+                    t, y = segment['t'], segment['y']
+                else:
+                    store = other.store
+                    oldest = store.total - len(store)
+                    timestamps = store.timestamps()
+                    first = int(np.searchsorted(timestamps, t_first, side='left'))
+                    last = int(np.searchsorted(timestamps, t_last, side='right'))
+                    t, y = store.range(oldest + first, oldest + last)
+                    t, y = t.copy(), y.copy()
+                for i, channel_name in enumerate(channels):
+                    self.curves[channel_name].setData(t - t0, y[i], _callSync='off')
+
+            if not self.trigger_lines:
+                pen = pg.mkPen(color='#888888', width=1, style=Qt.PenStyle.DashLine)
+                self.trigger_lines = [
+                    pg.InfiniteLine(pos=0, angle=90, pen=pen),
+                    pg.InfiniteLine(pos=trigger.level, angle=0, pen=pen),
+                ]
+                for line in self.trigger_lines:
+                    self.main_plot.addItem(line)
+            self.trigger_lines[1].setValue(trigger.level)
+            self.main_plot.setLabel('bottom', '相对触发时刻 (ms)')
+
+        for other in self.displayed_sessions():
+            channels = self.session_channels.get(other.name)
+            if channels and len(channels) == other.store.channels:
+                self.update_channel_stats(other, channels)
+        return True
+
+    def update_spectrum(self):
+        """更新频谱：没有新采样的会话直接使用上次的结果（SpectrumAnalyzer 缓存）"""
+        rates = []
+        for session in self.displayed_sessions():
+            channels = self.session_channels.get(session.name)
+            if not channels or len(channels) != session.store.channels:
+                continue
+            result = self.spectrum_analyzer.compute(session.name, session.store)
+            if result is None:
+                continue
+            freqs, amplitude, sample_rate = result
+            for i, channel_name in enumerate(channels):
+                self.spectrum_curves[channel_name].setData(freqs, amplitude[i], _callSync='off')
+            rates.append(sample_rate)
+        if rates:
+            resolution = rates[0] / self.spectrum_analyzer.size
+            self.spectrum_rate_label.setText(
+                f"采样率 {'/'.join(f'{rate:.0f}' for rate in rates)} Hz  分辨率 {resolution:.3g} Hz"
+            )
+        else:
+            self.spectrum_rate_label.setText("采样不足")
+
+    def update_channel_stats(self, session, channels):
+        """显示会话各通道的统计（统计随采样增量更新，这里只读取结果）"""
+        snapshot = session.stats.snapshot()
+        if snapshot is None:
+            return
+        stats = snapshot['session'] if self.STATS_SCOPES[self.stats_scope_combo.currentText()] is None \
+            else snapshot['window']
+        if stats is None:
+            return
+        for i, channel_name in enumerate(channels):
+            label = self.stats_labels.get(channel_name)
+            if label is not None:
+                label.setText(
+                    f"最小 {stats['min'][i]:.4g}  最大 {stats['max'][i]:.4g}\n"
+                    f"均值 {stats['mean'][i]:.4g}  σ {stats['std'][i]:.4g}\n"
+                    f"RMS {stats['rms'][i]:.4g}  {stats['rate']:.0f} Hz"
+                )
+
+    def update_stats_scope(self, text):
+        """切换统计范围：窗口大小变化时各会话的窗口统计重新开始"""
+        window = self.STATS_SCOPES[text]
+        if window is not None:
+            for session in self.sessions.values():
+                if session.stats.window != window:
+                    session.stats.set_window(window)
+
+    def stats_window(self):
+        """新会话的统计窗口（采样数）"""
+        return self.STATS_SCOPES[self.stats_scope_combo.currentText()] or self.DEFAULT_STATS_WINDOW
+
     def toggle_auto_send(self, state):
         """切换自动发送"""
         if state == Qt.CheckState.Checked:
-            try:
-                interval = int(self.auto_send_interval.text())
-                if interval < 10:
-                    interval = 10  # 最小间隔10ms
-                self.auto_send_timer.setInterval(interval)
-                self.auto_send_timer.start()
-                timestamp = datetime.now().strftime("[%H:%M:%S.%f")[:-3] + "] "
-                self.text_edit.append(f"{timestamp}自动发送已启动，间隔: {interval}ms")
-            except ValueError:
-                self.auto_send_checkbox.setChecked(False)
-                timestamp = datetime.now().strftime("[%H:%M:%S.%f")[:-3] + "] "
-                self.text_edit.append(f"{timestamp}间隔时间格式错误")
+            self.start_auto_send()
         else:
-            self.auto_send_timer.stop()
-            timestamp = datetime.now().strftime("[%H:%M:%S.%f")[:-3] + "] "
-            self.text_edit.append(f"{timestamp}自动发送已停止")
-    
-    def auto_send_data(self):
-        """自动发送数据"""
-        if self.ser and self.ser.is_open:
-            self.send_data()
\ No newline at end of file
+            self.stop_auto_send()
+
+    def start_auto_send(self):
+        """
+        按输入框内容启动定时发送：内容预先编码为字节，由发送线程按间隔发送，每帧一次 write；
+        输入框支持发送脚本（';' 分隔多条命令、{起始:结束:步长} 参数扫描、@wait 毫秒）
+        """
+        try:
+            interval = float(self.auto_send_interval.text())
+        except ValueError:
+            self.auto_send_checkbox.setChecked(False)
+            timestamp = format_timestamp()
+            self.append_log(f"{timestamp}间隔时间格式错误")
+            return
+        interval = max(interval, self.MIN_AUTO_SEND_INTERVAL)
+        try:
+            steps = compile_script(
+                self.input_line.text(), self.hex_send_checkbox.isChecked(), self.get_line_ending(), interval / 1000
+            )
+        except ValueError as e:
+            self.auto_send_checkbox.setChecked(False)
+            self.append_log(f"{format_timestamp()}自动发送失败: {e}")
+            return
+        targets = [session for session in self.displayed_sessions() if session.is_open]
+        if not targets:
+            self.auto_send_checkbox.setChecked(False)
+            self.append_log(f"{format_timestamp()}自动发送失败: 未连接串口")
+            return
+
+        serials = [session.ser for session in targets]
+        if len(serials) == 1:
+            write = serials[0].write
+        else:
+            def write(data):
+                for ser in serials:
+                    ser.write(data)
+        self.transmit_sessions = [session.name for session in targets]
+        self.transmitter = TransmitScheduler(write, steps)
+        self.transmitter.start()
+        self.tx_stats_timer.start()
+        timestamp = format_timestamp()
+        self.append_log(f"{timestamp}自动发送已启动，间隔: {interval:g}ms，{len(steps)} 帧循环")
+
+    def stop_auto_send(self):
+        transmitter = self.transmitter
+        if transmitter is None:
+            return
+        transmitter.stop()
+        self.transmitter = None
+        self.transmit_sessions = []
+        self.tx_stats_timer.stop()
+        self.tx_stats_label.setText("")
+        timestamp = format_timestamp()
+        self.append_log(
+            f"{timestamp}自动发送已停止，共发送 {transmitter.stats.total_frames} 帧"
+            f"（跳过 {transmitter.stats.missed} 帧）"
+        )
+
+    def update_tx_stats(self):
+        """显示实际发送速率与抖动；发送线程出错时停止"""
+        transmitter = self.transmitter
+        if transmitter is None:
+            return
+        if not transmitter.running:
+            if transmitter.error is not None:
+                self.append_log(f"{format_timestamp()}自动发送失败: {transmitter.error}")
+            self.auto_send_checkbox.setChecked(False)
+            return
+        stats = transmitter.stats.snapshot()
+        self.tx_stats_label.setText(
+            f"发送 {stats['frames_per_sec']:.0f} 帧/s  "
+            f"抖动 平均 {stats['jitter_mean_ms']:.2f} ms  p99 {stats['jitter_p99_ms']:.2f} ms"
+        )
\ No newline at end of file
@@ -1,26 +1,326 @@
+import os
+import re
+
+from .flash_layout import FlashLayout
+
+# 物理引脚名，如 'PA0-WKUP' / 'PH0-OSC_IN' -> 'PA0' / 'PH0'
+_PHYSICAL_PIN_RE = re.compile(r'P[A-K]\d{1,2}(?!\d)')
+
+
+class IocModel:
+    """
+    .ioc 文件的单次解析结果
+    一次读取即建立 Mcu.IP 列表、按引脚/外设分组的参数表和 Signal 索引，
+    按路径缓存，并通过文件 mtime/size 判断是否需要重新解析
+    """
+    _cache = {}
+
+    def __init__(self, ioc_path, signature=None):
+        self.ioc_path = ioc_path
+        self.signature = signature
+        self.config = {}        # 原始键值: 'PA4.Signal' -> 'GPIO_Output'
+        self.ips = []           # Mcu.IP* 的值，按文件顺序
+        self.params = {}        # 前缀分组: 'PA4' -> {'Signal': 'GPIO_Output', ...}
+        self.signals = {}       # 引脚 -> Signal
+        self._queries = {}      # 查询结果缓存
+        self._parse()
+
+    @classmethod
+    def load(cls, ioc_path):
+        """获取 .ioc 的解析结果，文件未变化时直接返回缓存"""
+        key = os.path.abspath(ioc_path)
+        st = os.stat(key)
+        signature = (st.st_mtime_ns, st.st_size)
+        model = cls._cache.get(key)
+        if model is None or model.signature != signature:
+            model = cls(key, signature)
+            cls._cache[key] = model
+        return model
+
+    @classmethod
+    def clear_cache(cls):
+        cls._cache.clear()
+
+    def _parse(self):
+        config = self.config
+        params = self.params
+        with open(self.ioc_path, encoding='utf-8', errors='ignore') as f:
+            for line in f:
+                line = line.strip()
+                if not line or line[0] == '#':
+                    continue
+                key, sep, value = line.partition('=')
+                if not sep:
+                    continue
+                key = key.strip()
+                value = value.strip()
+                config[key] = value
+                prefix, dot, param = key.partition('.')
+                if not dot:
+                    continue
+                group = params.get(prefix)
+                if group is None:
+                    group = params[prefix] = {}
+                group[param] = value
+                if prefix == 'Mcu' and param.startswith('IP') and param[2:].isdigit():
+                    self.ips.append(value)
+                elif param == 'Signal':
+                    self.signals[prefix] = value
+
+    def _memo(self, key, func):
+        if key not in self._queries:
+            self._queries[key] = func()
+        return self._queries[key]
+
+    @property
+    def ip_names(self):
+        """已启用外设名（去掉 '.xxx' 后缀），去重"""
+        return self._memo('ip_names', lambda: list(dict.fromkeys(ip.split('.')[0] for ip in self.ips)))
+
+    def enabled_peripherals(self, prefixes, exclude=()):
+        """按前缀筛选已启用外设，返回排序后的列表"""
+        prefixes = tuple(prefixes) if not isinstance(prefixes, str) else (prefixes,)
+        exclude = tuple(exclude) if not isinstance(exclude, str) else (exclude,)
+
+        def compute():
+            return sorted(
+                name for name in self.ip_names
+                if name.startswith(prefixes) and not (exclude and name.startswith(exclude))
+            )
+        return list(self._memo(('periph', prefixes, exclude), compute))
+
+    @property
+    def mcu_name(self):
+        """MCU型号，优先使用 Mcu.UserName（具体料号），其次 Mcu.Name"""
+        mcu = self.params.get('Mcu', {})
+        return mcu.get('UserName') or mcu.get('Name')
+
+    @property
+    def freertos_enabled(self):
+        def compute():
+            if 'FREERTOS' in self.ips:
+                return True
+            return 'FREERTOS' in self.params
+        return self._memo('freertos', compute)
+
+    @staticmethod
+    def physical_pin(name):
+        """引脚键名转物理引脚名，非物理引脚（如 VP_xxx）返回 None"""
+        m = _PHYSICAL_PIN_RE.match(name)
+        return m.group(0) if m else None
+
+    def signal_peripheral(self, signal):
+        """
+        Signal 所属外设: 'SPI1_MOSI' -> 'SPI1', 'S_TIM1_CH1' -> 'TIM1',
+        'GPIO_Output' / 'GPXTI3' -> 'GPIO'
+        """
+        lookup = self._memo('signal_peripheral', dict)
+        peripheral = lookup.get(signal)
+        if peripheral is None:
+            if signal.startswith(('GPIO_', 'GPXTI')):
+                peripheral = 'GPIO'
+            else:
+                name = signal[2:] if signal.startswith('S_') else signal
+                # 长名优先，保证 USB_OTG_FS 优先于 USB、TIM10 不会误配 TIM1
+                ips = self._memo('ips_by_len', lambda: sorted(self.ip_names, key=len, reverse=True))
+                peripheral = next(
+                    (ip for ip in ips if name == ip or name.startswith(ip + '_')),
+                    name.split('_')[0]
+                )
+            lookup[signal] = peripheral
+        return peripheral
+
+    @property
+    def pin_index(self):
+        """
+        物理引脚 -> 功能列表
+        返回格式: {'PA0': [{'key': 'PA0-WKUP', 'signal': 'GPXTI0', 'peripheral': 'GPIO'}], ...}
+        """
+        def compute():
+            index = {}
+            for key, config in self.params.items():
+                signal = config.get('Signal')
+                pin = self.physical_pin(key) if signal else None
+                if pin is None:
+                    continue
+                index.setdefault(pin, []).append({
+                    'key': key,
+                    'signal': signal,
+                    'peripheral': self.signal_peripheral(signal),
+                })
+            return index
+        return self._memo('pin_index', compute)
+
+    @property
+    def peripheral_pins(self):
+        """外设 -> 物理引脚列表，如 {'SPI1': ['PA7', 'PB3', 'PB4'], ...}"""
+        def compute():
+            index = {}
+            for pin, functions in self.pin_index.items():
+                for func in functions:
+                    pins = index.setdefault(func['peripheral'], [])
+                    if pin not in pins:
+                        pins.append(pin)
+            return index
+        return self._memo('peripheral_pins', compute)
+
+    def pin_peripherals(self, pin):
+        """某物理引脚被哪些外设占用"""
+        return {func['peripheral'] for func in self.pin_index.get(self.physical_pin(pin) or pin, ())}
+
+    @staticmethod
+    def _timer_channel_mode(mode):
+        mode = mode.replace('\\ ', ' ').replace('_', ' ')
+        if 'PWM' in mode:
+            return 'PWM'
+        if 'Input Capture' in mode:
+            return 'IC'
+        if 'Output Compare' in mode:
+            return 'OC'
+        if 'Encoder' in mode:
+            return 'ENCODER'
+        return mode.strip()
+
+    @property
+    def timer_channels(self):
+        """
+        (定时器, 通道) -> 使用模式集合
+        来源: TIMx.Channel-<模式>=TIM_CHANNEL_n 与 SH.S_TIMx_CHn.k=TIMx_CHn,<模式>
+        返回格式: {('TIM1', 'TIM_CHANNEL_1'): {'PWM'}, ...}
+        """
+        def compute():
+            channels = {}
+            for prefix, config in self.params.items():
+                if not prefix.startswith('TIM'):
+                    continue
+                for param, value in config.items():
+                    if param.startswith('Channel-') and value.startswith('TIM_CHANNEL_'):
+                        channels.setdefault((prefix, value), set()).add(
+                            self._timer_channel_mode(param[len('Channel-'):])
+                        )
+            for param, value in self.params.get('SH', {}).items():
+                if not param.startswith('S_TIM') or param.endswith('.ConfNb'):
+                    continue
+                signal, _, mode = value.partition(',')
+                timer, sep, num = signal.partition('_CH')
+                if sep and mode:
+                    channels.setdefault((timer, f"TIM_CHANNEL_{num}"), set()).add(
+                        self._timer_channel_mode(mode)
+                    )
+            return channels
+        return self._memo('timer_channels', compute)
+
+    @property
+    def conflicts(self):
+        """
+        引脚/外设冲突检查结果
+        返回格式: [{'type': 'pin' | 'exti' | 'timer_channel', 'message': ..., ...}, ...]
+        """
+        def compute():
+            issues = []
+
+            # 同一物理引脚被多个功能占用
+            for pin, functions in self.pin_index.items():
+                signals = list(dict.fromkeys(func['signal'] for func in functions))
+                if len(signals) > 1:
+                    issues.append({
+                        'type': 'pin',
+                        'pin': pin,
+                        'signals': signals,
+                        'message': f"引脚 {pin} 同时被 {', '.join(signals)} 占用",
+                    })
+
+            # 同一EXTI线只能连接一个端口
+            exti_lines = {}
+            for pin, functions in self.pin_index.items():
+                for func in functions:
+                    config = self.params[func['key']]
+                    if func['signal'].startswith('GPXTI'):
+                        line = func['signal'][len('GPXTI'):]
+                    elif 'GPIO_ModeDefaultEXTI' in config:
+                        line = pin[2:]
+                    else:
+                        continue
+                    pins = exti_lines.setdefault(int(line), [])
+                    if pin not in pins:
+                        pins.append(pin)
+            for line, pins in sorted(exti_lines.items()):
+                if len(pins) > 1:
+                    issues.append({
+                        'type': 'exti',
+                        'line': line,
+                        'pins': pins,
+                        'message': f"EXTI{line} 被多个引脚共用: {', '.join(pins)}",
+                    })
+
+            # 同一定时器通道同时用于PWM输出和输入捕获
+            for (timer, channel), modes in sorted(self.timer_channels.items()):
+                if 'PWM' in modes and 'IC' in modes:
+                    issues.append({
+                        'type': 'timer_channel',
+                        'timer': timer,
+                        'channel': channel,
+                        'modes': sorted(modes),
+                        'message': f"{timer} {channel} 同时配置为PWM输出和输入捕获",
+                    })
+            return issues
+        return self._memo('conflicts', compute)
+
+
 class analyzing_ioc:
+    _project_ioc_cache = {}
+
+    @staticmethod
+    def find_ioc_file(project_path):
+        """
+        查找工程目录下的 .ioc 文件，返回完整路径或 None
+        结果按目录 mtime 缓存，避免每次查询都 os.listdir
+        """
+        try:
+            mtime = os.stat(project_path).st_mtime_ns
+        except OSError:
+            return None
+        cached = analyzing_ioc._project_ioc_cache.get(project_path)
+        if cached and cached[0] == mtime:
+            return cached[1]
+        ioc_files = [f for f in os.listdir(project_path) if f.endswith('.ioc')]
+        ioc_path = os.path.join(project_path, ioc_files[0]) if ioc_files else None
+        analyzing_ioc._project_ioc_cache[project_path] = (mtime, ioc_path)
+        return ioc_path
+
+    @staticmethod
+    def load(ioc_path):
+        """获取 .ioc 的缓存解析结果"""
+        return IocModel.load(ioc_path)
+
+    @staticmethod
+    def validate_ioc(ioc_path):
+        """
+        检查 .ioc 中的引脚复用、EXTI线冲突以及PWM/输入捕获共用定时器通道
+        返回冲突列表，无冲突时为空列表
+        """
+        return [dict(issue) for issue in IocModel.load(ioc_path).conflicts]
+
+    @staticmethod
+    def validate_ioc_files(ioc_paths):
+        """
+        批量检查多个 .ioc 文件
+        返回格式: {ioc_path: [冲突, ...]}，无法读取的文件记录一条 'error' 类型结果
+        """
+        results = {}
+        for ioc_path in ioc_paths:
+            try:
+                results[ioc_path] = analyzing_ioc.validate_ioc(ioc_path)
+            except OSError as e:
+                results[ioc_path] = [{'type': 'error', 'message': f"读取失败: {e}"}]
+        return results
+
     @staticmethod
     def is_freertos_enabled_from_ioc(ioc_path):
         """
         检查指定 .ioc 文件是否开启了 FreeRTOS
         """
-        config = {}
-        with open(ioc_path, encoding='utf-8') as f:
-            for line in f:
-                line = line.strip()
-                if not line or line.startswith('#'):
-                    continue
-                if '=' in line:
-                    key, value = line.split('=', 1)
-                    config[key.strip()] = value.strip()
-        ip_keys = [k for k in config if k.startswith('Mcu.IP')]
-        for k in ip_keys:
-            if config[k] == 'FREERTOS':
-                return True
-        for k in config:
-            if k.startswith('FREERTOS.'):
-                return True
-        return False
+        return IocModel.load(ioc_path).freertos_enabled
 
     @staticmethod
     def get_enabled_i2c_from_ioc(ioc_path):
@@ -28,23 +328,7 @@ class analyzing_ioc:
         从.ioc文件中获取已启用的I2C列表
         返回格式: ['I2C1', 'I2C3'] 等
         """
-        enabled_i2c = []
-        with open(ioc_path, encoding='utf-8', errors='ignore') as f:
-            for line in f:
-                line = line.strip()
-                if not line or line.startswith('#'):
-                    continue
-                if '=' in line:
-                    key, value = line.split('=', 1)
-                    key = key.strip()
-                    value = value.strip()
-                    # 检查是否启用了I2C
-                    if key.startswith('Mcu.IP') and value.startswith('I2C'):
-                        # 提取I2C编号，如I2C1, I2C2等
-                        i2c_name = value.split('.')[0] if '.' in value else value
-                        if i2c_name not in enabled_i2c:
-                            enabled_i2c.append(i2c_name)
-        return sorted(enabled_i2c)
+        return IocModel.load(ioc_path).enabled_peripherals('I2C')
     
     @staticmethod
     def get_enabled_spi_from_ioc(ioc_path):
@@ -52,21 +336,7 @@ class analyzing_ioc:
         获取已启用的SPI列表
         返回格式: ['SPI1', 'SPI2'] 等
         """
-        enabled_spi = []
-        with open(ioc_path, encoding='utf-8', errors='ignore') as f:
-            for line in f:
-                line = line.strip()
-                if not line or line.startswith('#'):
-                    continue
-                if '=' in line:
-                    key, value = line.split('=', 1)
-                    key = key.strip()
-                    value = value.strip()
-                    if key.startswith('Mcu.IP') and value.startswith('SPI'):
-                        spi_name = value.split('.')[0] if '.' in value else value
-                        if spi_name not in enabled_spi:
-                            enabled_spi.append(spi_name)
-        return sorted(enabled_spi)
+        return IocModel.load(ioc_path).enabled_peripherals('SPI')
 
     @staticmethod
     def get_enabled_can_from_ioc(ioc_path):
@@ -74,22 +344,8 @@ class analyzing_ioc:
         获取已启用的CAN列表（不包括FDCAN）
         返回格式: ['CAN1', 'CAN2'] 等
         """
-        enabled_can = []
-        with open(ioc_path, encoding='utf-8', errors='ignore') as f:
-            for line in f:
-                line = line.strip()
-                if not line or line.startswith('#'):
-                    continue
-                if '=' in line:
-                    key, value = line.split('=', 1)
-                    key = key.strip()
-                    value = value.strip()
-                    # 只匹配CAN，不包括FDCAN
-                    if key.startswith('Mcu.IP') and value.startswith('CAN') and not value.startswith('FDCAN'):
-                        can_name = value.split('.')[0] if '.' in value else value
-                        if can_name not in enabled_can:
-                            enabled_can.append(can_name)
-        return sorted(enabled_can)
+        # 'FDCAN' 不以 'CAN' 开头，前缀匹配即可天然排除
+        return IocModel.load(ioc_path).enabled_peripherals('CAN')
 
     @staticmethod
     def get_enabled_fdcan_from_ioc(ioc_path):
@@ -97,21 +353,7 @@ class analyzing_ioc:
         获取已启用的FDCAN列表
         返回格式: ['FDCAN1', 'FDCAN2', 'FDCAN3'] 等
         """
-        enabled_fdcan = []
-        with open(ioc_path, encoding='utf-8', errors='ignore') as f:
-            for line in f:
-                line = line.strip()
-                if not line or line.startswith('#'):
-                    continue
-                if '=' in line:
-                    key, value = line.split('=', 1)
-                    key = key.strip()
-                    value = value.strip()
-                    if key.startswith('Mcu.IP') and value.startswith('FDCAN'):
-                        fdcan_name = value.split('.')[0] if '.' in value else value
-                        if fdcan_name not in enabled_fdcan:
-                            enabled_fdcan.append(fdcan_name)
-        return sorted(enabled_fdcan)
+        return IocModel.load(ioc_path).enabled_peripherals('FDCAN')
 
     @staticmethod
     def get_enabled_uart_from_ioc(ioc_path):
@@ -119,86 +361,35 @@ class analyzing_ioc:
         获取已启用的UART/USART列表
         返回格式: ['USART1', 'USART2', 'UART4'] 等
         """
-        enabled_uart = []
-        with open(ioc_path, encoding='utf-8', errors='ignore') as f:
-            for line in f:
-                line = line.strip()
-                if not line or line.startswith('#'):
-                    continue
-                if '=' in line:
-                    key, value = line.split('=', 1)
-                    key = key.strip()
-                    value = value.strip()
-                    # 检查是否启用了UART或USART
-                    if key.startswith('Mcu.IP') and (value.startswith('USART') or value.startswith('UART')):
-                        uart_name = value.split('.')[0] if '.' in value else value
-                        if uart_name not in enabled_uart:
-                            enabled_uart.append(uart_name)
-        return sorted(enabled_uart)
+        return IocModel.load(ioc_path).enabled_peripherals(('USART', 'UART'))
     
-
     @staticmethod
     def get_enabled_gpio_from_ioc(ioc_path):
         """
         获取所有带 EXTI 且有 Label 的 GPIO，排除其他外设功能的引脚
         """
-        gpio_list = []
-        gpio_configs = {}
-        
-        with open(ioc_path, encoding='utf-8', errors='ignore') as f:
-            for line in f:
-                line = line.strip()
-                if not line or line.startswith('#'):
+        model = IocModel.load(ioc_path)
+
+        def compute():
+            gpio_list = []
+            for pin, config in model.params.items():
+                signal = config.get('Signal', '')
+                
+                # 只处理有Label和EXTI功能的GPIO
+                if ('GPIO_Label' not in config or 
+                    ('GPIO_ModeDefaultEXTI' not in config and not signal.startswith('GPXTI'))):
                     continue
-                if '=' in line:
-                    key, value = line.split('=', 1)
-                    key = key.strip()
-                    value = value.strip()
                     
-                    # 收集GPIO相关配置
-                    if '.' in key:
-                        pin = key.split('.')[0]
-                        param = key.split('.', 1)[1]
-                        
-                        if pin not in gpio_configs:
-                            gpio_configs[pin] = {}
-                        
-                        gpio_configs[pin][param] = value
-        
-        # 定义需要排除的Signal类型
-        excluded_signals = [
-            'SPI1_SCK', 'SPI1_MISO', 'SPI1_MOSI', 'SPI2_SCK', 'SPI2_MISO', 'SPI2_MOSI', 
-            'SPI3_SCK', 'SPI3_MISO', 'SPI3_MOSI',
-            'I2C1_SCL', 'I2C1_SDA', 'I2C2_SCL', 'I2C2_SDA', 'I2C3_SCL', 'I2C3_SDA',
-            'USART1_TX', 'USART1_RX', 'USART2_TX', 'USART2_RX', 'USART3_TX', 'USART3_RX',
-            'USART6_TX', 'USART6_RX', 'UART4_TX', 'UART4_RX', 'UART5_TX', 'UART5_RX',
-            'CAN1_TX', 'CAN1_RX', 'CAN2_TX', 'CAN2_RX',
-            'USB_OTG_FS_DM', 'USB_OTG_FS_DP', 'USB_OTG_HS_DM', 'USB_OTG_HS_DP',
-            'SYS_JTMS-SWDIO', 'SYS_JTCK-SWCLK', 'SYS_JTDI', 'SYS_JTDO-SWO',
-            'RCC_OSC_IN', 'RCC_OSC_OUT',
-        ]
-        
-        # 处理每个GPIO配置，只选择EXTI类型的
-        for pin, config in gpio_configs.items():
-            signal = config.get('Signal', '')
-            
-            # 只处理有Label和EXTI功能的GPIO
-            if ('GPIO_Label' not in config or 
-                ('GPIO_ModeDefaultEXTI' not in config and not signal.startswith('GPXTI'))):
-                continue
-                
-            # 排除用于其他外设功能的引脚
-            if signal in excluded_signals or signal.startswith('S_TIM') or signal.startswith('ADC'):
-                continue
-                
-            # 只包含EXTI功能的GPIO
-            if signal.startswith('GPXTI'):
-                label = config['GPIO_Label']
-                gpio_list.append({'pin': pin, 'label': label})
-        
-        return gpio_list
-
+                # 排除同时被其他外设占用的引脚
+                if model.pin_peripherals(pin) != {'GPIO'}:
+                    continue
+                    
+                # 只包含EXTI功能的GPIO
+                if signal.startswith('GPXTI'):
+                    gpio_list.append({'pin': pin, 'label': config['GPIO_Label']})
+            return gpio_list
 
+        return [dict(item) for item in model._memo('gpio_exti', compute)]
 
     @staticmethod  
     def get_all_gpio_from_ioc(ioc_path):
@@ -206,82 +397,35 @@ class analyzing_ioc:
         获取所有GPIO配置，但排除用于其他外设功能的引脚
         只包含纯GPIO功能：GPIO_Input, GPIO_Output, GPXTI
         """
-        gpio_list = []
-        gpio_configs = {}
-        
-        with open(ioc_path, encoding='utf-8', errors='ignore') as f:
-            for line in f:
-                line = line.strip()
-                if not line or line.startswith('#'):
+        model = IocModel.load(ioc_path)
+
+        def compute():
+            gpio_list = []
+            for pin, config in model.params.items():
+                signal = config.get('Signal', '')
+                
+                # 只处理有Label的GPIO
+                if 'GPIO_Label' not in config:
                     continue
-                if '=' in line:
-                    key, value = line.split('=', 1)
-                    key = key.strip()
-                    value = value.strip()
                     
-                    # 收集GPIO相关配置
-                    if '.' in key:
-                        pin = key.split('.')[0]
-                        param = key.split('.', 1)[1]
-                        
-                        if pin not in gpio_configs:
-                            gpio_configs[pin] = {}
-                        
-                        gpio_configs[pin][param] = value
-        
-        # 定义需要排除的Signal类型（用于其他外设功能的）
-        excluded_signals = [
-            # SPI相关
-            'SPI1_SCK', 'SPI1_MISO', 'SPI1_MOSI', 'SPI2_SCK', 'SPI2_MISO', 'SPI2_MOSI', 
-            'SPI3_SCK', 'SPI3_MISO', 'SPI3_MOSI',
-            # I2C相关
-            'I2C1_SCL', 'I2C1_SDA', 'I2C2_SCL', 'I2C2_SDA', 'I2C3_SCL', 'I2C3_SDA',
-            # UART/USART相关
-            'USART1_TX', 'USART1_RX', 'USART2_TX', 'USART2_RX', 'USART3_TX', 'USART3_RX',
-            'USART6_TX', 'USART6_RX', 'UART4_TX', 'UART4_RX', 'UART5_TX', 'UART5_RX',
-            # CAN相关
-            'CAN1_TX', 'CAN1_RX', 'CAN2_TX', 'CAN2_RX',
-            # USB相关
-            'USB_OTG_FS_DM', 'USB_OTG_FS_DP', 'USB_OTG_HS_DM', 'USB_OTG_HS_DP',
-            # 系统相关
-            'SYS_JTMS-SWDIO', 'SYS_JTCK-SWCLK', 'SYS_JTDI', 'SYS_JTDO-SWO',
-            'RCC_OSC_IN', 'RCC_OSC_OUT',
-        ]
-        
-        # 处理每个GPIO配置
-        for pin, config in gpio_configs.items():
-            signal = config.get('Signal', '')
-            
-            # 只处理有Label的GPIO
-            if 'GPIO_Label' not in config:
-                continue
-                
-            # 排除用于其他外设功能的引脚
-            if signal in excluded_signals:
-                continue
-                
-            # 排除TIM相关的引脚（以S_TIM开头的信号）
-            if signal.startswith('S_TIM'):
-                continue
-                
-            # 排除ADC相关的引脚
-            if signal.startswith('ADC'):
-                continue
-                
-            # 只包含纯GPIO功能
-            if signal in ['GPIO_Input', 'GPIO_Output'] or signal.startswith('GPXTI'):
-                gpio_info = {
-                    'pin': pin,
-                    'label': config['GPIO_Label'],
-                    'has_exti': 'GPIO_ModeDefaultEXTI' in config or signal.startswith('GPXTI'),
-                    'signal': signal,
-                    'mode': config.get('GPIO_ModeDefaultEXTI', ''),
-                    'is_output': signal == 'GPIO_Output',
-                    'is_input': signal == 'GPIO_Input'
-                }
-                gpio_list.append(gpio_info)
-        
-        return gpio_list
+                # 只保留仅被GPIO占用的物理引脚，其他外设（SPI/I2C/TIM/ADC/USB等）的引脚一律排除
+                if model.pin_peripherals(pin) != {'GPIO'}:
+                    continue
+                    
+                # 只包含纯GPIO功能
+                if signal in ('GPIO_Input', 'GPIO_Output') or signal.startswith('GPXTI'):
+                    gpio_list.append({
+                        'pin': pin,
+                        'label': config['GPIO_Label'],
+                        'has_exti': 'GPIO_ModeDefaultEXTI' in config or signal.startswith('GPXTI'),
+                        'signal': signal,
+                        'mode': config.get('GPIO_ModeDefaultEXTI', ''),
+                        'is_output': signal == 'GPIO_Output',
+                        'is_input': signal == 'GPIO_Input'
+                    })
+            return gpio_list
+
+        return [dict(item) for item in model._memo('gpio_all', compute)]
     
     @staticmethod
     def get_enabled_pwm_from_ioc(ioc_path):
@@ -289,59 +433,32 @@ class analyzing_ioc:
         获取已启用的PWM通道列表
         返回格式: [{'timer': 'TIM1', 'channel': 'TIM_CHANNEL_1', 'label': 'PWM_MOTOR1'}, ...]
         """
-        pwm_channels = []
-        gpio_configs = {}
-        
-        with open(ioc_path, encoding='utf-8', errors='ignore') as f:
-            for line in f:
-                line = line.strip()
-                if not line or line.startswith('#'):
+        model = IocModel.load(ioc_path)
+
+        def compute():
+            pwm_channels = []
+            for pin, config in model.params.items():
+                signal = config.get('Signal', '')
+                # 检查是否为PWM信号（格式如：S_TIM1_CH1, S_TIM2_CH3等）
+                if not (signal.startswith('S_TIM') and '_CH' in signal):
                     continue
-                if '=' in line:
-                    key, value = line.split('=', 1)
-                    key = key.strip()
-                    value = value.strip()
-                    
-                    # 收集GPIO相关配置
-                    if '.' in key:
-                        pin = key.split('.')[0]
-                        param = key.split('.', 1)[1]
-                        
-                        if pin not in gpio_configs:
-                            gpio_configs[pin] = {}
-                        
-                        gpio_configs[pin][param] = value
-        
-        # 处理每个GPIO配置，查找PWM信号
-        for pin, config in gpio_configs.items():
-            signal = config.get('Signal', '')
-            
-            # 检查是否为PWM信号（格式如：S_TIM1_CH1, S_TIM2_CH3等）
-            if signal.startswith('S_TIM') and '_CH' in signal:
-                # 解析定时器和通道信息
                 # 例如：S_TIM1_CH1 -> TIM1, CH1
                 parts = signal.replace('S_', '').split('_')
-                if len(parts) >= 2:
-                    timer = parts[0]  # TIM1
-                    channel_part = parts[1]  # CH1
-                    
+                if len(parts) < 2 or not parts[1].startswith('CH'):
+                    continue
+                timer = parts[0]
+                channel_part = parts[1]
+                pwm_channels.append({
+                    'timer': timer,
                     # 转换通道格式：CH1 -> TIM_CHANNEL_1
-                    if channel_part.startswith('CH'):
-                        channel_num = channel_part[2:]  # 提取数字
-                        channel = f"TIM_CHANNEL_{channel_num}"
-                        
-                        # 获取标签
-                        label = config.get('GPIO_Label', f"{timer}_{channel_part}")
-                        
-                        pwm_channels.append({
-                            'timer': timer,
-                            'channel': channel,
-                            'label': label,
-                            'pin': pin,
-                            'signal': signal
-                        })
-        
-        return pwm_channels
+                    'channel': f"TIM_CHANNEL_{channel_part[2:]}",
+                    'label': config.get('GPIO_Label', f"{timer}_{channel_part}"),
+                    'pin': pin,
+                    'signal': signal
+                })
+            return pwm_channels
+
+        return [dict(item) for item in model._memo('pwm', compute)]
     
     @staticmethod
     def get_mcu_name_from_ioc(ioc_path):
@@ -349,25 +466,20 @@ class analyzing_ioc:
         从.ioc文件中获取MCU型号
         返回格式: 'STM32F407IGHx' 等
         """
-        with open(ioc_path, encoding='utf-8', errors='ignore') as f:
-            for line in f:
-                line = line.strip()
-                if not line or line.startswith('#'):
-                    continue
-                if '=' in line:
-                    key, value = line.split('=', 1)
-                    key = key.strip()
-                    value = value.strip()
-                    # 查找MCU名称
-                    if key == 'Mcu.UserName' or key == 'Mcu.Name':
-                        return value
-        return None
+        return IocModel.load(ioc_path).mcu_name
     
+    @staticmethod
+    def get_flash_layout_from_mcu(mcu_name):
+        """
+        根据MCU型号返回Flash布局(FlashLayout)
+        支持STM32F1/F4/F7/H7/G4/L4系列，不支持的型号返回 None
+        """
+        return FlashLayout.from_mcu(mcu_name)
+
     @staticmethod
     def get_flash_config_from_mcu(mcu_name):
         """
-        根据MCU型号返回Flash配置
-        支持STM32F1/F4/H7系列
+        根据MCU型号返回Flash配置（兼容旧格式，逐个展开Sector/Page）
         返回格式: {
             'sectors': [...],  # Sector/Page配置列表
             'dual_bank': False,  # 是否双Bank
@@ -375,208 +487,5 @@ class analyzing_ioc:
             'type': 'sector' or 'page'  # Flash类型
         }
         """
-        if not mcu_name:
-            return None
-        
-        mcu_upper = mcu_name.upper()
-        
-        # STM32F1系列 - 使用Page而不是Sector
-        if mcu_upper.startswith('STM32F1'):
-            return analyzing_ioc._get_stm32f1_flash_config(mcu_upper)
-        
-        # STM32F4系列 - 使用Sector
-        elif mcu_upper.startswith('STM32F4'):
-            return analyzing_ioc._get_stm32f4_flash_config(mcu_upper)
-        
-        # STM32H7系列 - 使用Sector
-        elif mcu_upper.startswith('STM32H7'):
-            return analyzing_ioc._get_stm32h7_flash_config(mcu_upper)
-        
-        return None
-    
-    @staticmethod
-    def _get_stm32f1_flash_config(mcu_upper):
-        """
-        STM32F1系列Flash配置
-        F1使用Page而不是Sector
-        - 小/中容量设备: 1KB/page
-        - 大容量/互联型设备: 2KB/page
-        容量代码: 4/6=16/32KB, 8/B=64/128KB, C=256KB, D/E=384/512KB, F/G=768KB/1MB
-        """
-        flash_size_map_f1 = {
-            '4': 16,    # 16KB
-            '6': 32,    # 32KB
-            '8': 64,    # 64KB
-            'B': 128,   # 128KB
-            'C': 256,   # 256KB
-            'D': 384,   # 384KB
-            'E': 512,   # 512KB
-            'F': 768,   # 768KB (互联型)
-            'G': 1024,  # 1MB (互联型)
-        }
-        
-        # F1命名: STM32F103C8T6, C在索引9
-        if len(mcu_upper) < 10:
-            return None
-        
-        flash_code = mcu_upper[9]
-        flash_size = flash_size_map_f1.get(flash_code)
-        
-        if not flash_size:
-            return None
-        
-        # 判断页大小: <=128KB用1KB页, >128KB用2KB页
-        page_size = 1 if flash_size <= 128 else 2
-        num_pages = flash_size // page_size
-        
-        config = {
-            'type': 'page',
-            'dual_bank': False,
-            'sectors': [],  # F1中这里存的是Page
-            'page_size': page_size,
-        }
-        
-        # 生成所有页
-        current_address = 0x08000000
-        for page_id in range(num_pages):
-            config['sectors'].append({
-                'id': page_id,
-                'address': current_address,
-                'size': page_size
-            })
-            current_address += page_size * 1024
-        
-        config['end_address'] = current_address
-        return config
-    
-    @staticmethod
-    def _get_stm32f4_flash_config(mcu_upper):
-        """
-        STM32F4系列Flash配置
-        容量代码: C=256KB, E=512KB, G=1MB, I=2MB
-        """
-        flash_size_map = {
-            'C': 256,   # 256KB
-            'E': 512,   # 512KB
-            'G': 1024,  # 1MB
-            'I': 2048,  # 2MB
-        }
-        
-        # F4命名: STM32F407IGHx, I在索引9
-        if len(mcu_upper) < 10:
-            return None
-        
-        flash_code = mcu_upper[9]
-        flash_size = flash_size_map.get(flash_code)
-        
-        if not flash_size:
-            return None
-        
-        config = {
-            'type': 'sector',
-            'dual_bank': False,
-            'sectors': [],
-        }
-        
-        # STM32F4系列单Bank Flash布局
-        # Sector 0-3: 16KB each
-        # Sector 4: 64KB
-        # Sector 5-11: 128KB each (如果有)
-        
-        base_sectors = [
-            {'id': 0, 'address': 0x08000000, 'size': 16},
-            {'id': 1, 'address': 0x08004000, 'size': 16},
-            {'id': 2, 'address': 0x08008000, 'size': 16},
-            {'id': 3, 'address': 0x0800C000, 'size': 16},
-            {'id': 4, 'address': 0x08010000, 'size': 64},
-        ]
-        
-        config['sectors'] = base_sectors.copy()
-        current_address = 0x08020000
-        current_id = 5
-        remaining_kb = flash_size - (16 * 4 + 64)  # 减去前5个sector
-        
-        # 添加128KB的sectors
-        while remaining_kb > 0 and current_id < 12:
-            config['sectors'].append({
-                'id': current_id,
-                'address': current_address,
-                'size': 128
-            })
-            current_address += 0x20000  # 128KB
-            remaining_kb -= 128
-            current_id += 1
-        
-        # 设置结束地址
-        config['end_address'] = current_address
-        
-        # 2MB Flash需要双Bank (Sector 12-23)
-        if flash_size >= 2048:
-            config['dual_bank'] = True
-            # Bank 2 的sectors (12-15: 16KB, 16: 64KB, 17-23: 128KB)
-            bank2_sectors = [
-                {'id': 12, 'address': 0x08100000, 'size': 16},
-                {'id': 13, 'address': 0x08104000, 'size': 16},
-                {'id': 14, 'address': 0x08108000, 'size': 16},
-                {'id': 15, 'address': 0x0810C000, 'size': 16},
-                {'id': 16, 'address': 0x08110000, 'size': 64},
-                {'id': 17, 'address': 0x08120000, 'size': 128},
-                {'id': 18, 'address': 0x08140000, 'size': 128},
-                {'id': 19, 'address': 0x08160000, 'size': 128},
-                {'id': 20, 'address': 0x08180000, 'size': 128},
-                {'id': 21, 'address': 0x081A0000, 'size': 128},
-                {'id': 22, 'address': 0x081C0000, 'size': 128},
-                {'id': 23, 'address': 0x081E0000, 'size': 128},
-            ]
-            config['sectors'].extend(bank2_sectors)
-            config['end_address'] = 0x08200000
-        
-        return config
-    
-    @staticmethod
-    def _get_stm32h7_flash_config(mcu_upper):
-        """
-        STM32H7系列Flash配置
-        - 每个Sector 128KB
-        - 单Bank: 8个Sector (1MB)
-        - 双Bank: 16个Sector (2MB), 每个Bank 8个Sector
-        容量代码: B=128KB, G=1MB, I=2MB
-        命名格式: STM32H7 + 23 + V(引脚) + G(容量) + T(封装) + 6
-        """
-        flash_size_map_h7 = {
-            'B': 128,   # 128KB (1个Sector)
-            'G': 1024,  # 1MB (8个Sector, 单Bank)
-            'I': 2048,  # 2MB (16个Sector, 双Bank)
-        }
-        
-        # H7命名: STM32H723VGT6, G在索引10
-        if len(mcu_upper) < 11:
-            return None
-        
-        flash_code = mcu_upper[10]
-        flash_size = flash_size_map_h7.get(flash_code)
-        
-        if not flash_size:
-            return None
-        
-        config = {
-            'type': 'sector',
-            'dual_bank': flash_size >= 2048,
-            'sectors': [],
-        }
-        
-        num_sectors = flash_size // 128  # 每个Sector 128KB
-        
-        # 生成Sector配置
-        current_address = 0x08000000
-        for sector_id in range(num_sectors):
-            config['sectors'].append({
-                'id': sector_id,
-                'address': current_address,
-                'size': 128,
-                'bank': 1 if sector_id < 8 else 2  # Bank信息
-            })
-            current_address += 0x20000  # 128KB
-        
-        config['end_address'] = current_address
-        return config
\ No newline at end of file
+        layout = FlashLayout.from_mcu(mcu_name)
+        return layout.to_config() if layout else None
@@ -0,0 +1,209 @@
+"""
+波形通道的增量统计
+
+采样到达时（SerialSession.append_samples）按批更新，界面刷新时只读取结果，不需要回看历史数据：
+- 全程：最小/最大值，均值与方差用 Welford 算法按批合并（Chan 等的并行合并公式），
+  RMS 由 方差 + 均值² 得到，数值稳定且与采样数无关
+- 滑动窗口（最近 window 个采样）：采样按 window / WINDOW_CHUNKS 个一块汇总，
+  窗口的和/平方和随块进出增减，最小/最大值用单调队列维护，每个采样均摊 O(1)
+  窗口按块滑动，实际覆盖 window ~ window + 块大小 个采样
+- 采样率由时间戳得到（全程与窗口各一个）
+
+批内计算全部是 NumPy 向量运算，逐块的 Python 开销只与块数和通道数有关。
+"""
+from collections import deque
+
+import numpy as np
+
+
+class ChannelStats:
+    """多通道增量统计"""
+
+    WINDOW_CHUNKS = 32
+
+    def __init__(self, window=10000):
+        self.channels = 0
+        self._set_window_size(window)
+        self.reset()
+
+    def _set_window_size(self, window):
+        self.window = max(int(window), 1)
+        self.chunk_size = max(1, self.window // self.WINDOW_CHUNKS)
+
+    def set_window(self, window):
+        """设置滑动窗口的采样数，窗口统计重新开始（全程统计保留）"""
+        self._set_window_size(window)
+        self._reset_window()
+
+    def reset(self, channels=None):
+        if channels is not None:
+            self.channels = channels
+        c = self.channels
+        self.count = 0
+        self.mean = np.zeros(c)
+        self.m2 = np.zeros(c)
+        self.min = np.full(c, np.inf)
+        self.max = np.full(c, -np.inf)
+        self.first_time = None
+        self.last_time = None
+        self._reset_window()
+
+    def _reset_window(self):
+        c = self.channels
+        # 块: [块序号, 采样数, 首个时间戳, 和, 平方和]，和与平方和相对 _shift 计算，减小相减时的舍入误差
+        self._chunks = deque()
+        self._chunk_id = 0
+        self._shift = None
+        self._sum = np.zeros(c)
+        self._sumsq = np.zeros(c)
+        self._window_count = 0
+        self._evicted = 0
+        # 每个通道的单调队列，元素为 (块序号, 值)：最小值队列值递增，最大值队列值递减
+        self._min_queues = [deque() for _ in range(c)]
+        self._max_queues = [deque() for _ in range(c)]
+
+    def update(self, timestamps, samples):
+        """
+        追加一批采样
+        timestamps: shape=(n,)，samples: shape=(n, 通道数)；通道数变化时统计重新开始
+        """
+        n = len(samples)
+        if not n:
+            return
+        if samples.shape[1] != self.channels:
+            self.reset(samples.shape[1])
+        data = np.asarray(samples, dtype=np.float64)
+
+        # 全程：按批合并 Welford 统计
+        batch_mean = data.mean(axis=0)
+        batch_m2 = np.square(data - batch_mean).sum(axis=0)
+        total = self.count + n
+        delta = batch_mean - self.mean
+        self.mean += delta * (n / total)
+        self.m2 += batch_m2 + np.square(delta) * (self.count * n / total)
+        self.count = total
+        np.minimum(self.min, data.min(axis=0), out=self.min)
+        np.maximum(self.max, data.max(axis=0), out=self.max)
+        if self.first_time is None:
+            self.first_time = float(timestamps[0])
+        self.last_time = float(timestamps[-1])
+
+        # 窗口：一批超过窗口长度时只有最后 window 个采样有效
+        if n >= self.window:
+            self._reset_window()
+            data, timestamps = data[-self.window:], timestamps[-self.window:]
+            n = self.window
+        if self._shift is None:
+            self._shift = data[0].copy()
+        pos = 0
+        while pos < n:
+            chunk = self._chunks[-1] if self._chunks and self._chunks[-1][1] < self.chunk_size else None
+            if chunk is None:
+                chunk = [self._chunk_id, 0, float(timestamps[pos]),
+                         np.zeros(self.channels), np.zeros(self.channels)]
+                self._chunk_id += 1
+                self._chunks.append(chunk)
+            take = min(self.chunk_size - chunk[1], n - pos)
+            part = data[pos:pos + take]
+            shifted = part - self._shift
+            part_sum = shifted.sum(axis=0)
+            part_sumsq = np.square(shifted).sum(axis=0)
+            chunk[1] += take
+            chunk[3] += part_sum
+            chunk[4] += part_sumsq
+            self._sum += part_sum
+            self._sumsq += part_sumsq
+            self._window_count += take
+            self._push(chunk[0], part.min(axis=0), part.max(axis=0))
+            pos += take
+            self._evict()
+
+    def _push(self, chunk_id, mins, maxs):
+        for queue, value in zip(self._min_queues, mins.tolist()):
+            while queue and queue[-1][1] >= value:
+                queue.pop()
+            queue.append((chunk_id, value))
+        for queue, value in zip(self._max_queues, maxs.tolist()):
+            while queue and queue[-1][1] <= value:
+                queue.pop()
+            queue.append((chunk_id, value))
+
+    def _evict(self):
+        chunks = self._chunks
+        evicted = False
+        while len(chunks) > 1 and self._window_count - chunks[0][1] >= self.window:
+            _, count, _, chunk_sum, chunk_sumsq = chunks.popleft()
+            self._window_count -= count
+            self._sum -= chunk_sum
+            self._sumsq -= chunk_sumsq
+            self._evicted += 1
+            evicted = True
+        if not evicted:
+            return
+        oldest = chunks[0][0]
+        for queue in self._min_queues:
+            while queue[0][0] < oldest:
+                queue.popleft()
+        for queue in self._max_queues:
+            while queue[0][0] < oldest:
+                queue.popleft()
+        # 窗口整体换过一遍后按当前均值重新计算和与平方和，消除长时间增减累积的误差
+        if self._evicted >= len(chunks):
+            self._rebase()
+
+    def _rebase(self):
+        shift = self._shift + self._sum / self._window_count
+        offset = shift - self._shift
+        total_sum = np.zeros(self.channels)
+        total_sumsq = np.zeros(self.channels)
+        for chunk in self._chunks:
+            count, chunk_sum = chunk[1], chunk[3]
+            # sum(x - s') = sum(x - s) - n·d，sum((x - s')²) = sum((x - s)²) - 2d·sum(x - s) + n·d²
+            chunk[4] = chunk[4] - 2 * offset * chunk_sum + count * np.square(offset)
+            chunk[3] = chunk_sum - count * offset
+            total_sum += chunk[3]
+            total_sumsq += chunk[4]
+        self._shift = shift
+        self._sum = total_sum
+        self._sumsq = total_sumsq
+        self._evicted = 0
+
+    def snapshot(self):
+        """
+        返回 {'session': {...}, 'window': {...}}，没有采样时返回 None（窗口刚重新开始时 'window' 为 None）
+        每项为 {'count', 'min', 'max', 'mean', 'std', 'rms'(shape=(通道数,)), 'rate'(采样/s)}，std 为总体标准差
+        """
+        if not self.count:
+            return None
+        variance = np.maximum(self.m2 / self.count, 0.0)
+        session = {
+            'count': self.count,
+            'min': self.min.copy(),
+            'max': self.max.copy(),
+            'mean': self.mean.copy(),
+            'std': np.sqrt(variance),
+            'rms': np.sqrt(variance + np.square(self.mean)),
+            'rate': self._rate(self.count, self.first_time),
+        }
+
+        count = self._window_count
+        if not count:
+            return {'session': session, 'window': None}
+        mean_shifted = self._sum / count
+        variance = np.maximum(self._sumsq / count - np.square(mean_shifted), 0.0)
+        mean = self._shift + mean_shifted
+        window = {
+            'count': count,
+            'min': np.array([queue[0][1] for queue in self._min_queues]),
+            'max': np.array([queue[0][1] for queue in self._max_queues]),
+            'mean': mean,
+            'std': np.sqrt(variance),
+            'rms': np.sqrt(variance + np.square(mean)),
+            'rate': self._rate(count, self._chunks[0][2]),
+        }
+        return {'session': session, 'window': window}
+
+    def _rate(self, count, first_time):
+        """时间戳为毫秒"""
+        span = self.last_time - first_time
+        return (count - 1) * 1000.0 / span if count > 1 and span > 0 else 0.0
@@ -0,0 +1,198 @@
+"""
+波形通道存储
+
+所有通道共用一条时间戳序列，数据按通道连续存放在预分配的 NumPy 数组中。
+数组长度为容量的两倍多：数据顺序写入，写到末尾时把仍有效的部分整体搬回开头（均摊 O(1)），
+因此任意时刻最近 capacity 个采样都是连续内存，可以直接把视图交给 pyqtgraph。
+
+每 BLOCK 个采样额外记录一次最小/最大值，绘图按像素做 min/max 抽取时直接合并块的统计值，
+百万级采样的抽取开销与屏幕宽度成正比，而不是与采样数成正比。
+"""
+import numpy as np
+
+
+def _group_reduce(ufunc, table, group):
+    """table 的每行按 group 个元素一组做 ufunc 归约（列数为 group 的整数倍）"""
+    if group > 16:
+        return ufunc.reduce(table.reshape(table.shape[0], -1, group), axis=2)
+    # 组很小时沿长度为 group 的轴归约，NumPy 对每组的内层循环开销远大于计算本身；
+    # 改为 group 个步长切片逐个合并，每次都是整行的向量运算
+    result = table[:, ::group].copy()
+    for k in range(1, group):
+        ufunc(result, table[:, k::group], out=result)
+    return result
+
+
+class ChannelStore:
+    """多通道采样环形存储"""
+
+    BLOCK = 256
+
+    def __init__(self, capacity=1_000_000, channels=0, dtype=np.float32):
+        block = self.BLOCK
+        self.capacity = max(block, -(-capacity // block) * block)
+        self.dtype = np.dtype(dtype)
+        self.set_channels(channels)
+
+    def set_channels(self, channels):
+        """设置通道数并清空数据（np.zeros 按需分配物理内存，未写入的部分不占用内存）"""
+        self.channels = channels
+        size = 2 * self.capacity + self.BLOCK
+        self._t = np.zeros(size, dtype=np.float64)
+        self._y = np.zeros((channels, size), dtype=self.dtype)
+        self._bmin = np.zeros((channels, size // self.BLOCK), dtype=self.dtype)
+        self._bmax = np.zeros((channels, size // self.BLOCK), dtype=self.dtype)
+        self.clear()
+
+    def clear(self):
+        self._start = 0
+        self._end = 0
+        self.total = 0  # 累计写入的采样数
+
+    def __len__(self):
+        return self._end - self._start
+
+    def _compact(self):
+        """把有效数据搬回数组开头，搬移量为 BLOCK 的整数倍以保持块对齐"""
+        shift = (self._start // self.BLOCK) * self.BLOCK
+        if not shift:
+            return
+        start, end = shift, self._end
+        self._t[:end - start] = self._t[start:end]
+        self._y[:, :end - start] = self._y[:, start:end]
+        b0, b1 = start // self.BLOCK, -(-end // self.BLOCK)
+        self._bmin[:, :b1 - b0] = self._bmin[:, b0:b1]
+        self._bmax[:, :b1 - b0] = self._bmax[:, b0:b1]
+        self._start -= shift
+        self._end -= shift
+
+    def append(self, timestamps, samples):
+        """
+        追加一批采样
+        timestamps: shape=(n,)，samples: shape=(n, 通道数)
+        """
+        n = len(timestamps)
+        if not n:
+            return
+        if n > self.capacity:
+            timestamps, samples = timestamps[-self.capacity:], samples[-self.capacity:]
+            self._start = self._end  # 旧数据全部被覆盖
+            n = self.capacity
+        if self._end + n > self._t.size:
+            self._compact()
+
+        end = self._end
+        self._t[end:end + n] = timestamps
+        self._y[:, end:end + n] = samples.T
+        self._end = end + n
+        self._start = max(self._start, self._end - self.capacity)
+        self.total += n
+
+        # 更新本次写入涉及的完整块的最小/最大值
+        block = self.BLOCK
+        b0, b1 = end // block, self._end // block
+        if b1 > b0:
+            blocks = self._y[:, b0 * block:b1 * block].reshape(self.channels, b1 - b0, block)
+            blocks.min(axis=2, out=self._bmin[:, b0:b1])
+            blocks.max(axis=2, out=self._bmax[:, b0:b1])
+
+    def timestamps(self):
+        """有效时间戳（视图）"""
+        return self._t[self._start:self._end]
+
+    def channel(self, index):
+        """某通道的有效数据（视图）"""
+        return self._y[index, self._start:self._end]
+
+    def latest(self):
+        """每个通道最新的采样值，没有数据时返回 None"""
+        if self._end == self._start:
+            return None
+        return self._y[:, self._end - 1]
+
+    def range(self, first, last):
+        """
+        按累计采样序号（0 ~ total）取 [first, last) 的采样 (时间戳视图, shape=(通道数, m) 的视图)
+        已被覆盖的部分截掉
+        """
+        oldest = self.total - len(self)
+        first = max(first, oldest)
+        last = max(min(last, self.total), first)
+        start = self._start + first - oldest
+        end = self._start + last - oldest
+        return self._t[start:end], self._y[:, start:end]
+
+    def tail(self, count):
+        """最近 count 个采样 (时间戳视图, shape=(通道数, count) 的视图)"""
+        start = max(self._start, self._end - count)
+        return self._t[start:self._end], self._y[:, start:self._end]
+
+    def decimate(self, width, t_min=None, t_max=None):
+        """
+        按屏幕宽度做 min/max 抽取
+        返回 (x, y)，x shape=(m,)，y shape=(通道数, m)；采样数不超过 2*width 时直接返回视图
+        t_min/t_max: 只取该时间范围内的采样（时间戳需单调递增）
+        """
+        start, end = self._start, self._end
+        t = self._t
+        if t_min is not None:
+            start += int(np.searchsorted(t[start:end], t_min, side='left'))
+        if t_max is not None:
+            end = start + int(np.searchsorted(t[start:end], t_max, side='right'))
+        n = end - start
+        width = max(int(width), 1)
+        if n <= 2 * width:
+            return t[start:end], self._y[:, start:end]
+
+        block = self.BLOCK
+        per_bin = -(-n // width)
+        if per_bin < block:
+            # 抽取倍数小于一个块，直接在原始数据上按 per_bin 分组
+            bins = n // per_bin
+            stop = start + bins * per_bin
+            grouped = self._y[:, start:stop].reshape(self.channels, bins, per_bin)
+            mins, maxs = grouped.min(axis=2), grouped.max(axis=2)
+            xs = t[start:stop:per_bin]
+            tail_start = stop
+            tail_block = stop
+        else:
+            # 按块统计合并：中间整块按 group 个块一组（每组不超过 per_bin 个采样，区间数不少于 width），
+            # 只有头尾不完整的块在原始数据上计算
+            group = per_bin // block
+            head_end = min(-(-start // block) * block, end)
+            b0 = head_end // block
+            bins = (end // block - b0) // group
+            b1 = b0 + bins * group
+            mins = _group_reduce(np.minimum, self._bmin[:, b0:b1], group)
+            maxs = _group_reduce(np.maximum, self._bmax[:, b0:b1], group)
+            xs = t[b0 * block:b1 * block:group * block]
+            if head_end > start:
+                head = self._y[:, start:head_end]
+                mins = np.concatenate([head.min(axis=1, keepdims=True), mins], axis=1)
+                maxs = np.concatenate([head.max(axis=1, keepdims=True), maxs], axis=1)
+                xs = np.concatenate([t[start:start + 1], xs])
+            tail_start = b1 * block
+            tail_block = max(end // block * block, tail_start)
+
+        # 尾部不足一个区间的采样合并为一个区间：其中的整块用块统计，剩余不完整的块用原始数据
+        if tail_start < end:
+            tail_min = self._y[:, tail_block:end].min(axis=1, initial=np.inf)
+            tail_max = self._y[:, tail_block:end].max(axis=1, initial=-np.inf)
+            if tail_block > tail_start:
+                whole = slice(tail_start // block, tail_block // block)
+                tail_min = np.minimum(tail_min, self._bmin[:, whole].min(axis=1))
+                tail_max = np.maximum(tail_max, self._bmax[:, whole].max(axis=1))
+            mins = np.concatenate([mins, tail_min[:, None]], axis=1)
+            maxs = np.concatenate([maxs, tail_max[:, None]], axis=1)
+            xs = np.concatenate([xs, t[tail_start:tail_start + 1]])
+
+        # 每个区间输出 (min, max) 两个点，最后补上最新的采样，保证曲线末端位置准确
+        x = np.empty(2 * xs.size + 1, dtype=np.float64)
+        x[0:-1:2] = xs
+        x[1:-1:2] = xs
+        x[-1] = t[end - 1]
+        y = np.empty((self.channels, x.size), dtype=self.dtype)
+        y[:, 0:-1:2] = mins
+        y[:, 1:-1:2] = maxs
+        y[:, -1] = self._y[:, end - 1]
+        return x, y
@@ -1,10 +1,46 @@
 import os
 import yaml
 import shutil
+import hashlib
+from contextlib import contextmanager
 from typing import Dict, List, Tuple, Optional
 import sys
 import re
 import csv
+from app.tools.user_regions import extract_user_regions, merge_user_regions
+
+
+class CompiledTemplate:
+    """在 /* AUTO GENERATED ... */ 标记处预先切分的模板，渲染只需一次拼接"""
+    
+    MARKER_RE = re.compile(r"/\* (AUTO GENERATED [^*\n]*) \*/")
+    
+    def __init__(self, text: str):
+        self.text = text
+        parts = CompiledTemplate.MARKER_RE.split(text)
+        # split 结果为 [文本, 标记名, 文本, 标记名, ..., 文本]
+        self.segments = parts[0::2]
+        self.markers = parts[1::2]
+        self.marker_set = frozenset(self.markers)
+    
+    def __bool__(self):
+        return bool(self.text)
+    
+    def render(self, replacements: Dict[str, str]) -> str:
+        """替换标记，replacements 如 {'AUTO GENERATED CAN_GET': '...'}，未给出的标记保持原样"""
+        pieces = [self.segments[0]]
+        for marker, segment in zip(self.markers, self.segments[1:]):
+            replacement = replacements.get(marker)
+            pieces.append(f"/* {marker} */" if replacement is None else replacement)
+            pieces.append(segment)
+        result = ''.join(pieces)
+        # 非 AUTO GENERATED 格式的标记按普通字符串替换
+        others = {marker: text for marker, text in replacements.items() if marker not in self.marker_set}
+        if others:
+            result = CodeGenerator.replace_multiple_markers(result, others)
+        return result
+
+
 class CodeGenerator:
     """通用代码生成器"""
     
@@ -12,16 +48,91 @@ class CodeGenerator:
     _assets_dir_cache = None
     _assets_dir_initialized = False
     _template_dir_logged = False
+    # 只读模板缓存 {规范化路径: 模板内容}，由 preload_templates 预先填充（批量生成时各进程共享）
+    _template_cache = None
+    TEMPLATE_EXTENSIONS = ('.c', '.h', '.template')
+    # 输出文件统计：内容有变化而写入 / 内容相同而跳过
+    _write_stats = {'written': 0, 'unchanged': 0}
+    # 输入/输出记录，由 recording() 启用，用于增量生成清单
+    _recorder = None
+    # 已切分的模板 {规范化路径: (文件签名, CompiledTemplate)}，文件签名为 (mtime_ns, size)
+    _compiled_templates = {}
+    
+    @staticmethod
+    def get_template(template_path: str) -> Optional[CompiledTemplate]:
+        """获取已切分的模板，按路径+修改时间缓存，读取失败返回 None"""
+        path = os.path.normpath(template_path)
+        if CodeGenerator._recorder is not None:
+            CodeGenerator._recorder['inputs'].add(path)
+        
+        preloaded = CodeGenerator._template_cache
+        if preloaded is not None and path in preloaded:
+            signature = 'preloaded'
+        else:
+            try:
+                st = os.stat(path)
+                signature = (st.st_mtime_ns, st.st_size)
+            except OSError as e:
+                print(f"加载模板失败: {template_path}, 错误: {e}")
+                return None
+        
+        entry = CodeGenerator._compiled_templates.get(path)
+        if entry is not None and entry[0] == signature:
+            return entry[1]
+        
+        if signature == 'preloaded':
+            text = preloaded[path]
+        else:
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    text = f.read()
+            except Exception as e:
+                print(f"加载模板失败: {template_path}, 错误: {e}")
+                return None
+        template = CompiledTemplate(text)
+        CodeGenerator._compiled_templates[path] = (signature, template)
+        return template
     
     @staticmethod
     def load_template(template_path: str) -> str:
         """加载代码模板"""
-        try:
-            with open(template_path, 'r', encoding='utf-8') as f:
-                return f.read()
-        except Exception as e:
-            print(f"加载模板失败: {template_path}, 错误: {e}")
-            return ""
+        template = CodeGenerator.get_template(template_path)
+        return template.text if template is not None else ""
+    
+    @staticmethod
+    def render_template(template_path: str, replacements: Dict[str, str]) -> str:
+        """加载模板并一次性替换其中的标记，模板不存在或为空时返回空字符串"""
+        template = CodeGenerator.get_template(template_path)
+        return template.render(replacements) if template else ""
+    
+    @staticmethod
+    def preload_templates(sub_path: str = "User_code") -> Dict[str, str]:
+        """一次性读取 assets 子目录下的所有模板文件
+        
+        Args:
+            sub_path: assets 下的子路径，默认 User_code
+            
+        Returns:
+            Dict[str, str]: {规范化路径: 模板内容}，可传给 use_template_cache
+        """
+        cache = {}
+        root_dir = CodeGenerator.get_assets_dir(sub_path)
+        for dirpath, _, filenames in os.walk(root_dir):
+            for filename in filenames:
+                if not filename.endswith(CodeGenerator.TEMPLATE_EXTENSIONS):
+                    continue
+                path = os.path.normpath(os.path.join(dirpath, filename))
+                try:
+                    with open(path, 'r', encoding='utf-8') as f:
+                        cache[path] = f.read()
+                except Exception:
+                    pass  # 不缓存，实际使用时由 load_template 报告错误
+        return cache
+    
+    @staticmethod
+    def use_template_cache(cache: Optional[Dict[str, str]]):
+        """启用（或传入 None 关闭）只读模板缓存，load_template 优先从缓存读取"""
+        CodeGenerator._template_cache = cache
     
     @staticmethod
     def replace_auto_generated(content: str, marker: str, replacement: str) -> str:
@@ -31,15 +142,113 @@ class CodeGenerator:
             return content.replace(marker_line, replacement)
         return content
     
+    @staticmethod
+    @contextmanager
+    def recording():
+        """记录期间读取的模板与写出的文件
+        
+        用法::
+        
+            with CodeGenerator.recording() as record:
+                ...
+            record['inputs']   # {模板路径}
+            record['outputs']  # {输出路径: 内容哈希}
+            record['files']    # {读取的项目文件路径: 内容哈希，不存在时为 None}
+        """
+        previous = CodeGenerator._recorder
+        record = {'inputs': set(), 'outputs': {}, 'files': {}}
+        CodeGenerator._recorder = record
+        try:
+            yield record
+        finally:
+            CodeGenerator._recorder = previous
+    
+    @staticmethod
+    def track_file(file_path: str):
+        """记录生成所依赖的项目文件（如 CubeMX 生成的中断文件）
+        
+        文件不存在时同样记录（哈希为 None），之后文件出现或被外部修改，增量生成都会重新执行该任务。
+        """
+        if CodeGenerator._recorder is None:
+            return
+        try:
+            with open(file_path, 'rb') as f:
+                digest = hashlib.sha1(f.read()).hexdigest()
+        except OSError:
+            digest = None
+        CodeGenerator._recorder['files'][os.path.normpath(file_path)] = digest
+    
+    @staticmethod
+    def write_if_changed(file_path: str, content: str, track: bool = True) -> bool:
+        """写入文件，内容与磁盘上完全相同时不写入
+        
+        避免无变化的文件被重写、修改时间改变而导致固件工程大面积重新编译。
+        先比较文件大小，大小相同再比较内容；需要写入时先写临时文件再替换，
+        保证不会留下写了一半的文件，已有文件的权限保持不变。换行符与文本模式写入保持一致。
+        
+        Args:
+            file_path: 文件路径
+            content: 文件内容
+            track: 是否计入 recording() 的输出记录（配置文件等共享文件传 False）
+            
+        Returns:
+            bool: True 表示已写入，False 表示内容未变化
+            
+        Raises:
+            OSError: 写入失败
+        """
+        data = content.encode('utf-8')
+        if os.linesep != '\n':
+            data = data.replace(b'\n', os.linesep.encode('ascii'))
+        return CodeGenerator.write_bytes_if_changed(file_path, data, track)
+    
+    @staticmethod
+    def write_bytes_if_changed(file_path: str, data: bytes, track: bool = True) -> bool:
+        """按字节写入文件，内容未变化时不写入，见 write_if_changed"""
+        if track and CodeGenerator._recorder is not None:
+            CodeGenerator._recorder['outputs'][os.path.normpath(file_path)] = hashlib.sha1(data).hexdigest()
+        
+        try:
+            if os.path.getsize(file_path) == len(data):
+                with open(file_path, 'rb') as f:
+                    if f.read() == data:
+                        CodeGenerator._write_stats['unchanged'] += 1
+                        return False
+        except OSError:
+            pass  # 文件不存在
+        
+        dir_path = os.path.dirname(file_path)
+        if dir_path:  # 只有当目录路径不为空时才创建
+            os.makedirs(dir_path, exist_ok=True)
+        tmp_path = f"{file_path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            if os.path.exists(file_path):
+                shutil.copymode(file_path, tmp_path)  # 替换后保留原文件的权限（如可执行位）
+            os.replace(tmp_path, file_path)
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        CodeGenerator._write_stats['written'] += 1
+        return True
+    
+    @staticmethod
+    def reset_write_stats():
+        """清零输出文件统计"""
+        CodeGenerator._write_stats = {'written': 0, 'unchanged': 0}
+    
+    @staticmethod
+    def get_write_stats() -> Dict[str, int]:
+        """返回输出文件统计 {'written': 写入数, 'unchanged': 未变化数}"""
+        return dict(CodeGenerator._write_stats)
+    
     @staticmethod
     def save_file(content: str, file_path: str) -> bool:
-        """保存文件"""
+        """保存文件（内容未变化时不重写）"""
         try:
-            dir_path = os.path.dirname(file_path)
-            if dir_path:  # 只有当目录路径不为空时才创建
-                os.makedirs(dir_path, exist_ok=True)
-            with open(file_path, 'w', encoding='utf-8') as f:
-                f.write(content)
+            CodeGenerator.write_if_changed(file_path, content)
             return True
         except Exception as e:
             print(f"保存文件失败: {file_path}, 错误: {e}")
@@ -60,9 +269,8 @@ class CodeGenerator:
     def save_config(config: Dict, config_path: str) -> bool:
         """保存配置文件"""
         try:
-            os.makedirs(os.path.dirname(config_path), exist_ok=True)
-            with open(config_path, 'w', encoding='utf-8') as f:
-                yaml.safe_dump(config, f, allow_unicode=True, default_flow_style=False)
+            content = yaml.safe_dump(config, allow_unicode=True, default_flow_style=False)
+            CodeGenerator.write_if_changed(config_path, content, track=False)
             return True
         except Exception as e:
             print(f"保存配置失败: {config_path}, 错误: {e}")
@@ -182,39 +390,17 @@ class CodeGenerator:
         """
         if not old_code:
             return new_code
-            
-        # 更灵活的正则表达式，支持更多格式的用户区域标记
-        # 匹配 /* USER 任意字符 BEGIN */ ... /* USER 相同字符 END */
-        pattern = re.compile(
-            r"/\*\s*USER\s+([A-Za-z0-9_\s]+?)\s+BEGIN\s*\*/(.*?)/\*\s*USER\s+\1\s+END\s*\*/",
-            re.DOTALL | re.IGNORECASE
-        )
-        
-        # 提取旧代码中的所有用户区域
-        old_regions = {}
-        for match in pattern.finditer(old_code):
-            region_name = match.group(1).strip()
-            region_content = match.group(2)
-            old_regions[region_name.upper()] = region_content
-        
-        # 替换函数
-        def repl(match):
-            region_name = match.group(1).strip().upper()
-            current_content = match.group(2)
-            old_content = old_regions.get(region_name)
-            
-            if old_content is not None:
-                # 直接替换中间的内容，保持原有的注释标记不变
-                return match.group(0).replace(current_content, old_content)
-            
-            return match.group(0)
         
-        # 应用替换
-        result = pattern.sub(repl, new_code)
+        result, report = merge_user_regions(new_code, old_code)
         
-        # 调试信息：记录找到的用户区域
-        if old_regions:
-            print(f"保留了 {len(old_regions)} 个用户区域: {list(old_regions.keys())}")
+        # 调试信息：记录保留的用户区域，以及新代码中已不存在而被丢弃的用户代码
+        if report['preserved']:
+            print(f"保留了 {len(report['preserved'])} 个用户区域: {report['preserved']}")
+        if report['orphaned']:
+            print(f"警告：以下用户区域在新代码中已不存在，其内容未被保留: {report['orphaned']}")
+        for item in report['unmatched']:
+            source = "旧文件" if item['source'] == 'old' else "新代码"
+            print(f"警告：{source}第 {item['line']} 行的 USER {item['name']} {item['marker']} 标记未配对")
         
         return result
     
@@ -242,14 +428,8 @@ class CodeGenerator:
             # 保留用户区域
             final_code = CodeGenerator.preserve_all_user_regions(new_code, old_code)
             
-            # 确保目录存在
-            dir_path = os.path.dirname(file_path)
-            if dir_path:  # 只有当目录路径不为空时才创建
-                os.makedirs(dir_path, exist_ok=True)
-            
-            # 保存文件
-            with open(file_path, "w", encoding="utf-8") as f:
-                f.write(final_code)
+            # 保存文件（内容未变化时不重写）
+            CodeGenerator.write_if_changed(file_path, final_code)
                 
             return True
             
@@ -332,8 +512,11 @@ class CodeGenerator:
             bool: 复制是否成功
         """
         try:
-            os.makedirs(os.path.dirname(dst_path), exist_ok=True)
-            shutil.copy2(src_path, dst_path)
+            if CodeGenerator._recorder is not None:
+                CodeGenerator._recorder['inputs'].add(os.path.normpath(src_path))
+            with open(src_path, 'rb') as f:
+                data = f.read()
+            CodeGenerator.write_bytes_if_changed(dst_path, data)
             return True
         except Exception as e:
             print(f"复制文件失败: {src_path} -> {dst_path}, 错误: {e}")
@@ -355,18 +538,12 @@ class CodeGenerator:
             bool: 生成是否成功
         """
         try:
-            # 加载模板
-            template_content = CodeGenerator.load_template(template_path)
-            if not template_content:
+            # 加载模板（已按标记切分），一次拼接完成所有替换
+            template = CodeGenerator.get_template(template_path)
+            if not template:
                 print(f"模板文件不存在或为空: {template_path}")
                 return False
-            
-            # 执行替换
-            if replacements:
-                for marker, replacement in replacements.items():
-                    template_content = CodeGenerator.replace_auto_generated(
-                        template_content, marker, replacement
-                    )
+            template_content = template.render(replacements or {})
             
             # 保存文件
             if preserve_user_code:
@@ -407,9 +584,7 @@ class CodeGenerator:
             bool: 写入是否成功
         """
         try:
-            os.makedirs(os.path.dirname(file_path), exist_ok=True)
-            with open(file_path, 'w', encoding='utf-8') as f:
-                f.write(content)
+            CodeGenerator.write_if_changed(file_path, content)
             return True
         except Exception as e:
             print(f"写入文件失败: {file_path}, 错误: {e}")
@@ -457,10 +632,12 @@ class CodeGenerator:
         Returns:
             str: 替换后的内容
         """
-        result = content
-        for marker, replacement in replacements.items():
-            result = CodeGenerator.replace_auto_generated(result, marker, replacement)
-        return result
+        if not replacements:
+            return content
+        # 一次扫描替换所有标记
+        lookup = {f"/* {marker} */": replacement for marker, replacement in replacements.items()}
+        pattern = re.compile("|".join(re.escape(marker_line) for marker_line in lookup))
+        return pattern.sub(lambda m: lookup[m.group(0)], content)
     
     @staticmethod
     def extract_user_regions(code: str) -> Dict[str, str]:
@@ -477,22 +654,7 @@ class CodeGenerator:
         Returns:
             Dict[str, str]: 区域名称到区域内容的映射
         """
-        if not code:
-            return {}
-            
-        # 使用与preserve_all_user_regions相同的正则表达式
-        pattern = re.compile(
-            r"/\*\s*USER\s+([A-Za-z0-9_\s]+?)\s+BEGIN\s*\*/(.*?)/\*\s*USER\s+\1\s+END\s*\*/",
-            re.DOTALL | re.IGNORECASE
-        )
-        
-        regions = {}
-        for match in pattern.finditer(code):
-            region_name = match.group(1).strip().upper()
-            region_content = match.group(2)
-            regions[region_name] = region_content
-        
-        return regions
+        return extract_user_regions(code)
     
     @staticmethod
     def debug_user_regions(new_code: str, old_code: str, verbose: bool = False) -> Dict[str, Dict[str, str]]:
@@ -0,0 +1,236 @@
+import re
+from bisect import bisect_right
+
+FLASH_BASE = 0x08000000
+
+# 容量代码 -> KB，STM32 命名: STM32 + 系列(F4) + 型号(07) + 引脚数(I) + 容量(G) + 封装(H) + 温度(6/x)
+FLASH_SIZE_CODES = {
+    '4': 16,
+    '6': 32,
+    '8': 64,
+    'B': 128,
+    'Z': 192,
+    'C': 256,
+    'D': 384,
+    'E': 512,
+    'F': 768,
+    'G': 1024,
+    'H': 1536,
+    'I': 2048,
+}
+
+_PART_RE = re.compile(r'STM32([A-Z]\d)([0-9A-Z]{2})[0-9A-Z]([0-9A-Z])')
+
+
+class FlashLayout:
+    """
+    Flash 几何描述，按段(run)存储连续等大小的 Sector/Page
+    每段: (起始地址, 起始编号, 数量, 单个大小(字节), Bank号)
+    地址/编号查询均通过 bisect 完成，不展开逐页列表
+    """
+
+    def __init__(self, runs, kind='sector', dual_bank=False, mcu_name=None):
+        self.kind = kind                # 'sector' 或 'page'
+        self.dual_bank = dual_bank
+        self.mcu_name = mcu_name
+        self.runs = []
+        address = runs[0][0] if runs else FLASH_BASE
+        first_id = 0
+        for start, count, size, bank in runs:
+            # 段之间允许地址跳变（如F4双Bank从0x08100000开始），编号始终连续
+            self.runs.append((start, first_id, count, size, bank))
+            first_id += count
+            address = start + count * size
+        self._run_addresses = [run[0] for run in self.runs]
+        self._run_ids = [run[1] for run in self.runs]
+        self.count = first_id
+        self.end_address = address
+
+    @classmethod
+    def from_bank_template(cls, template, banks=1, bank_stride=None, kind='sector', mcu_name=None):
+        """
+        按单Bank模板生成布局
+        template: [(数量, 大小KB), ...]
+        bank_stride: Bank 2 相对 Bank 1 的地址偏移，默认紧接 Bank 1 之后
+        """
+        bank_bytes = sum(count * size_kb * 1024 for count, size_kb in template)
+        stride = bank_stride or bank_bytes
+        runs = []
+        for bank in range(banks):
+            address = FLASH_BASE + bank * stride
+            for count, size_kb in template:
+                if count <= 0:
+                    continue
+                runs.append((address, count, size_kb * 1024, bank + 1))
+                address += count * size_kb * 1024
+        return cls(runs, kind=kind, dual_bank=banks > 1, mcu_name=mcu_name)
+
+    @classmethod
+    def from_mcu(cls, mcu_name):
+        """根据MCU型号生成Flash布局，不支持的型号返回 None"""
+        if not mcu_name:
+            return None
+        match = _PART_RE.match(mcu_name.upper())
+        if not match:
+            return None
+        family, line, size_code = match.groups()
+        size_kb = FLASH_SIZE_CODES.get(size_code)
+        builder = _FAMILY_BUILDERS.get(family)
+        if not size_kb or not builder:
+            return None
+        layout = builder(line, size_kb)
+        if layout:
+            layout.mcu_name = mcu_name
+        return layout
+
+    def __len__(self):
+        return self.count
+
+    @property
+    def size_kb(self):
+        return sum(count * size for _, _, count, size, _ in self.runs) // 1024
+
+    @property
+    def page_size(self):
+        """首段单个 Sector/Page 大小(KB)"""
+        return self.runs[0][3] // 1024 if self.runs else 0
+
+    def _run_of_id(self, sector_id):
+        if not 0 <= sector_id < self.count:
+            raise IndexError(f"sector {sector_id} 超出范围 0-{self.count - 1}")
+        return self.runs[bisect_right(self._run_ids, sector_id) - 1]
+
+    def sector_address(self, sector_id):
+        """Sector/Page 编号 -> 起始地址"""
+        start, first_id, _, size, _ = self._run_of_id(sector_id)
+        return start + (sector_id - first_id) * size
+
+    def sector(self, sector_id):
+        """Sector/Page 编号 -> {'id', 'address', 'size'(KB), 'bank'}"""
+        start, first_id, _, size, bank = self._run_of_id(sector_id)
+        return {
+            'id': sector_id,
+            'address': start + (sector_id - first_id) * size,
+            'size': size // 1024,
+            'bank': bank,
+        }
+
+    def sector_at(self, address):
+        """地址 -> 所在 Sector/Page 编号，不在Flash范围内返回 None"""
+        idx = bisect_right(self._run_addresses, address) - 1
+        if idx < 0:
+            return None
+        start, first_id, count, size, _ = self.runs[idx]
+        offset = (address - start) // size
+        if offset >= count:
+            return None
+        return first_id + offset
+
+    def sectors_covering(self, start, end):
+        """覆盖地址区间 [start, end) 的 Sector/Page 编号 range"""
+        if end <= start:
+            return range(0)
+        first = self.sector_at(start)
+        last = self.sector_at(end - 1)
+        if first is None:
+            idx = bisect_right(self._run_addresses, start)
+            if idx >= len(self.runs):
+                return range(0)
+            first = self.runs[idx][1]
+        if last is None:
+            idx = bisect_right(self._run_addresses, end - 1) - 1
+            if idx < 0:
+                return range(0)
+            run_start, run_first, count, size, _ = self.runs[idx]
+            last = run_first + count - 1
+        return range(first, last + 1)
+
+    def iter_sectors(self):
+        """逐个生成 Sector/Page 信息（惰性，不构建列表）"""
+        for start, first_id, count, size, bank in self.runs:
+            for i in range(count):
+                yield {
+                    'id': first_id + i,
+                    'address': start + i * size,
+                    'size': size // 1024,
+                    'bank': bank,
+                }
+
+    def to_config(self):
+        """转换为旧版 get_flash_config_from_mcu 的字典格式"""
+        config = {
+            'type': self.kind,
+            'dual_bank': self.dual_bank,
+            'sectors': list(self.iter_sectors()),
+            'end_address': self.end_address,
+        }
+        if self.kind == 'page':
+            config['page_size'] = self.page_size
+        return config
+
+
+def _stm32f1_layout(line, size_kb):
+    """F1: <=128KB 为1KB页，大容量/互联型为2KB页；XL容量(>512KB)为双Bank"""
+    page_kb = 1 if size_kb <= 128 else 2
+    if size_kb > 512:
+        # XL容量两个Bank大小不等：Bank 1 固定512KB，其余在 Bank 2
+        return FlashLayout([
+            (FLASH_BASE, 512 // page_kb, page_kb * 1024, 1),
+            (FLASH_BASE + 512 * 1024, (size_kb - 512) // page_kb, page_kb * 1024, 2),
+        ], kind='page', dual_bank=True)
+    return FlashLayout.from_bank_template([(size_kb // page_kb, page_kb)], kind='page')
+
+
+def _stm32f4_layout(line, size_kb):
+    """F4: 4x16KB + 64KB + Nx128KB，2MB型号为双Bank（Bank 2 从 0x08100000 开始）"""
+    banks = 2 if size_kb >= 2048 else 1
+    bank_kb = size_kb // banks
+    template = [(4, 16), (1, 64), ((bank_kb - 128) // 128, 128)]
+    return FlashLayout.from_bank_template(template, banks=banks)
+
+
+def _stm32f7_layout(line, size_kb):
+    """F72x/F73x: 4x16KB + 64KB + Nx128KB；F74x-F77x: 4x32KB + 128KB + Nx256KB（默认单Bank模式）"""
+    if line[0] in '23':
+        template = [(4, 16), (1, 64), ((size_kb - 128) // 128, 128)]
+    else:
+        template = [(4, 32), (1, 128), ((size_kb - 256) // 256, 256)]
+    return FlashLayout.from_bank_template(template)
+
+
+def _stm32h7_layout(line, size_kb):
+    """H7: 128KB Sector，每Bank最多8个；H7A3/H7B3/H7B0 为8KB Sector"""
+    if line[0] in 'AB':
+        banks = 2 if size_kb >= 1024 else 1
+        bank_kb = size_kb // banks
+        return FlashLayout.from_bank_template([(bank_kb // 8, 8)], banks=banks)
+    banks = 2 if size_kb > 1024 else 1
+    bank_kb = size_kb // banks
+    return FlashLayout.from_bank_template([(max(bank_kb // 128, 1), 128)], banks=banks)
+
+
+def _stm32g4_layout(line, size_kb):
+    """G4: 2KB页；G47x/G48x 默认双Bank模式"""
+    banks = 2 if line in ('73', '74', '83', '84') else 1
+    bank_kb = size_kb // banks
+    return FlashLayout.from_bank_template([(bank_kb // 2, 2)], banks=banks, kind='page')
+
+
+def _stm32l4_layout(line, size_kb):
+    """L4: 2KB页，L47x/L48x/L49x/L4Ax 为双Bank；L4+(L4R/L4S/L4P/L4Q) 双Bank模式下为4KB页"""
+    if line[0] in 'RSPQ':
+        page_kb, banks = 4, 2
+    else:
+        page_kb, banks = 2, (2 if line[0] in '789A' else 1)
+    bank_kb = size_kb // banks
+    return FlashLayout.from_bank_template([(bank_kb // page_kb, page_kb)], banks=banks, kind='page')
+
+
+_FAMILY_BUILDERS = {
+    'F1': _stm32f1_layout,
+    'F4': _stm32f4_layout,
+    'F7': _stm32f7_layout,
+    'H7': _stm32h7_layout,
+    'G4': _stm32g4_layout,
+    'L4': _stm32l4_layout,
+}
@@ -0,0 +1,154 @@
+"""
+增量生成清单 User/.mrobot_manifest.json
+
+以生成任务为单位（如 bsp_can、component_pid、device_dr16、task）记录：
+    templates: 用到的模板文件 -> 内容哈希
+    config:    YAML 配置段的哈希
+    ioc:       依赖的 .ioc 键（如 'Mcu.UserName'）或参数分组（如 'PA4'）-> 哈希
+    outputs:   生成/修改的文件 -> 内容哈希
+    files:     读取的项目文件（如中断文件）-> 内容哈希，文件不存在时为 None
+下次生成时，输入与输出都没有变化的任务直接跳过。
+"""
+import hashlib
+import json
+import os
+
+from app.tools.analyzing_ioc import IocModel, analyzing_ioc
+from app.tools.code_generator import CodeGenerator
+
+MANIFEST_PATH = "User/.mrobot_manifest.json"
+MANIFEST_VERSION = 2  # 2: 增加 files（读取的项目文件），旧清单全部重新生成
+
+_ASSETS_PREFIX = "assets:"
+
+
+def file_hash(path):
+    """文件内容哈希，文件不存在时返回 None"""
+    try:
+        with open(path, 'rb') as f:
+            return hashlib.sha1(f.read()).hexdigest()
+    except OSError:
+        return None
+
+
+def config_hash(section):
+    """配置段哈希（与键顺序无关）"""
+    text = json.dumps(section, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+
+class GenerationManifest:
+    """项目的增量生成清单"""
+
+    def __init__(self, project_path):
+        self.project_path = os.path.abspath(project_path)
+        self.path = os.path.join(self.project_path, MANIFEST_PATH)
+        self.entries = {}
+        self.dirty = False
+        self._ioc_model = None
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except Exception as e:
+            print(f"读取生成清单失败，将全部重新生成: {self.path}, 错误: {e}")
+            return
+        if data.get('version') == MANIFEST_VERSION:
+            self.entries = data.get('entries', {})
+
+    def save(self):
+        """有变化时写回清单"""
+        if not self.dirty:
+            return
+        data = {'version': MANIFEST_VERSION, 'entries': self.entries}
+        text = json.dumps(data, indent=1, sort_keys=True, ensure_ascii=False) + "\n"
+        try:
+            CodeGenerator.write_if_changed(self.path, text, track=False)
+            self.dirty = False
+        except OSError as e:
+            print(f"保存生成清单失败: {self.path}, 错误: {e}")
+
+    # 模板记录为相对 assets 的路径，输出记录为相对项目的路径，清单可随项目移动
+    def _template_key(self, path):
+        try:
+            rel = os.path.relpath(path, CodeGenerator.get_assets_dir())
+        except ValueError:  # Windows 下不在同一盘符
+            rel = os.pardir
+        if rel.startswith(os.pardir):
+            return os.path.abspath(path)
+        return _ASSETS_PREFIX + rel.replace(os.sep, '/')
+
+    def _template_path(self, key):
+        if key.startswith(_ASSETS_PREFIX):
+            return os.path.join(CodeGenerator.get_assets_dir(), key[len(_ASSETS_PREFIX):])
+        return key
+
+    def _output_key(self, path):
+        return os.path.relpath(path, self.project_path).replace(os.sep, '/')
+
+    def ioc_hashes(self, groups):
+        """.ioc 中指定键或参数分组的哈希，如 ('Mcu.UserName', 'PA4')"""
+        if not groups:
+            return {}
+        if self._ioc_model is None:
+            ioc_path = analyzing_ioc.find_ioc_file(self.project_path)
+            if not ioc_path:
+                return {group: None for group in groups}
+            self._ioc_model = IocModel.load(ioc_path)
+        model = self._ioc_model
+        return {
+            group: config_hash(model.config.get(group) if '.' in group else model.params.get(group, {}))
+            for group in groups
+        }
+
+    def is_up_to_date(self, key, section, ioc_groups=()):
+        """任务的配置、.ioc 分组、模板与输出文件都与清单一致时返回 True"""
+        entry = self.entries.get(key)
+        if not entry:
+            return False
+        if entry.get('config') != config_hash(section):
+            return False
+        if entry.get('ioc', {}) != self.ioc_hashes(ioc_groups):
+            return False
+        for template, digest in entry.get('templates', {}).items():
+            if file_hash(self._template_path(template)) != digest:
+                return False
+        for output, digest in entry.get('outputs', {}).items():
+            if file_hash(os.path.join(self.project_path, output)) != digest:
+                return False
+        for path, digest in entry.get('files', {}).items():
+            if file_hash(os.path.join(self.project_path, path)) != digest:
+                return False
+        return True
+
+    def record(self, key, section, ioc_groups, record):
+        """
+        记录一次成功生成
+        record: CodeGenerator.recording() 的结果
+            {'inputs': {模板路径}, 'outputs': {输出路径: 哈希}, 'files': {项目文件路径: 哈希或 None}}
+        同时是输出的项目文件只按输出记录（写入后的内容）
+        """
+        outputs = {os.path.normpath(path) for path in record['outputs']}
+        self.entries[key] = {
+            'config': config_hash(section),
+            'ioc': self.ioc_hashes(ioc_groups),
+            'templates': {
+                self._template_key(path): file_hash(path) for path in sorted(record['inputs'])
+            },
+            'outputs': {
+                self._output_key(path): digest for path, digest in sorted(record['outputs'].items())
+            },
+            'files': {
+                self._output_key(path): digest for path, digest in sorted(record.get('files', {}).items())
+                if os.path.normpath(path) not in outputs
+            },
+        }
+        self.dirty = True
+
+    def forget(self, key):
+        if self.entries.pop(key, None) is not None:
+            self.dirty = True
@@ -0,0 +1,138 @@
+"""
+项目配置存储
+
+同一项目的 User/bsp/bsp_config.yaml、User/component/component_config.yaml、
+User/device/device_config.yaml、User/task/config.yaml 只解析一次并常驻内存，
+各页面/生成器按配置段读写，修改只标记为脏，在 batch() 结束时每个文件最多写一次。
+文件被外部修改（mtime/size 变化）且内存中没有未写入的修改时自动重新加载。
+"""
+import os
+from contextlib import contextmanager
+
+import yaml
+
+from app.tools.code_generator import CodeGenerator
+
+try:
+    from yaml import CSafeLoader as _YamlLoader
+except ImportError:  # 未编译 LibYAML 时使用纯 Python 解析
+    from yaml import SafeLoader as _YamlLoader
+
+CONFIG_FILES = {
+    'bsp': "User/bsp/bsp_config.yaml",
+    'component': "User/component/component_config.yaml",
+    'device': "User/device/device_config.yaml",
+    'task': "User/task/config.yaml",
+}
+
+
+def _file_signature(path):
+    try:
+        st = os.stat(path)
+        return (st.st_mtime_ns, st.st_size)
+    except OSError:
+        return None
+
+
+class ProjectConfigStore:
+    """单个项目的配置存储，通过 for_project 获取（同一项目共享一个实例）"""
+
+    _stores = {}
+
+    def __init__(self, project_path):
+        self.project_path = os.path.abspath(project_path)
+        self._data = {}          # kind -> 解析结果
+        self._signatures = {}    # kind -> 加载/写入时的文件签名
+        self._dirty = set()
+        self._batch_depth = 0
+
+    @classmethod
+    def for_project(cls, project_path):
+        key = os.path.abspath(project_path)
+        store = cls._stores.get(key)
+        if store is None:
+            store = cls._stores[key] = cls(key)
+        return store
+
+    @classmethod
+    def clear_cache(cls):
+        cls._stores.clear()
+
+    def path(self, kind):
+        return os.path.join(self.project_path, CONFIG_FILES[kind])
+
+    def get(self, kind):
+        """
+        返回整个配置文件的内容（bsp/component/device 为 dict，task 为 list）
+        返回值请只读，修改请使用 set_section / set
+        """
+        path = self.path(kind)
+        if kind in self._dirty:
+            return self._data[kind]
+        signature = _file_signature(path)
+        if kind in self._data and self._signatures.get(kind) == signature:
+            return self._data[kind]
+
+        data = None
+        if signature is not None:
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    data = yaml.load(f, Loader=_YamlLoader)
+            except Exception as e:
+                print(f"加载配置失败: {path}, 错误: {e}")
+        if data is None:
+            data = [] if kind == 'task' else {}
+        self._data[kind] = data
+        self._signatures[kind] = signature
+        return data
+
+    def section(self, kind, key, default=None):
+        """读取配置段，如 section('bsp', 'can')"""
+        return self.get(kind).get(key, default)
+
+    def set_section(self, kind, key, value):
+        """写入配置段，内容未变化时不标记为脏"""
+        data = self.get(kind)
+        if key in data and data[key] == value:
+            return
+        data[key] = value
+        self._mark_dirty(kind)
+
+    def set(self, kind, data):
+        """替换整个配置文件的内容（如任务列表）"""
+        if self.get(kind) == data:
+            return
+        self._data[kind] = data
+        self._mark_dirty(kind)
+
+    def _mark_dirty(self, kind):
+        self._dirty.add(kind)
+        if self._batch_depth == 0:
+            self.flush()
+
+    @contextmanager
+    def batch(self):
+        """批量修改：期间的修改在退出时统一写入，每个文件最多写一次"""
+        self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            self._batch_depth -= 1
+            if self._batch_depth == 0:
+                self.flush()
+
+    def flush(self):
+        """写入所有有修改的配置文件"""
+        for kind in sorted(self._dirty):
+            path = self.path(kind)
+            data = self._data[kind]
+            try:
+                if kind == 'task':
+                    content = yaml.safe_dump(data, allow_unicode=True)
+                else:
+                    content = yaml.safe_dump(data, allow_unicode=True, default_flow_style=False)
+                CodeGenerator.write_if_changed(path, content, track=False)
+                self._signatures[kind] = _file_signature(path)
+            except Exception as e:
+                print(f"保存配置失败: {path}, 错误: {e}")
+        self._dirty.clear()
@@ -0,0 +1,1550 @@
+"""
+无界面代码生成引擎
+
+BSP / Component / Device 的生成逻辑与界面分离，全部由项目中的
+User/bsp/bsp_config.yaml、User/component/component_config.yaml、
+User/device/device_config.yaml 驱动，不依赖 Qt，可在命令行/CI 中使用：
+
+    python MRobot.py generate --project <项目目录>
+
+可重复指定 --project 以多进程批量生成多个项目（模板只读取一次，各进程共享）。
+"""
+import argparse
+import contextlib
+import csv
+import io
+import os
+import re
+import sys
+import textwrap
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+from app.tools.analyzing_ioc import analyzing_ioc
+from app.tools.code_generator import CodeGenerator
+from app.tools.generation_manifest import GenerationManifest
+from app.tools.project_config import ProjectConfigStore
+
+# MCU型号所在的 .ioc 键
+MCU_NAME_IOC_KEYS = ('Mcu.UserName', 'Mcu.Name')
+
+
+def load_code_catalog():
+    """
+    读取 User_code/config.csv 中的页面目录
+    返回格式: [('bsp', 'can'), ('component', 'pid'), ('device', 'dr16'), ...]
+    """
+    csv_path = os.path.join(CodeGenerator.get_assets_dir("User_code"), "config.csv")
+    catalog = []
+    if os.path.exists(csv_path):
+        with open(csv_path, newline='', encoding='utf-8') as f:
+            for row in csv.reader(f):
+                row = [cell.strip() for cell in row if cell.strip()]
+                if not row:
+                    continue
+                main_title = row[0]
+                for sub in row[1:]:
+                    catalog.append((main_title, sub.replace("-", "_")))
+    return catalog
+
+
+def _bsp_template_path(folder, filename):
+    """BSP模板路径，优先从子文件夹读取，不存在时回退到根目录（向后兼容）"""
+    template_base_dir = CodeGenerator.get_assets_dir("User_code/bsp")
+    template_path = os.path.join(template_base_dir, folder, filename)
+    if not os.path.exists(template_path):
+        template_path = os.path.join(template_base_dir, filename)
+    return template_path
+
+
+def _copy_extra_files(template_dir, output_dir, skip_files, label):
+    """复制模板文件夹下的其他额外文件（如 README.md、lcd_lib.h），不复制子目录"""
+    if not os.path.isdir(template_dir):
+        return
+    for item in os.listdir(template_dir):
+        if item in skip_files:
+            continue
+        src_file = os.path.join(template_dir, item)
+        if os.path.isfile(src_file):
+            if CodeGenerator.copy_dependency_file(src_file, os.path.join(output_dir, item)):
+                print(f"复制{label}额外文件: {item}")
+
+
+class BspSimpleGenerator:
+    """简单BSP外设：只有开启/关闭，直接复制模板"""
+
+    def __init__(self, project_path, peripheral_name, template_names):
+        self.project_path = project_path
+        self.peripheral_name = peripheral_name
+        self.template_names = template_names
+        self.yaml_key = peripheral_name.lower()
+        # 生成结果依赖的 .ioc 参数分组，用于增量生成
+        self.ioc_groups = ()
+
+    def is_enabled(self, section):
+        return bool(section and section.get('enabled', False))
+
+    def _output_path(self, filename):
+        return os.path.join(self.project_path, f"User/bsp/{filename}")
+
+    def _output_exists(self, filenames=None):
+        filenames = filenames if filenames is not None else self.template_names.values()
+        return any(os.path.exists(self._output_path(filename)) for filename in filenames)
+
+    def _skip_result(self):
+        """未启用时：文件已存在返回 "skipped"，否则 "not_needed" """
+        return "skipped" if self._output_exists() else "not_needed"
+
+    def generate(self, section):
+        """根据配置段生成代码，返回 True/False/"skipped"/"not_needed" """
+        if not self.is_enabled(section):
+            return self._skip_result()
+
+        periph_folder = self.peripheral_name.lower()
+        for filename in self.template_names.values():
+            template_content = CodeGenerator.load_template(_bsp_template_path(periph_folder, filename))
+            if not template_content:
+                return False
+            CodeGenerator.save_with_preserve(self._output_path(filename), template_content)
+
+        _copy_extra_files(
+            os.path.join(CodeGenerator.get_assets_dir("User_code/bsp"), periph_folder),
+            os.path.join(self.project_path, "User/bsp"),
+            list(self.template_names.values()),
+            "BSP"
+        )
+        self.save_config({'enabled': True})
+        return True
+
+    def save_config(self, section):
+        ProjectConfigStore.for_project(self.project_path).set_section('bsp', self.yaml_key, section)
+
+
+class BspPeripheralGenerator(BspSimpleGenerator):
+    """带设备列表的BSP外设（I2C/SPI/UART/CAN...），配置为 [(设备名, 实例)]"""
+
+    def __init__(self, project_path, peripheral_name, template_names, enum_prefix, handle_prefix, yaml_key):
+        super().__init__(project_path, peripheral_name, template_names)
+        self.enum_prefix = enum_prefix
+        self.handle_prefix = handle_prefix
+        self.yaml_key = yaml_key
+
+    @staticmethod
+    def configs_from_section(section):
+        """配置段 -> [(设备名, 实例)]"""
+        configs = []
+        for device in (section or {}).get('devices', []) or []:
+            name = str(device.get('name', '')).strip()
+            instance = device.get('instance', '')
+            if name and instance:
+                configs.append((name.upper(), instance))
+        return configs
+
+    @staticmethod
+    def section_from_configs(configs):
+        return {
+            'enabled': True,
+            'devices': [{'name': name, 'instance': instance} for name, instance in configs]
+        }
+
+    def is_enabled(self, section):
+        return super().is_enabled(section) and bool(self.configs_from_section(section))
+
+    def _skip_result(self):
+        filenames = [f"{self.yaml_key}.h", f"{self.yaml_key}.c"]
+        return "skipped" if self._output_exists(filenames) else "not_needed"
+
+    def generate(self, section):
+        if not self.is_enabled(section):
+            return self._skip_result()
+        configs = self.configs_from_section(section)
+        if not self._generate_header_file(configs):
+            return False
+        if not self._generate_source_file(configs):
+            return False
+        self.save_config(self.section_from_configs(configs))
+        return True
+
+    def _load_peripheral_template(self, key):
+        return CodeGenerator.get_template(
+            _bsp_template_path(self.peripheral_name.lower(), self.template_names[key])
+        )
+
+    def _generate_header_file(self, configs):
+        template = self._load_peripheral_template('header')
+        if not template:
+            return False
+        enum_lines = [f"  {self.enum_prefix}_{name}," for name, _ in configs]
+        content = template.render({f"AUTO GENERATED {self.enum_prefix}_NAME": "\n".join(enum_lines)})
+        CodeGenerator.save_with_preserve(self._output_path(self.template_names['header']), content)
+        return True
+
+    def _generate_source_file(self, configs):
+        template = self._load_peripheral_template('source')
+        if not template:
+            return False
+        # Get函数
+        get_lines = []
+        for idx, (name, instance) in enumerate(configs):
+            if idx == 0:
+                get_lines.append(f"  if ({self.handle_prefix}->Instance == {instance})")
+            else:
+                get_lines.append(f"  else if ({self.handle_prefix}->Instance == {instance})")
+            get_lines.append(f"    return {self.enum_prefix}_{name};")
+        # Handle函数
+        handle_lines = []
+        for name, instance in configs:
+            handle_lines.append(f"    case {self.enum_prefix}_{name}:")
+            # UART/USART统一用 huart 前缀
+            if self.enum_prefix == "BSP_UART":
+                num = ''.join(filter(str.isdigit, instance))
+                handle_lines.append(f"      return &huart{num};")
+            else:
+                handle_lines.append(f"      return &h{instance.lower()};")
+        content = template.render({
+            f"AUTO GENERATED {self.enum_prefix.split('_')[1]}_GET": "\n".join(get_lines),
+            f"AUTO GENERATED {self.enum_prefix}_GET_HANDLE": "\n".join(handle_lines),
+        })
+        CodeGenerator.save_with_preserve(self._output_path(self.template_names['source']), content)
+        return True
+
+
+class BspCanGenerator(BspPeripheralGenerator):
+    """CAN：按CAN数量分配FIFO并生成初始化代码"""
+
+    def _skip_result(self):
+        return BspSimpleGenerator._skip_result(self)
+
+    def _generate_source_file(self, configs):
+        template = self._load_peripheral_template('source')
+        if not template:
+            return False
+
+        # CAN_Get函数
+        get_lines = []
+        for idx, (name, instance) in enumerate(configs):
+            if idx == 0:
+                get_lines.append(f"    if (hcan->Instance == {instance})")
+            else:
+                get_lines.append(f"    else if (hcan->Instance == {instance})")
+            get_lines.append(f"        return {self.enum_prefix}_{name};")
+
+        # Handle函数
+        handle_lines = []
+        for name, instance in configs:
+            num = ''.join(filter(str.isdigit, instance))  # 提取数字
+            handle_lines.append(f"    case {self.enum_prefix}_{name}:")
+            handle_lines.append(f"      return &hcan{num};")
+
+        # 生成CAN初始化代码，先设置初始化标志
+        init_lines = [
+            "    // 先设置初始化标志，以便后续回调注册能通过检查",
+            "    inited = true;",
+            "",
+        ]
+
+        # 根据CAN数量分配FIFO
+        can_count = len(configs)
+        if can_count == 1:
+            # 只有CAN1 -> 用FIFO0
+            self._generate_single_can_init(init_lines, configs, "CAN_RX_FIFO0")
+        elif can_count == 2:
+            # CAN1和CAN2 -> CAN1用FIFO0，CAN2用FIFO1
+            self._generate_dual_can_init(init_lines, configs)
+        elif can_count >= 3:
+            # CAN1,2,3+ -> CAN1和CAN2用FIFO0，CAN3用FIFO1
+            self._generate_multi_can_init(init_lines, configs)
+
+        content = template.render({
+            "AUTO GENERATED CAN_GET": "\n".join(get_lines),
+            f"AUTO GENERATED {self.enum_prefix}_GET_HANDLE": "\n".join(handle_lines),
+            "AUTO GENERATED CAN_INIT": "\n".join(init_lines),
+        })
+        CodeGenerator.save_with_preserve(self._output_path(self.template_names['source']), content)
+        return True
+
+    def _register_callbacks(self, name, fifo):
+        return [
+            f"    BSP_CAN_RegisterCallback({self.enum_prefix}_{name}, HAL_CAN_RX_FIFO{fifo}_MSG_PENDING_CB, BSP_CAN_RxFifo{fifo}Callback);",
+            f"    BSP_CAN_RegisterCallback({self.enum_prefix}_{name}, HAL_CAN_TX_MAILBOX0_CPLT_CB, BSP_CAN_TxCompleteCallback);",
+            f"    BSP_CAN_RegisterCallback({self.enum_prefix}_{name}, HAL_CAN_TX_MAILBOX1_CPLT_CB, BSP_CAN_TxCompleteCallback);",
+            f"    BSP_CAN_RegisterCallback({self.enum_prefix}_{name}, HAL_CAN_TX_MAILBOX2_CPLT_CB, BSP_CAN_TxCompleteCallback);",
+        ]
+
+    @staticmethod
+    def _can1_filter_lines():
+        return [
+            f"    // 初始化 CAN1 - 使用 FIFO0",
+            f"    CAN_FilterTypeDef can1_filter = {{0}};",
+            f"    can1_filter.FilterBank = 0;",
+            f"    can1_filter.FilterIdHigh = 0;",
+            f"    can1_filter.FilterIdLow = 0;",
+            f"    can1_filter.FilterMode = CAN_FILTERMODE_IDMASK;",
+            f"    can1_filter.FilterScale = CAN_FILTERSCALE_32BIT;",
+            f"    can1_filter.FilterMaskIdHigh = 0;",
+            f"    can1_filter.FilterMaskIdLow = 0;",
+            f"    can1_filter.FilterActivation = ENABLE;",
+            f"    can1_filter.SlaveStartFilterBank = 14;",
+            f"    can1_filter.FilterFIFOAssignment = CAN_RX_FIFO0;",
+            f"    HAL_CAN_ConfigFilter(&hcan1, &can1_filter);",
+            f"    HAL_CAN_Start(&hcan1);",
+            "",
+        ]
+
+    def _generate_single_can_init(self, init_lines, configs, fifo_assignment):
+        """单个CAN的初始化（使用FIFO0）"""
+        name, instance = configs[0]
+        can_num = instance[-1]  # CAN1 -> 1
+
+        init_lines.extend([
+            f"    // 初始化 {instance} - 使用 FIFO0",
+            f"    CAN_FilterTypeDef can{can_num}_filter = {{0}};",
+            f"    can{can_num}_filter.FilterBank = 0;",
+            f"    can{can_num}_filter.FilterIdHigh = 0;",
+            f"    can{can_num}_filter.FilterIdLow = 0;",
+            f"    can{can_num}_filter.FilterMode = CAN_FILTERMODE_IDMASK;",
+            f"    can{can_num}_filter.FilterScale = CAN_FILTERSCALE_32BIT;",
+            f"    can{can_num}_filter.FilterMaskIdHigh = 0;",
+            f"    can{can_num}_filter.FilterMaskIdLow = 0;",
+            f"    can{can_num}_filter.FilterActivation = ENABLE;",
+            f"    can{can_num}_filter.SlaveStartFilterBank = 14;",
+            f"    can{can_num}_filter.FilterFIFOAssignment = {fifo_assignment};",
+            f"    HAL_CAN_ConfigFilter(&hcan{can_num}, &can{can_num}_filter);",
+            f"    HAL_CAN_Start(&hcan{can_num});",
+            "",
+            f"    // 自动注册{instance}接收回调函数",
+            *self._register_callbacks(name, 0),
+            "",
+            f"    // 激活{instance}中断",
+            f"    HAL_CAN_ActivateNotification(&hcan{can_num}, CAN_IT_RX_FIFO0_MSG_PENDING | CAN_IT_TX_MAILBOX_EMPTY);",
+            ""
+        ])
+
+    def _generate_dual_can_init(self, init_lines, configs):
+        """双CAN初始化（CAN1用FIFO0，CAN2用FIFO1）"""
+        can1_config = next((cfg for cfg in configs if cfg[1] == 'CAN1'), None)
+        can2_config = next((cfg for cfg in configs if cfg[1] == 'CAN2'), None)
+
+        if can1_config:
+            name, instance = can1_config
+            init_lines.extend([
+                *self._can1_filter_lines(),
+                f"    // 自动注册CAN1接收回调函数",
+                *self._register_callbacks(name, 0),
+                "",
+                f"    // 激活CAN1中断",
+                f"    HAL_CAN_ActivateNotification(&hcan1, CAN_IT_RX_FIFO0_MSG_PENDING | ",
+                f"                                        CAN_IT_TX_MAILBOX_EMPTY);  // 激活发送邮箱空中断",
+                ""
+            ])
+
+        if can2_config:
+            name, instance = can2_config
+            init_lines.extend([
+                f"    // 初始化 CAN2 - 使用 FIFO1",
+                f"    can1_filter.FilterBank = 14;",
+                f"    can1_filter.FilterFIFOAssignment = CAN_RX_FIFO1;",
+                f"    HAL_CAN_ConfigFilter(&hcan2, &can1_filter);  // 通过 CAN1 配置",
+                f"    HAL_CAN_Start(&hcan2);",
+                "",
+                f"    // 自动注册CAN2接收回调函数",
+                *self._register_callbacks(name, 1),
+                "",
+                f"    // 激活CAN2中断",
+                f"    HAL_CAN_ActivateNotification(&hcan2, CAN_IT_RX_FIFO1_MSG_PENDING | ",
+                f"                                        CAN_IT_TX_MAILBOX_EMPTY);  // 激活发送邮箱空中断",
+                ""
+            ])
+
+    def _generate_multi_can_init(self, init_lines, configs):
+        """多CAN初始化（CAN1和CAN2用FIFO0，CAN3+用FIFO1）"""
+        can1_config = next((cfg for cfg in configs if cfg[1] == 'CAN1'), None)
+        can2_config = next((cfg for cfg in configs if cfg[1] == 'CAN2'), None)
+        other_configs = [cfg for cfg in configs if cfg[1] not in ['CAN1', 'CAN2']]
+
+        # CAN1 - FIFO0
+        if can1_config:
+            name, instance = can1_config
+            init_lines.extend([
+                *self._can1_filter_lines(),
+                f"    // 自动注册CAN1接收回调函数",
+                *self._register_callbacks(name, 0),
+                "",
+                f"    // 激活CAN1中断",
+                f"    HAL_CAN_ActivateNotification(&hcan1, CAN_IT_RX_FIFO0_MSG_PENDING | ",
+                f"                                        CAN_IT_TX_MAILBOX_EMPTY);  // 激活发送邮箱空中断",
+                ""
+            ])
+
+        # CAN2 - FIFO0
+        if can2_config:
+            name, instance = can2_config
+            init_lines.extend([
+                f"    // 初始化 CAN2 - 使用 FIFO0",
+                f"    can1_filter.FilterBank = 14;",
+                f"    can1_filter.FilterFIFOAssignment = CAN_RX_FIFO0;",
+                f"    HAL_CAN_ConfigFilter(&hcan2, &can1_filter);  // 通过 CAN1 配置",
+                f"    HAL_CAN_Start(&hcan2);",
+                "",
+                f"    // 自动注册CAN1接收回调函数",
+                *self._register_callbacks(name, 0),
+                "",
+                f"    // 激活CAN1中断",
+                f"    HAL_CAN_ActivateNotification(&hcan1, CAN_IT_RX_FIFO0_MSG_PENDING | ",
+                f"                                        CAN_IT_TX_MAILBOX_EMPTY);  // 激活发送邮箱空中断",
+                ""
+            ])
+
+        # CAN3+ - FIFO1
+        filter_bank = 20  # 从过滤器组20开始分配给CAN3+
+        for name, instance in other_configs:
+            can_num = ''.join(filter(str.isdigit, instance))
+            init_lines.extend([
+                f"    // 初始化 {instance} - 使用 FIFO1",
+                f"    can1_filter.FilterBank = {filter_bank};",
+                f"    can1_filter.FilterFIFOAssignment = CAN_RX_FIFO1;",
+                f"    HAL_CAN_ConfigFilter(&hcan1, &can1_filter);  // 通过 CAN1 配置",
+                f"    HAL_CAN_Start(&hcan{can_num});",
+                "",
+                f"    // 自动注册CAN2接收回调函数",
+                *self._register_callbacks(name, 1),
+                "",
+                f"    // 激活CAN2中断",
+                f"    HAL_CAN_ActivateNotification(&hcan2, CAN_IT_RX_FIFO1_MSG_PENDING | ",
+                f"                                        CAN_IT_TX_MAILBOX_EMPTY);  // 激活发送邮箱空中断",
+                ""
+            ])
+            filter_bank += 1  # 为下一个CAN分配不同的过滤器组
+
+
+class BspFdcanGenerator(BspPeripheralGenerator):
+    """FDCAN：生成使能宏/FIFO分配，并附带CAN兼容层"""
+
+    @staticmethod
+    def _fifo_map(count):
+        # 根据 FDCAN 数量分配 FIFO：1个用FIFO0；2个分别用FIFO0/1；3个及以上前两个用FIFO0
+        if count == 1:
+            return {0: 0}
+        if count == 2:
+            return {0: 0, 1: 1}
+        return {0: 0, 1: 0, 2: 1}
+
+    def generate(self, section):
+        result = super().generate(section)
+        if result and result not in ["skipped", "not_needed"]:
+            # 成功后复制CAN兼容层文件
+            self._copy_can_wrapper()
+        return result
+
+    def _copy_can_wrapper(self):
+        """复制CAN兼容层文件(can.h)到项目"""
+        try:
+            can_h_src = os.path.join(CodeGenerator.get_assets_dir("User_code/bsp"), "fdcan", "can.h")
+            if os.path.exists(can_h_src):
+                content = CodeGenerator.load_template(can_h_src)
+                CodeGenerator.save_with_preserve(self._output_path("can.h"), content)
+                print(f"✓ 已复制CAN兼容层: can.h")
+        except Exception as e:
+            print(f"复制CAN兼容层文件时出错: {e}")
+
+    def _generate_header_file(self, configs):
+        template = self._load_peripheral_template('header')
+        if not template:
+            return False
+
+        # 生成枚举
+        enum_lines = [f"  {self.enum_prefix}_{name}," for name, _ in configs]
+
+        # 生成 FDCAN 使能宏和 FIFO 分配（与源文件中的分配一致）
+        fifo_map = self._fifo_map(len(configs))
+        enable_lines = []
+        for idx, (name, instance) in enumerate(configs):
+            num = ''.join(filter(str.isdigit, instance))
+            enable_lines.append(f"#define FDCAN{num}_EN")
+            enable_lines.append(f"#define FDCAN{num}_RX_FIFO  {fifo_map.get(idx, 1)}")
+        content = template.render({
+            f"AUTO GENERATED {self.enum_prefix}_NAME": "\n".join(enum_lines),
+            "AUTO GENERATED FDCAN_ENABLE": "\n".join(enable_lines),
+        })
+        CodeGenerator.save_with_preserve(self._output_path(self.template_names['header']), content)
+        return True
+
+    def _generate_source_file(self, configs):
+        template = self._load_peripheral_template('source')
+        if not template:
+            return False
+
+        # FDCAN_Get函数
+        get_lines = []
+        for idx, (name, instance) in enumerate(configs):
+            if idx == 0:
+                get_lines.append(f"  if (hfdcan->Instance == {instance})")
+            else:
+                get_lines.append(f"  else if (hfdcan->Instance == {instance})")
+            get_lines.append(f"    return {self.enum_prefix}_{name};")
+
+        # Handle函数
+        handle_lines = []
+        for name, instance in configs:
+            num = ''.join(filter(str.isdigit, instance))  # 提取数字
+            handle_lines.append(f"    case {self.enum_prefix}_{name}:")
+            handle_lines.append(f"      return &hfdcan{num};")
+
+        # 生成FDCAN初始化代码（类似CAN的策略）
+        init_lines = []
+        fifo_map = self._fifo_map(len(configs))
+        for idx, (name, instance) in enumerate(configs):
+            self._generate_fdcan_init(init_lines, name, instance, fifo_map.get(idx, 1))
+        content = template.render({
+            "AUTO GENERATED FDCAN_GET": "\n".join(get_lines),
+            f"AUTO GENERATED {self.enum_prefix}_GET_HANDLE": "\n".join(handle_lines),
+            "AUTO GENERATED FDCAN_INIT": "\n".join(init_lines),
+        })
+        CodeGenerator.save_with_preserve(self._output_path(self.template_names['source']), content)
+        return True
+
+    def _generate_fdcan_init(self, init_lines, name, instance, fifo_idx):
+        num = ''.join(filter(str.isdigit, instance))
+        init_lines.extend([
+            f"#ifdef FDCAN{num}_EN",
+            f"  {{",
+            f"    FDCAN_HandleTypeDef hfdcan = hfdcan{num};",
+            f"    FDCAN_FilterTypeDef sFilterConfig = {{0}};",
+            f"    #define FDCANX_RX_FIFO {fifo_idx}",
+            f"    #ifdef FDCAN{num}_FILTER_CONFIG_TABLE",
+            f"      FDCAN{num}_FILTER_CONFIG_TABLE(FDCAN_CONFIG_FILTER)",
+            f"    #endif",
+            f"    #ifdef FDCAN{num}_GLOBAL_FILTER",
+            f"      HAL_FDCAN_ConfigGlobalFilter(&hfdcan{num}, FDCAN{num}_GLOBAL_FILTER);",
+            f"    #endif",
+            f"    HAL_FDCAN_ActivateNotification(&hfdcan{num}, FDCANx_NOTIFY_FLAGS(FDCANX_RX_FIFO), 0);",
+            f"    BSP_FDCAN_RegisterCallback({self.enum_prefix}_{name}, FDCANX_MSG_PENDING_CB(FDCANX_RX_FIFO), BSP_FDCAN_RxFifo{fifo_idx}Callback);",
+            f"    BSP_FDCAN_RegisterCallback({self.enum_prefix}_{name}, HAL_FDCAN_TX_BUFFER_COMPLETE_CB, BSP_FDCAN_TxCompleteCallback);",
+            f"    #undef FDCANX_RX_FIFO",
+            f"    HAL_FDCAN_Start(&hfdcan{num});",
+            f"  }}",
+            f"#endif",
+            "",
+        ])
+
+
+def patch_uart_interrupts(project_path, uart_instances):
+    """自动修改中断文件，插入 UART BSP 相关代码（支持 F1/F4/H7 等系列）"""
+    # 检测MCU型号，确定正确的中断文件
+    ioc_path = analyzing_ioc.find_ioc_file(project_path)
+    if not ioc_path:
+        return
+
+    mcu_name = analyzing_ioc.get_mcu_name_from_ioc(ioc_path)
+    if not mcu_name:
+        return
+
+    # 根据MCU型号确定中断文件名，格式通常为 STM32X0XXX，提取 X0 部分
+    match = re.match(r'STM32([A-Z]\d)', mcu_name.upper())
+    if match:
+        it_file = f"stm32{match.group(1).lower()}xx_it.c"
+    else:
+        # 默认尝试 F4
+        it_file = "stm32f4xx_it.c"
+
+    it_path = os.path.join(project_path, f"Core/Src/{it_file}")
+    # 中断文件不存在时也记录依赖，CubeMX 之后生成该文件时增量生成会重新插入
+    CodeGenerator.track_file(it_path)
+    if not os.path.exists(it_path):
+        return
+
+    with open(it_path, "r", encoding="utf-8") as f:
+        code = f.read()
+
+    # 1. 插入 #include "bsp/uart.h"
+    include_pattern = r"(/\* USER CODE BEGIN Includes \*/)(.*?)(/\* USER CODE END Includes \*/)"
+    if '#include "bsp/uart.h"' not in code:
+        code = re.sub(
+            include_pattern,
+            lambda m: f'{m.group(1)}\n#include "bsp/uart.h"{m.group(2)}{m.group(3)}',
+            code,
+            flags=re.DOTALL
+        )
+
+    # 2. 插入 BSP_UART_IRQHandler(&huartx);，兼容 USARTx / UARTx 命名
+    for instance in uart_instances:
+        num = ''.join(filter(str.isdigit, instance))
+        for prefix in ("USART", "UART"):
+            if f"BSP_UART_IRQHandler(&huart{num});" in code:
+                break
+            irq_pattern = (
+                rf"(void\s+{prefix}{num}_IRQHandler\s*\(\s*void\s*\)\s*\{{.*?/\* USER CODE BEGIN {prefix}{num}_IRQn 1 \*/)(.*?)(/\* USER CODE END {prefix}{num}_IRQn 1 \*/)"
+            )
+            code = re.sub(
+                irq_pattern,
+                lambda m: f"{m.group(1)}\n  BSP_UART_IRQHandler(&huart{num});{m.group(2)}{m.group(3)}",
+                code,
+                flags=re.DOTALL
+            )
+
+    # 使用save_with_preserve保存文件以保留用户区域
+    CodeGenerator.save_with_preserve(it_path, code)
+
+
+class BspUartGenerator(BspPeripheralGenerator):
+    """UART：生成后自动补充中断文件中的 BSP_UART_IRQHandler"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.ioc_groups = MCU_NAME_IOC_KEYS  # 中断文件名由MCU型号决定
+
+    def generate(self, section):
+        if not self.is_enabled(section):
+            return False
+        result = super().generate(section)
+        if result is True:
+            uart_instances = [instance for _, instance in self.configs_from_section(section)]
+            patch_uart_interrupts(self.project_path, uart_instances)
+        return result
+
+
+class BspConfigListGenerator(BspSimpleGenerator):
+    """配置为 configs 列表（每项含 custom_name）的BSP外设，如 GPIO / PWM"""
+
+    @staticmethod
+    def configs_from_section(section):
+        return [cfg for cfg in (section or {}).get('configs', []) or [] if cfg.get('custom_name')]
+
+    def is_enabled(self, section):
+        return super().is_enabled(section) and bool(self.configs_from_section(section))
+
+    def generate(self, section):
+        if not self.is_enabled(section):
+            return self._skip_result()
+        configs = self.configs_from_section(section)
+        if not self._generate_header_file(configs):
+            return False
+        if not self._generate_source_file(configs):
+            return False
+        self.save_config({'enabled': True, 'configs': configs})
+        return True
+
+
+class BspGpioGenerator(BspConfigListGenerator):
+    """GPIO：configs 每项含 custom_name / ioc_label / pin / has_exti / type"""
+
+    def __init__(self, project_path):
+        super().__init__(project_path, "GPIO", {'header': 'gpio.h', 'source': 'gpio.c'})
+
+    def _generate_header_file(self, configs):
+        template = CodeGenerator.get_template(_bsp_template_path("gpio", "gpio.h"))
+        if not template:
+            return False
+        # 生成枚举
+        enum_lines = [f"  BSP_GPIO_{config['custom_name']}," for config in configs]
+        content = template.render({"AUTO GENERATED BSP_GPIO_ENUM": "\n".join(enum_lines)})
+        CodeGenerator.save_with_preserve(self._output_path("gpio.h"), content)
+        return True
+
+    def _generate_source_file(self, configs):
+        template = CodeGenerator.get_template(_bsp_template_path("gpio", "gpio.c"))
+        if not template:
+            return False
+
+        # 生成MAP数组
+        map_lines = []
+        for config in configs:
+            ioc_label = config['ioc_label']
+            map_lines.append(f"    {{{ioc_label}_Pin, {ioc_label}_GPIO_Port}},")
+
+        # 生成EXTI使能代码 - 使用用户自定义的BSP枚举名称，优先使用IOC定义的IRQn（适配不同MCU）
+        enable_lines = []
+        disable_lines = []
+        for config in configs:
+            if config['has_exti']:
+                ioc_label = config['ioc_label']
+                custom_name = config['custom_name']
+                for lines, action in ((enable_lines, "Enable"), (disable_lines, "Disable")):
+                    lines.append(f"    case BSP_GPIO_{custom_name}:")
+                    lines.append(f"#if defined({ioc_label}_EXTI_IRQn)")
+                    lines.append(f"      HAL_NVIC_{action}IRQ({ioc_label}_EXTI_IRQn);")
+                    lines.append(f"#endif")
+                    lines.append(f"      return BSP_OK;")
+        content = template.render({
+            "AUTO GENERATED BSP_GPIO_MAP": "\n".join(map_lines),
+            "AUTO GENERATED BSP_GPIO_ENABLE_IRQ": "\n".join(enable_lines),
+            "AUTO GENERATED BSP_GPIO_DISABLE_IRQ": "\n".join(disable_lines),
+        })
+        CodeGenerator.save_with_preserve(self._output_path("gpio.c"), content)
+        return True
+
+
+class BspPwmGenerator(BspConfigListGenerator):
+    """PWM：configs 每项含 custom_name / timer / channel / label"""
+
+    def __init__(self, project_path):
+        super().__init__(project_path, "PWM", {'header': 'pwm.h', 'source': 'pwm.c'})
+
+    def _generate_header_file(self, configs):
+        template = CodeGenerator.get_template(_bsp_template_path("pwm", "pwm.h"))
+        if not template:
+            return False
+        # 生成枚举
+        enum_lines = [f"  BSP_PWM_{config['custom_name']}," for config in configs]
+        content = template.render({"AUTO GENERATED BSP_PWM_ENUM": "\n".join(enum_lines)})
+        CodeGenerator.save_with_preserve(self._output_path("pwm.h"), content)
+        return True
+
+    def _generate_source_file(self, configs):
+        template = CodeGenerator.get_template(_bsp_template_path("pwm", "pwm.c"))
+        if not template:
+            return False
+        # 生成MAP数组，tim1 -> htim1
+        map_lines = [f"  {{&h{config['timer'].lower()}, {config['channel']}}}," for config in configs]
+        content = template.render({"AUTO GENERATED BSP_PWM_MAP": "\n".join(map_lines)})
+        CodeGenerator.save_with_preserve(self._output_path("pwm.c"), content)
+        return True
+
+
+class BspFlashGenerator(BspSimpleGenerator):
+    """Flash：根据 .ioc 中的MCU型号生成Sector/Page定义"""
+
+    def __init__(self, project_path):
+        super().__init__(project_path, "Flash", {'header': 'flash.h', 'source': 'flash.c'})
+        self.ioc_groups = MCU_NAME_IOC_KEYS
+        self.mcu_name = None
+        self.flash_layout = None
+        ioc_path = analyzing_ioc.find_ioc_file(project_path)
+        if ioc_path:
+            self.mcu_name = analyzing_ioc.get_mcu_name_from_ioc(ioc_path)
+            if self.mcu_name:
+                self.flash_layout = analyzing_ioc.get_flash_layout_from_mcu(self.mcu_name)
+
+    def is_enabled(self, section):
+        return super().is_enabled(section) and self.flash_layout is not None
+
+    def generate(self, section):
+        if not self.is_enabled(section):
+            return False
+        if not self._generate_header_file():
+            return False
+        if not self._generate_source_file():
+            return False
+        self.save_config({
+            'enabled': True,
+            'mcu_name': self.mcu_name,
+            'dual_bank': self.flash_layout.dual_bank,
+            'sectors': len(self.flash_layout)
+        })
+        return True
+
+    def _generate_header_file(self):
+        template_path = os.path.join(CodeGenerator.get_assets_dir("User_code/bsp"), "flash", "flash.h")
+        if not os.path.exists(template_path):
+            return False
+        template = CodeGenerator.get_template(template_path)
+        if not template:
+            return False
+
+        # 生成Sector/Page定义，直接遍历布局中的各段
+        if self.flash_layout.kind == 'page':
+            macro, label = "ADDR_FLASH_PAGE", "Page"
+        else:
+            macro, label = "ADDR_FLASH_SECTOR", "Sector"
+        sector_lines = "\n".join(
+            f"#define {macro}_{item['id']} ((uint32_t)0x{item['address']:08X})\n"
+            f"/* Base address of {label} {item['id']}, {item['size']} Kbytes */"
+            for item in self.flash_layout.iter_sectors()
+        )
+
+        # 生成结束地址
+        end_addr = self.flash_layout.end_address
+        end_line = f"#define ADDR_FLASH_END ((uint32_t)0x{end_addr:08X}) /* End address for flash */"
+        content = template.render({
+            "AUTO GENERATED FLASH_SECTORS": sector_lines,
+            "AUTO GENERATED FLASH_END_ADDRESS": end_line,
+        })
+        CodeGenerator.save_with_preserve(self._output_path("flash.h"), content)
+        return True
+
+    def _generate_source_file(self):
+        template_path = os.path.join(CodeGenerator.get_assets_dir("User_code/bsp"), "flash", "flash.c")
+        if not os.path.exists(template_path):
+            return False
+        template = CodeGenerator.get_template(template_path)
+        if not template:
+            return False
+
+        # 生成最大Sector数定义
+        max_sector = len(self.flash_layout) - 1
+        max_sector_line = f"#define BSP_FLASH_MAX_SECTOR {max_sector}"
+
+        # 生成擦除检查代码
+        erase_check = f"  if (sector > 0 && sector <= {max_sector}) {{"
+        content = template.render({
+            "AUTO GENERATED FLASH_MAX_SECTOR": max_sector_line,
+            "AUTO GENERATED FLASH_ERASE_CHECK": erase_check,
+        })
+        CodeGenerator.save_with_preserve(self._output_path("flash.c"), content)
+        return True
+
+
+def get_bsp_generator(peripheral_name, project_path):
+    """根据外设名返回对应的生成器，没有特殊类则返回 BspSimpleGenerator"""
+    name_lower = peripheral_name.lower()
+    peripheral_generators = {
+        "i2c": (BspPeripheralGenerator, "I2C", "BSP_I2C", "hi2c"),
+        "can": (BspCanGenerator, "CAN", "BSP_CAN", "hcan"),
+        "fdcan": (BspFdcanGenerator, "FDCAN", "BSP_FDCAN", "hfdcan"),
+        "spi": (BspPeripheralGenerator, "SPI", "BSP_SPI", "hspi"),
+        "uart": (BspUartGenerator, "UART", "BSP_UART", "huart"),
+    }
+    special_generators = {
+        "gpio": BspGpioGenerator,
+        "pwm": BspPwmGenerator,
+        "flash": BspFlashGenerator,
+    }
+    template_names = {'header': f'{name_lower}.h', 'source': f'{name_lower}.c'}
+    if name_lower in peripheral_generators:
+        generator_class, display_name, enum_prefix, handle_prefix = peripheral_generators[name_lower]
+        return generator_class(project_path, display_name, template_names, enum_prefix, handle_prefix, name_lower)
+    if name_lower in special_generators:
+        return special_generators[name_lower](project_path)
+    return BspSimpleGenerator(project_path, peripheral_name, template_names)
+
+
+class ComponentGenerator:
+    """组件：复制模板并处理依赖"""
+
+    def __init__(self, project_path, component_name, template_names, dependencies=None):
+        self.project_path = project_path
+        self.component_name = component_name
+        self.template_names = template_names
+        self.dependencies = dependencies or []
+
+    def is_enabled(self, section):
+        return bool(section and section.get('enabled', False))
+
+    def generate(self, section):
+        if not self.is_enabled(section):
+            # 未启用时，文件已存在则跳过
+            for filename in self.template_names.values():
+                if os.path.exists(os.path.join(self.project_path, f"User/component/{filename}")):
+                    return "skipped"
+            return "not_needed"
+
+        # 使用组件名称作为子文件夹名（小写），不存在时回退到根目录（向后兼容）
+        comp_folder = self.component_name.lower()
+        template_base_dir = CodeGenerator.get_assets_dir("User_code/component")
+        for filename in self.template_names.values():
+            template_path = os.path.join(template_base_dir, comp_folder, filename)
+            if not os.path.exists(template_path):
+                template_path = os.path.join(template_base_dir, filename)
+            template_content = CodeGenerator.load_template(template_path)
+            if not template_content:
+                print(f"模板文件不存在或为空: {template_path}")
+                continue
+            output_path = os.path.join(self.project_path, f"User/component/{filename}")
+            CodeGenerator.save_with_preserve(output_path, template_content)
+
+        _copy_extra_files(
+            os.path.join(template_base_dir, comp_folder),
+            os.path.join(self.project_path, "User/component"),
+            list(self.template_names.values()),
+            "组件"
+        )
+        self.save_config({'enabled': True, 'dependencies': self.dependencies})
+        return True
+
+    def save_config(self, section):
+        ProjectConfigStore.for_project(self.project_path).set_section('component', self.component_name.lower(), section)
+
+
+def get_component_generator(component_name, project_path, dependencies=None):
+    """根据组件名返回生成器，dependencies 为 dependencies.csv 的解析结果"""
+    if dependencies is None:
+        dependencies_path = os.path.join(CodeGenerator.get_assets_dir("User_code/component"), "dependencies.csv")
+        dependencies = CodeGenerator.load_dependencies(dependencies_path)
+    name_lower = component_name.lower()
+    template_names = {'header': f'{name_lower}.h', 'source': f'{name_lower}.c'}
+    return ComponentGenerator(project_path, component_name, template_names, dependencies.get(name_lower, []))
+
+
+def get_device_definition(device_name, device_configs):
+    """从设备模板配置中取出设备定义，未定义的设备返回基本配置"""
+    devices = device_configs.get('devices', {})
+    device_key = device_name.lower()
+    if device_key in devices:
+        return devices[device_key]
+    return {
+        'name': device_name,
+        'description': f'{device_name}设备',
+        'files': {'header': f'{device_key}.h', 'source': f'{device_key}.c'},
+        'bsp_requirements': [],
+        'dependencies': {'bsp': [], 'component': []}
+    }
+
+
+def load_device_configs():
+    """加载 User_code/device/config.yaml 设备模板配置"""
+    config_path = os.path.join(CodeGenerator.get_assets_dir("User_code/device"), "config.yaml")
+    return CodeGenerator.load_device_config(config_path)
+
+
+class DeviceGenerator:
+    """设备：复制模板并把BSP占位名替换为选定的BSP设备"""
+
+    def __init__(self, project_path, device_name, device_config):
+        self.project_path = project_path
+        self.device_name = device_name
+        self.device_config = device_config
+
+    def is_enabled(self, section):
+        return bool(section and section.get('enabled', False))
+
+    def generate(self, section):
+        files = self.device_config.get('files', {})
+        if not self.is_enabled(section):
+            # 未启用时，文件已存在则跳过
+            for filename in files.values():
+                if os.path.exists(os.path.join(self.project_path, f"User/device/{filename}")):
+                    return "skipped"
+            return "not_needed"
+
+        bsp_config = section.get('bsp_config', {}) or {}
+
+        # 使用设备名称作为子文件夹名（小写），不存在时回退到根目录（向后兼容）
+        device_folder = self.device_name.lower()
+        template_base_dir = CodeGenerator.get_assets_dir("User_code/device")
+        for file_type, filename in files.items():
+            src_path = os.path.join(template_base_dir, device_folder, filename)
+            if not os.path.exists(src_path):
+                src_path = os.path.join(template_base_dir, filename)
+            if not os.path.exists(src_path):
+                continue
+
+            content = CodeGenerator.load_template(src_path)
+
+            # 替换BSP设备名称
+            for var_name, device_name in bsp_config.items():
+                content = content.replace(var_name, device_name)
+
+            dst_path = os.path.join(self.project_path, f"User/device/{filename}")
+            if file_type == 'header':
+                # 头文件需要保留用户区域
+                CodeGenerator.save_with_preserve(dst_path, content)
+            else:
+                # 源文件直接保存（不需要保留用户区域）
+                CodeGenerator.write_if_changed(dst_path, content)
+
+        _copy_extra_files(
+            os.path.join(template_base_dir, device_folder),
+            os.path.join(self.project_path, "User/device"),
+            list(files.values()),
+            "设备"
+        )
+        self.save_config({'enabled': True, 'bsp_config': bsp_config})
+        return True
+
+    def save_config(self, section):
+        ProjectConfigStore.for_project(self.project_path).set_section('device', self.device_name.lower(), section)
+
+
+def generate_device_header(project_path, enabled_devices):
+    """生成device.h文件"""
+    device_dir = CodeGenerator.get_assets_dir("User_code/device")
+    template_path = os.path.join(device_dir, "device.h")
+    dst_path = os.path.join(project_path, "User/device/device.h")
+
+    # 优先读取项目中已存在的文件以保留用户区域，不存在时使用模板
+    if os.path.exists(dst_path):
+        with open(dst_path, 'r', encoding='utf-8') as f:
+            content = f.read()
+    else:
+        content = CodeGenerator.load_template(template_path)
+
+    # 加载设备配置来获取信号信息，收集所有需要的信号定义
+    device_configs = CodeGenerator.load_device_config(os.path.join(device_dir, "config.yaml"))
+    signals = []
+    current_bit = 0
+    for device_name in enabled_devices:
+        device_config = device_configs.get('devices', {}).get(device_name.lower())
+        if not device_config:
+            continue
+        for signal in device_config.get('thread_signals', []):
+            signals.append(f"#define {signal['name']} (1u << {current_bit})")
+            current_bit += 1
+
+    signals_text = '\n'.join(signals) if signals else '/* No signals defined */'
+
+    # 替换AUTO GENERATED SIGNALS部分，保留其他所有用户区域
+    pattern = r'/\* AUTO GENERATED SIGNALS BEGIN \*/(.*?)/\* AUTO GENERATED SIGNALS END \*/'
+    replacement = f'/* AUTO GENERATED SIGNALS BEGIN */\n{signals_text}\n/* AUTO GENERATED SIGNALS END */'
+    content = re.sub(pattern, lambda m: replacement, content, flags=re.DOTALL)
+
+    CodeGenerator.save_with_preserve(dst_path, content)
+
+
+def _copy_layer_header(project_path, layer):
+    """自动添加 bsp.h / component.h 等层级总头文件"""
+    src = os.path.join(CodeGenerator.get_assets_dir(f"User_code/{layer}"), f"{layer}.h")
+    dst = os.path.join(project_path, f"User/{layer}/{layer}.h")
+    os.makedirs(os.path.dirname(dst), exist_ok=True)
+    if os.path.exists(src):
+        CodeGenerator.save_with_preserve(dst, CodeGenerator.load_template(src))
+
+
+def _format_summary(summary, prefix=""):
+    msg = prefix + (
+        f"总共处理 {summary['total']} 项，成功生成 {summary['success']} 项，"
+        f"跳过 {summary['skipped']} 项，失败 {summary['failed']} 项。"
+    )
+    if summary['skipped_list']:
+        msg += f"\n跳过项（文件已存在且未勾选）：\n" + "\n".join(summary['skipped_list'])
+    if summary['fail_list']:
+        msg += "\n失败项：\n" + "\n".join(summary['fail_list'])
+    return msg
+
+
+def _new_summary():
+    return {
+        'total': 0, 'success': 0, 'skipped': 0, 'failed': 0,
+        'skipped_list': [], 'fail_list': [], 'message': ''
+    }
+
+
+def run_bsp_jobs(project_path, jobs):
+    """
+    执行BSP生成任务
+    jobs: [{'name': 名称, 'enabled': 是否启用, 'run': 生成函数}, ...]
+    返回统计结果，'message' 为可读的汇总信息
+    """
+    _copy_layer_header(project_path, "bsp")
+
+    summary = _new_summary()
+    for job in jobs:
+        if not job['enabled']:
+            # 未启用的项只统计"文件已存在"的跳过情况
+            try:
+                if job['run']() == "skipped":
+                    summary['total'] += 1
+                    summary['skipped'] += 1
+                    summary['skipped_list'].append(job['name'])
+            except Exception:
+                pass  # 忽略未勾选项的错误
+            continue
+
+        summary['total'] += 1
+        try:
+            result = job['run']()
+            if result == "skipped":
+                summary['skipped'] += 1
+                summary['skipped_list'].append(job['name'])
+            elif result:
+                summary['success'] += 1
+            else:
+                summary['failed'] += 1
+                summary['fail_list'].append(job['name'])
+        except Exception as e:
+            summary['failed'] += 1
+            summary['fail_list'].append(f"{job['name']} (异常: {e})")
+
+    summary['message'] = _format_summary(summary)
+    return summary
+
+
+def run_component_jobs(project_path, jobs):
+    """
+    执行组件生成任务，处理依赖关系
+    jobs: [{'name': 组件名, 'enabled': 是否启用, 'run': 生成函数, 'dependencies': 依赖列表}, ...]
+    """
+    _copy_layer_header(project_path, "component")
+
+    summary = _new_summary()
+
+    # 收集所有需要生成的组件和它们的依赖，依赖格式是路径形式如 "component/filter"
+    components_to_generate = {}
+    enabled_jobs = {}
+    for job in jobs:
+        if not job['enabled']:
+            continue
+        comp_name = job['name'].lower()
+        components_to_generate[comp_name] = True
+        enabled_jobs[comp_name] = job
+        for dep_path in job.get('dependencies', []):
+            # 跳过BSP层依赖
+            if dep_path.startswith('bsp/'):
+                continue
+            dep_name = os.path.basename(dep_path)
+            # 只有不包含文件扩展名的才是组件，有扩展名的是文件依赖
+            if not dep_name.endswith(('.h', '.c', '.hpp', '.cpp')):
+                components_to_generate[dep_name] = True
+
+    if not components_to_generate:
+        summary['message'] = "没有启用的组件需要生成代码。"
+        return summary
+
+    # 检查缺失的依赖组件
+    missing_dependencies = [name for name in components_to_generate if name not in enabled_jobs]
+    summary['missing_dependencies'] = missing_dependencies
+    if missing_dependencies:
+        missing_msg = f"警告：以下依赖组件未启用，可能导致编译错误：{', '.join(missing_dependencies)}\n请在组件配置中启用这些依赖组件。\n\n"
+    else:
+        missing_msg = ""
+
+    for comp_name in components_to_generate:
+        job = enabled_jobs.get(comp_name)
+        if job is None:
+            continue
+        try:
+            result = job['run']()
+            if result == "skipped":
+                summary['skipped'] += 1
+                summary['skipped_list'].append(comp_name)
+                print(f"跳过组件生成: {comp_name}")
+            elif result:
+                summary['success'] += 1
+                print(f"成功生成组件: {comp_name}")
+            else:
+                summary['failed'] += 1
+                summary['fail_list'].append(f"{comp_name} (生成失败)")
+                print(f"生成组件失败: {comp_name}")
+        except Exception as e:
+            summary['failed'] += 1
+            summary['fail_list'].append(f"{comp_name} (生成异常: {e})")
+            print(f"生成组件异常: {comp_name}, 错误: {e}")
+
+    summary['total'] = len(components_to_generate)
+    summary['message'] = _format_summary(summary, missing_msg + "组件代码生成完成：")
+    return summary
+
+
+def run_device_jobs(project_path, jobs):
+    """
+    执行设备生成任务，最后生成 device.h
+    jobs: [{'name': 设备名, 'enabled': 是否启用, 'run': 生成函数}, ...]
+    """
+    summary = _new_summary()
+    enabled_devices = []
+
+    for job in jobs:
+        if not job['enabled']:
+            try:
+                if job['run']() == "skipped":
+                    summary['skipped'] += 1
+                    summary['skipped_list'].append(job['name'])
+            except Exception:
+                pass  # 忽略未勾选项的错误
+            continue
+        try:
+            result = job['run']()
+            if result == "skipped":
+                summary['skipped'] += 1
+                summary['skipped_list'].append(job['name'])
+            elif result:
+                summary['success'] += 1
+                enabled_devices.append(job['name'])
+            else:
+                summary['failed'] += 1
+                summary['fail_list'].append(job['name'])
+        except Exception as e:
+            summary['failed'] += 1
+            summary['fail_list'].append(f"{job['name']} (异常: {e})")
+
+    # 生成device.h文件
+    try:
+        generate_device_header(project_path, enabled_devices)
+        summary['success'] += 1
+    except Exception as e:
+        summary['failed'] += 1
+        summary['fail_list'].append(f"device.h (异常: {e})")
+
+    summary['total'] = summary['success'] + summary['failed'] + summary['skipped']
+    summary['message'] = _format_summary(summary, "设备代码生成完成：")
+    return summary
+
+
+# ---------------------------------------------------------------- Task
+
+def _render_template(template_path, context):
+    from jinja2 import Template
+    return Template(CodeGenerator.load_template(template_path)).render(**context)
+
+
+def generate_task_code(project_path, task_list):
+    """根据任务列表生成 User/task 下的任务代码，并保存 User/task/config.yaml"""
+    template_dir = CodeGenerator.get_assets_dir("User_code/task")
+    output_dir = os.path.join(project_path, "User", "task")
+    os.makedirs(output_dir, exist_ok=True)
+
+    user_task_h_tpl = os.path.join(template_dir, "user_task.h.template")
+    user_task_c_tpl = os.path.join(template_dir, "user_task.c.template")
+    init_c_tpl = os.path.join(template_dir, "init.c.template")
+    task_c_tpl = os.path.join(template_dir, "task.c.template")
+
+    freq_tasks = [t for t in task_list if t.get("freq_control", True)]
+
+    context_h = {
+        "thread_definitions": "\n".join([f"        osThreadId_t {t['name']};" for t in task_list]),
+        "freq_definitions": "\n".join([f"        float {t['name']};" for t in freq_tasks]),
+        "stack_definitions": "\n".join([f"        UBaseType_t {t['name']};" for t in task_list]),
+        "last_up_time_definitions": "\n".join([f"        float {t['name']};" for t in freq_tasks]),
+        "task_frequency_definitions": "\n".join([f"#define {t['name'].upper()}_FREQ ({t['frequency']})" for t in freq_tasks]),
+        "task_init_delay_definitions": "\n".join([f"#define {t['name'].upper()}_INIT_DELAY ({t['delay']})" for t in task_list]),
+        "task_attr_declarations": "\n".join([f"extern const osThreadAttr_t attr_{t['name']};" for t in task_list]),
+        "task_function_declarations": "\n".join([f"void {t['function']}(void *argument);" for t in task_list]),
+    }
+    CodeGenerator.save_with_preserve(
+        os.path.join(output_dir, "user_task.h"), _render_template(user_task_h_tpl, context_h)
+    )
+
+    context_c = {
+        "task_attr_definitions": "\n".join([
+            f"const osThreadAttr_t attr_{t['name']} = {{\n"
+            f"    .name = \"{t['name']}\",\n"
+            f"    .priority = osPriorityNormal,\n"
+            f"    .stack_size = {t['stack']} * 4,\n"
+            f"}};"
+            for t in task_list
+        ])
+    }
+    CodeGenerator.save_with_preserve(
+        os.path.join(output_dir, "user_task.c"), _render_template(user_task_c_tpl, context_c)
+    )
+
+    thread_creation_code = "\n".join([
+        f"  task_runtime.thread.{t['name']} = osThreadNew({t['function']}, NULL, &attr_{t['name']});"
+        for t in task_list
+    ])
+    CodeGenerator.save_with_preserve(
+        os.path.join(output_dir, "init.c"),
+        _render_template(init_c_tpl, {"thread_creation_code": thread_creation_code})
+    )
+
+    task_template_dir = CodeGenerator.get_assets_dir("User_code/task/template_task")
+    for t in task_list:
+        task_c_path = os.path.join(output_dir, f"{t['name']}.c")
+
+        # 预设任务直接使用预设代码
+        if t.get("preset_task"):
+            preset_task_name = t["preset_task"]
+            preset_task_file = os.path.join(task_template_dir, f"{preset_task_name}.c")
+            if os.path.exists(preset_task_file):
+                preset_code = CodeGenerator.load_template(preset_task_file)
+                # 如果任务名称不同，需要替换函数名
+                if preset_task_name != t["name"]:
+                    preset_code = preset_code.replace(f"Task_{preset_task_name}", t["function"])
+                    preset_code = preset_code.replace(f"    {preset_task_name} Task", f"    {t['name']} Task")
+                CodeGenerator.save_with_preserve(task_c_path, preset_code)
+                continue
+
+        # 使用默认模板生成任务代码
+        desc = t.get("description", "")
+        context_task = {
+            "task_name": t["name"],
+            "task_function": t["function"],
+            "task_frequency": f"{t['name'].upper()}_FREQ" if t.get("freq_control", True) else None,
+            "task_delay": f"{t['name'].upper()}_INIT_DELAY",
+            "task_description": "\n    ".join(textwrap.wrap(desc, 20)),
+            "freq_control": t.get("freq_control", True)
+        }
+        CodeGenerator.save_with_preserve(task_c_path, _render_template(task_c_tpl, context_task))
+
+    ProjectConfigStore.for_project(project_path).set('task', task_list)
+    return True
+
+
+def run_task_jobs(project_path, track=None):
+    """
+    按 User/task/config.yaml 重新生成任务代码，未配置任务时跳过
+    track: 可选的包装函数 track(key, section, run)，用于增量生成
+    """
+    summary = _new_summary()
+    task_list = ProjectConfigStore.for_project(project_path).get('task')
+
+    if task_list:
+        run = partial(generate_task_code, project_path, task_list)
+        if track is not None:
+            run = track("task", task_list, run)
+        try:
+            if not run():
+                raise RuntimeError("生成失败")
+            summary['success'] += len(task_list)
+        except Exception as e:
+            summary['failed'] += len(task_list)
+            summary['fail_list'].append(f"task (异常: {e})")
+
+    summary['total'] = summary['success'] + summary['failed'] + summary['skipped']
+    summary['message'] = _format_summary(summary, "任务代码生成完成：")
+    return summary
+
+
+class ProjectGenerator:
+    """
+    单个项目的完整生成流程（BSP -> Component -> Device）
+    配置来自项目中的 YAML 文件；界面中已打开的页面可通过 pages 传入，
+    以页面当前状态为准，其余项目直接由 YAML 驱动，无需创建界面
+    incremental 为 True 时按 User/.mrobot_manifest.json 跳过输入与输出都未变化的任务
+    """
+
+    def __init__(self, project_path, incremental=True):
+        self.project_path = os.path.abspath(project_path)
+        self.incremental = incremental
+        self.manifest = None
+        # 最近一次 generate 的输出文件统计
+        # {'written': 写入数, 'unchanged': 内容未变化数, 'up_to_date': 输入未变化而跳过的任务数}
+        self.file_stats = {'written': 0, 'unchanged': 0, 'up_to_date': 0}
+        self.up_to_date = []
+
+    def _load_sections(self, kind):
+        return ProjectConfigStore.for_project(self.project_path).get(kind)
+
+    def _tracked(self, key, section, run, ioc_groups=()):
+        """包装生成函数：输入未变化时直接返回成功，否则执行并记录到清单"""
+        manifest = self.manifest
+        if manifest is None:
+            return run
+
+        def wrapped():
+            if manifest.is_up_to_date(key, section, ioc_groups):
+                self.up_to_date.append(key)
+                return True
+            with CodeGenerator.recording() as record:
+                result = run()
+            if result is True:
+                manifest.record(key, section, ioc_groups, record)
+            else:
+                manifest.forget(key)
+            return result
+        return wrapped
+
+    def build_jobs(self, pages=None):
+        """
+        根据 config.csv 目录构建生成任务
+        pages: {页面类名: 页面对象}，如 {'bsp_can': <bsp_can>}，页面需提供 generator、get_config_section、
+        is_need_generate 与 _generate_bsp_code_internal / _generate_component_code_internal / _generate_device_code_internal
+        """
+        pages = pages or {}
+        bsp_sections = self._load_sections('bsp')
+        component_sections = self._load_sections('component')
+        device_sections = self._load_sections('device')
+        component_dependencies = None
+        device_configs = None
+
+        jobs = {'bsp': [], 'component': [], 'device': []}
+        for main_title, sub in load_code_catalog():
+            key = f"{main_title}_{sub}"
+            page = pages.get(key)
+            if main_title == 'bsp':
+                if page is not None and hasattr(page, '_generate_bsp_code_internal'):
+                    generator = page.generator
+                    section = page.get_config_section()
+                    name, enabled, run = page.__class__.__name__, page.is_need_generate(), page._generate_bsp_code_internal
+                else:
+                    generator = get_bsp_generator(sub, self.project_path)
+                    section = bsp_sections.get(generator.yaml_key)
+                    name, enabled, run = key, generator.is_enabled(section), partial(generator.generate, section)
+                if enabled:
+                    run = self._tracked(key, section, run, generator.ioc_groups)
+                jobs['bsp'].append({'name': name, 'enabled': enabled, 'run': run})
+            elif main_title == 'component':
+                if page is not None and hasattr(page, '_generate_component_code_internal'):
+                    section = page.get_config_section()
+                    name, enabled, run = page.component_name, page.is_need_generate(), page._generate_component_code_internal
+                    dependencies = page.get_enabled_dependencies()
+                else:
+                    if component_dependencies is None:
+                        dependencies_path = os.path.join(
+                            CodeGenerator.get_assets_dir("User_code/component"), "dependencies.csv"
+                        )
+                        component_dependencies = CodeGenerator.load_dependencies(dependencies_path)
+                    generator = get_component_generator(sub, self.project_path, component_dependencies)
+                    section = component_sections.get(sub.lower())
+                    name, enabled, run = sub, generator.is_enabled(section), partial(generator.generate, section)
+                    dependencies = generator.dependencies if enabled else []
+                if enabled:
+                    run = self._tracked(key, section, run)
+                jobs['component'].append({'name': name, 'enabled': enabled, 'run': run, 'dependencies': dependencies})
+            elif main_title == 'device':
+                if page is not None and hasattr(page, '_generate_device_code_internal'):
+                    section = page.get_config_section()
+                    name, enabled, run = page.device_name, page.is_need_generate(), page._generate_device_code_internal
+                else:
+                    if device_configs is None:
+                        device_configs = load_device_configs()
+                    generator = DeviceGenerator(self.project_path, sub, get_device_definition(sub, device_configs))
+                    section = device_sections.get(sub.lower())
+                    name, enabled, run = sub, generator.is_enabled(section), partial(generator.generate, section)
+                if enabled:
+                    run = self._tracked(key, section, run)
+                jobs['device'].append({'name': name, 'enabled': enabled, 'run': run})
+        return jobs
+
+    def generate(self, pages=None, include_tasks=False):
+        """
+        执行完整生成流程
+        include_tasks: 同时按 User/task/config.yaml 重新生成任务代码
+        返回格式: {'bsp': 统计结果, 'component': 统计结果, 'device': 统计结果[, 'task': 统计结果]}
+        """
+        CodeGenerator.reset_write_stats()
+        self.up_to_date = []
+        self.manifest = GenerationManifest(self.project_path) if self.incremental else None
+        # 各生成器对配置段的修改先留在内存中，结束时每个配置文件最多写一次
+        with ProjectConfigStore.for_project(self.project_path).batch():
+            jobs = self.build_jobs(pages)
+            results = {
+                'bsp': run_bsp_jobs(self.project_path, jobs['bsp']),
+                'component': run_component_jobs(self.project_path, jobs['component']),
+                'device': run_device_jobs(self.project_path, jobs['device']),
+            }
+            if include_tasks:
+                results['task'] = run_task_jobs(self.project_path, self._tracked)
+        if self.manifest is not None:
+            self.manifest.save()
+        self.file_stats = CodeGenerator.get_write_stats()
+        self.file_stats['up_to_date'] = len(self.up_to_date)
+        return results
+
+    @staticmethod
+    def format_results(results):
+        text = (
+            f"BSP代码生成:\n{results['bsp']['message']}\n\n"
+            f"Component代码生成:\n{results['component']['message']}\n\n"
+            f"Device代码生成:\n{results['device']['message']}"
+        )
+        if 'task' in results:
+            text += f"\n\nTask代码生成:\n{results['task']['message']}"
+        return text
+
+    @staticmethod
+    def format_file_stats(file_stats):
+        text = f"输出文件：写入 {file_stats['written']} 个，内容未变化 {file_stats['unchanged']} 个"
+        if file_stats.get('up_to_date'):
+            text += f"；{file_stats['up_to_date']} 项输入未变化，已跳过"
+        return text
+
+
+# ---------------------------------------------------------------- 批量生成
+
+def _init_batch_worker(assets_dir, template_cache):
+    """工作进程初始化：复用主进程解析好的 assets 路径与只读模板缓存"""
+    CodeGenerator._assets_dir_cache = assets_dir
+    CodeGenerator._assets_dir_initialized = True
+    CodeGenerator.use_template_cache(template_cache)
+
+
+def generate_project(project_path, include_tasks=True, incremental=True):
+    """
+    生成单个项目并计时，生成过程中的打印输出收集到 log 中
+    返回格式: {'project', 'elapsed', 'results', 'files', 'error', 'log'}
+    """
+    log = io.StringIO()
+    report = {
+        'project': project_path, 'elapsed': 0.0, 'results': None,
+        'files': {'written': 0, 'unchanged': 0, 'up_to_date': 0}, 'error': None, 'log': ''
+    }
+    start = time.perf_counter()
+    generator = ProjectGenerator(project_path, incremental)
+    try:
+        with contextlib.redirect_stdout(log):
+            report['results'] = generator.generate(include_tasks=include_tasks)
+        report['files'] = generator.file_stats
+    except Exception as e:
+        report['error'] = str(e)
+    report['elapsed'] = time.perf_counter() - start
+    report['log'] = log.getvalue()
+    return report
+
+
+def project_failed(report):
+    if report['error'] is not None:
+        return True
+    return any(result['failed'] for result in report['results'].values())
+
+
+def generate_projects(project_paths, jobs=None, include_tasks=True, incremental=True):
+    """
+    多进程批量生成多个项目
+    模板在主进程中只读取一次，通过进程池初始化参数共享给所有工作进程
+    jobs: 进程数，默认取 CPU 核数与项目数中的较小值
+    返回每个项目的报告列表（顺序与 project_paths 一致）
+    """
+    if not project_paths:
+        return []
+    assets_dir = CodeGenerator.get_assets_dir()
+    template_cache = CodeGenerator.preload_templates()
+    jobs = max(1, min(jobs or os.cpu_count() or 1, len(project_paths)))
+
+    if jobs == 1:
+        previous_cache = CodeGenerator._template_cache
+        CodeGenerator.use_template_cache(template_cache)
+        try:
+            return [generate_project(path, include_tasks, incremental) for path in project_paths]
+        finally:
+            CodeGenerator.use_template_cache(previous_cache)
+
+    with ProcessPoolExecutor(
+        max_workers=jobs,
+        initializer=_init_batch_worker,
+        initargs=(assets_dir, template_cache)
+    ) as executor:
+        futures = [executor.submit(generate_project, path, include_tasks, incremental) for path in project_paths]
+        return [future.result() for future in futures]
+
+
+def format_batch_report(reports, wall_time=None):
+    """每个项目一行: 耗时、各层 成功/跳过/失败 数与状态"""
+    lines = []
+    for report in reports:
+        status = "失败" if project_failed(report) else "成功"
+        if report['error'] is not None:
+            detail = f"异常: {report['error']}"
+        else:
+            detail = "  ".join(
+                f"{key}:{result['success']}/{result['skipped']}/{result['failed']}"
+                for key, result in report['results'].items()
+            )
+            files = report['files']
+            detail += f"  写入:{files['written']} 未变化:{files['unchanged']} 增量跳过:{files['up_to_date']}"
+        lines.append(f"[{status}] {report['project']}  {report['elapsed']:.2f}s  {detail}")
+    failed = sum(1 for report in reports if project_failed(report))
+    total = f"共 {len(reports)} 个项目，成功 {len(reports) - failed} 个，失败 {failed} 个"
+    if wall_time is not None:
+        total += f"，总耗时 {wall_time:.2f}s"
+    lines.append(total + "（各层统计格式: 成功/跳过/失败）")
+    return "\n".join(lines)
+
+
+def main(argv=None, cwd=None):
+    """
+    命令行入口:
+        python MRobot.py generate --project <项目目录>
+        python MRobot.py generate --project <目录1> --project <目录2> ... [--jobs N]
+    """
+    parser = argparse.ArgumentParser(prog="MRobot.py generate", description="根据项目中的YAML配置生成代码（无界面）")
+    parser.add_argument("--project", required=True, action="append",
+                        help="STM32CubeMX 项目目录（包含 .ioc 与 User/ 配置），可重复指定以批量生成")
+    parser.add_argument("--jobs", "-j", type=int, default=None, help="批量生成时的进程数，默认为CPU核数")
+    parser.add_argument("--no-task", action="store_true", help="不重新生成 User/task 下的任务代码")
+    parser.add_argument("--verbose", "-v", action="store_true", help="批量生成时输出每个项目的详细日志")
+    parser.add_argument("--force", action="store_true", help="忽略增量生成清单，全部重新生成")
+    args = parser.parse_args(argv)
+
+    project_paths = [os.path.join(cwd or os.getcwd(), path) for path in args.project]
+    missing = [path for path in project_paths if not os.path.isdir(path)]
+    if missing:
+        for path in missing:
+            print(f"项目目录不存在: {path}", file=sys.stderr)
+        return 2
+
+    start = time.perf_counter()
+    reports = generate_projects(project_paths, args.jobs, include_tasks=not args.no_task, incremental=not args.force)
+    wall_time = time.perf_counter() - start
+
+    for report in reports:
+        # 单个项目或失败的项目输出完整日志与统计
+        if len(reports) == 1 or args.verbose or project_failed(report):
+            print(f"===== {report['project']} =====")
+            print(report['log'], end="")
+            if report['results'] is not None:
+                print(ProjectGenerator.format_results(report['results']))
+                print(ProjectGenerator.format_file_stats(report['files']))
+            print()
+    print(format_batch_report(reports, wall_time))
+    return 1 if any(project_failed(report) for report in reports) else 0
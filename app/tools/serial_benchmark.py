@@ -0,0 +1,285 @@
+"""
+串口接收性能基准
+
+用伪终端（pty）模拟下位机：写端按设定波特率（8N1，每字节 10 bit）匀速写入合成遥测数据，
+读端用 pyserial 打开，数据经过与界面相同的接收流程：
+    SerialReceiver（SerialReadThread 中运行的接收循环：多路复用读取、文本格式化）
+    -> 界面线程：LogBuffer 追加（display_data）、SerialSession.feed（auto_parse_data 的解码与写入 ChannelStore）
+    -> 图表定时器：ChannelStore.decimate（update_charts 的抽取）
+界面线程用普通线程加队列代替 Qt 的跨线程信号，不需要显示器与 PyQt5。
+
+每个采样的第 1 个通道是序号，据此统计丢失的采样与端到端延迟（写入 pty 到解析进 ChannelStore）。
+pty 写满时与真实串口溢出一样丢弃数据，读端处理不过来会体现为丢失的采样。
+
+命令行:
+    python MRobot.py bench-serial [--format text justfloat binary] [--baud 921600 4000000]
+                                  [--channels 4 16] [--duration 3] [--json]
+"""
+import argparse
+import io
+import json
+import os
+import queue
+import sys
+import threading
+import time
+
+import numpy as np
+
+from app.tools.serial_decoders import (
+    CRC_TYPES, JUSTFLOAT_TAIL, BinaryFrameDecoder, JustFloatDecoder, TextLineDecoder, make_frame_spec
+)
+from app.tools.serial_format import DisplaySettings
+from app.tools.serial_log import LogBuffer
+from app.tools.serial_mux import SerialReceiver
+from app.tools.serial_reader import SerialReader
+from app.tools.serial_session import SerialSession
+
+FORMATS = ('text', 'justfloat', 'binary')
+FRAME_HEADER = b'\xa5\x5a'
+CHART_INTERVAL = 0.05   # 与界面的图表定时器一致
+CHART_WIDTH = 1000      # 抽取的目标像素宽度
+WRITE_INTERVAL = 0.001  # 写端节拍
+SETTLE_TIME = 0.3       # 写完后等待接收端处理完剩余数据的静默时间
+
+
+def make_samples(count, channels):
+    """合成采样 shape=(count, channels)：第 1 个通道为序号，其余为不同频率的正弦"""
+    index = np.arange(count)
+    samples = np.empty((count, channels), dtype=np.float32)
+    samples[:, 0] = index
+    if channels > 1:
+        samples[:, 1:] = np.sin(index[:, None] * 0.01 * np.arange(1, channels)) * 100
+    return samples
+
+
+def frame_spec(channels):
+    return make_frame_spec(FRAME_HEADER, f'<{channels}f', None, 'crc16')
+
+
+def encode_samples(samples, data_format):
+    """按格式编码采样，返回 (字节流, 每个采样结束位置)"""
+    count, channels = samples.shape
+    if data_format == 'text':
+        buffer = io.BytesIO()
+        np.savetxt(buffer, samples, fmt=['%d'] + ['%.3f'] * (channels - 1), delimiter=',')
+        data = buffer.getvalue()
+        newlines = np.flatnonzero(np.frombuffer(data, dtype=np.uint8) == ord('\n'))
+        return data, newlines + 1
+
+    payload = samples.astype('<f4').view(np.uint8).reshape(count, channels * 4)
+    if data_format == 'justfloat':
+        frames = np.empty((count, channels * 4 + len(JUSTFLOAT_TAIL)), dtype=np.uint8)
+        frames[:, :channels * 4] = payload
+        frames[:, channels * 4:] = np.frombuffer(JUSTFLOAT_TAIL, dtype=np.uint8)
+    elif data_format == 'binary':
+        crc_size, crc_rows = CRC_TYPES['crc16']
+        body = len(FRAME_HEADER) + channels * 4
+        frames = np.empty((count, body + crc_size), dtype=np.uint8)
+        frames[:, :len(FRAME_HEADER)] = np.frombuffer(FRAME_HEADER, dtype=np.uint8)
+        frames[:, len(FRAME_HEADER):body] = payload
+        frames[:, body:] = crc_rows(frames[:, :body]).astype('<u2').view(np.uint8).reshape(count, crc_size)
+    else:
+        raise ValueError(f"未知的数据格式: {data_format}")
+    return frames.tobytes(), np.arange(1, count + 1) * frames.shape[1]
+
+
+def make_decoder(data_format, channels):
+    if data_format == 'text':
+        return TextLineDecoder()
+    if data_format == 'justfloat':
+        return JustFloatDecoder()
+    return BinaryFrameDecoder(frame_spec(channels))
+
+
+def _open_pty():
+    import pty
+    import tty
+    import serial
+    master, slave = pty.openpty()
+    tty.setraw(slave)
+    ser = serial.Serial(os.ttyname(slave), 115200, timeout=0.1)  # pty 不限速，写端自行按波特率节拍
+    os.close(slave)
+    os.set_blocking(master, False)
+    return master, ser
+
+
+def run_benchmark(data_format='text', baud=921600, channels=8, duration=3.0, display=None):
+    """
+    运行一组基准，返回结果字典
+    display: 接收区显示设置，默认与界面默认值相同（HEX + 时间戳）
+    """
+    byte_rate = baud / 10.0
+    probe, probe_ends = encode_samples(make_samples(256, channels), data_format)
+    count = max(int(duration * byte_rate / (len(probe) / len(probe_ends))), 1)
+    data, ends = encode_samples(make_samples(count, channels), data_format)
+
+    master, ser = _open_pty()
+    session = SerialSession('bench', ser, SerialReader(ser), make_decoder(data_format, channels))
+    send_times = np.full(count, np.nan)
+    recv_times = np.full(count, np.nan)
+    events = queue.SimpleQueue()
+    receiver = SerialReceiver(
+        display or DisplaySettings(hex_mode=True, timestamp=True),
+        on_raw=lambda name, raw: events.put(('raw', raw)),
+        on_text=lambda name, text: events.put(('text', text)),
+    )
+    receiver.add_source(session.name, session.reader)
+    cpu = {}
+    chart_times = []
+    log = LogBuffer()
+
+    def receive_thread():
+        receiver.run()
+        cpu['receiver'] = time.thread_time()
+
+    def ui_thread():
+        # 模拟界面线程：处理接收线程的信号，并按图表定时器节拍抽取
+        store = session.store
+        next_chart = time.perf_counter() + CHART_INTERVAL
+        while True:
+            try:
+                kind, payload = events.get(timeout=max(0.0, next_chart - time.perf_counter()))
+            except queue.Empty:
+                kind = payload = None
+            if kind == 'stop':
+                break
+            if kind == 'raw':
+                before = store.total
+                session.feed(payload)
+                new = min(store.total - before, len(store))
+                if new:
+                    seq = store.channel(0)[-new:].astype(np.int64)
+                    seq = seq[(seq >= 0) & (seq < count)]
+                    recv_times[seq] = time.perf_counter()
+            elif kind == 'text':
+                log.append(payload)
+            now = time.perf_counter()
+            if now >= next_chart:
+                store.decimate(CHART_WIDTH)
+                chart_times.append(time.perf_counter() - now)
+                next_chart = now + CHART_INTERVAL
+        cpu['ui'] = time.thread_time()
+
+    threads = [threading.Thread(target=receive_thread), threading.Thread(target=ui_thread)]
+    for thread in threads:
+        thread.start()
+
+    # 写端：按波特率匀速写入，pty 写满时丢弃（模拟串口溢出）
+    view = memoryview(data)
+    overrun = 0
+    pos = sent = 0
+    start = time.perf_counter()
+    while pos < len(data):
+        now = time.perf_counter()
+        target = min(len(data), int((now - start) * byte_rate))
+        if target > pos:
+            write_time = time.perf_counter()
+            try:
+                written = os.write(master, view[pos:target])
+            except BlockingIOError:
+                written = 0
+            overrun += target - pos - written
+            pos = target
+            done = int(np.searchsorted(ends, pos, side='right'))
+            send_times[sent:done] = write_time
+            sent = done
+        time.sleep(WRITE_INTERVAL)
+    send_time = time.perf_counter() - start
+
+    # 等待接收端处理完剩余数据
+    last_total, last_change = -1, time.perf_counter()
+    while time.perf_counter() - last_change < SETTLE_TIME:
+        if session.store.total != last_total:
+            last_total, last_change = session.store.total, time.perf_counter()
+        time.sleep(0.01)
+    receiver.stop()
+    threads[0].join()
+    events.put(('stop', None))
+    threads[1].join()
+    receiver.close()
+    ser.close()
+    os.close(master)
+
+    received = ~np.isnan(recv_times)
+    latency = (recv_times[received] - send_times[received]) * 1000
+    percentiles = np.percentile(latency, [50, 90, 99]) if latency.size else [np.nan] * 3
+    return {
+        'format': data_format,
+        'baud': baud,
+        'channels': channels,
+        'samples': count,
+        'bytes': len(data),
+        'target_bytes_per_sec': byte_rate,
+        'bytes_per_sec': session.reader.stats.total_bytes / send_time,
+        'overrun_bytes': overrun,
+        'dropped_samples': int(count - received.sum()),
+        'latency_p50_ms': float(percentiles[0]),
+        'latency_p90_ms': float(percentiles[1]),
+        'latency_p99_ms': float(percentiles[2]),
+        'latency_max_ms': float(latency.max()) if latency.size else float('nan'),
+        'receiver_cpu': cpu.get('receiver', 0.0) / send_time,
+        'ui_cpu': cpu.get('ui', 0.0) / send_time,
+        'chart_ms': float(np.mean(chart_times) * 1000) if chart_times else 0.0,
+        'log_lines': log.end_line,
+    }
+
+
+RESULT_HEADER = (
+    f"{'format':<10}{'baud':>9}{'ch':>4}{'samples':>9}{'KB/s':>9}{'drop':>7}"
+    f"{'p50ms':>8}{'p90ms':>8}{'p99ms':>8}{'maxms':>8}{'rx_cpu':>8}{'ui_cpu':>8}{'chart_ms':>9}"
+)
+
+
+def format_result(r):
+    """一组结果格式化为一行，列与 RESULT_HEADER 对应"""
+    return (
+        f"{r['format']:<10}{r['baud']:>9}{r['channels']:>4}{r['samples']:>9}"
+        f"{r['bytes_per_sec'] / 1024:>9.1f}{r['dropped_samples']:>7}"
+        f"{r['latency_p50_ms']:>8.2f}{r['latency_p90_ms']:>8.2f}{r['latency_p99_ms']:>8.2f}"
+        f"{r['latency_max_ms']:>8.2f}{r['receiver_cpu']:>8.1%}{r['ui_cpu']:>8.1%}{r['chart_ms']:>9.2f}"
+    )
+
+
+def main(argv=None):
+    """
+    命令行入口:
+        python MRobot.py bench-serial --format text binary --baud 921600 4000000 --channels 4 16
+    有丢失的采样或 p99 延迟超过 --max-p99 时返回 1，可用于发现接收流程的性能回退
+    """
+    parser = argparse.ArgumentParser(prog="MRobot.py bench-serial", description="串口接收流程性能基准（基于 pty，无界面）")
+    parser.add_argument("--format", nargs="+", choices=FORMATS, default=['text', 'binary'], help="遥测数据格式")
+    parser.add_argument("--baud", nargs="+", type=int, default=[921600], help="模拟的波特率（8N1）")
+    parser.add_argument("--channels", nargs="+", type=int, default=[8], help="通道数")
+    parser.add_argument("--duration", type=float, default=3.0, help="每组基准的发送时长(s)")
+    parser.add_argument("--display", choices=['hex', 'text'], default='hex', help="接收区显示方式")
+    parser.add_argument("--max-p99", type=float, default=None, help="p99 端到端延迟上限(ms)")
+    parser.add_argument("--json", action="store_true", help="以 JSON 输出结果")
+    args = parser.parse_args(argv)
+
+    if os.name != 'posix':
+        print("串口基准需要 pty，仅支持 Linux/macOS", file=sys.stderr)
+        return 2
+
+    display = DisplaySettings(hex_mode=args.display == 'hex', timestamp=True)
+    if not args.json:
+        print(RESULT_HEADER)
+    results = []
+    for data_format in args.format:
+        for baud in args.baud:
+            for channels in args.channels:
+                result = run_benchmark(data_format, baud, channels, args.duration, display)
+                results.append(result)
+                if not args.json:
+                    print(format_result(result), flush=True)
+
+    if args.json:
+        print(json.dumps(results, ensure_ascii=False, indent=2))
+
+    failed = [r for r in results if r['dropped_samples']
+              or (args.max_p99 is not None and r['latency_p99_ms'] > args.max_p99)]
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,366 @@
+"""
+串口数据录制与回放
+
+录制文件（*.mrcap）只追加写入：
+    文件头:  MAGIC(8) + 元数据长度 u32 + 元数据 JSON（端口、波特率、开始时间等）
+    数据块:  时间戳 u64（time.monotonic_ns）+ 长度 u32 + 原始字节
+同名的 *.mrcap.idx 为索引文件：MAGIC(8) + 每个数据块一条 (时间戳 u64, 数据块在录制文件中的偏移 u64)。
+
+录制由独立的写线程完成，接收线程只把 (时间戳, 数据) 放入队列；写线程合并后大块写入。
+读取时录制文件用 mmap 映射、索引用 np.memmap 映射，多 GB 的录制也能即时定位、搜索与回放。
+索引缺失或不完整（如录制中途退出）时按数据块头重新扫描生成。
+"""
+import json
+import mmap
+import os
+import queue
+import struct
+import threading
+import time
+
+import numpy as np
+
+from app.tools.serial_reader import RateCounter
+
+CAPTURE_MAGIC = b'MRCAP01\n'
+INDEX_MAGIC = b'MRIDX01\n'
+_META_LEN = struct.Struct('<I')
+_RECORD_HEADER = struct.Struct('<QI')
+_INDEX_ENTRY = struct.Struct('<QQ')
+_INDEX_DTYPE = np.dtype([('t', '<u8'), ('offset', '<u8')])
+INDEX_SUFFIX = '.idx'
+
+
+def index_path(path):
+    return path + INDEX_SUFFIX
+
+
+class CaptureWriter:
+    """
+    录制写入器，write() 可在接收线程中调用（只入队，不做磁盘 IO）
+    flush_bytes: 写线程累计到该大小时写盘；flush_interval: 最长写盘间隔(s)
+    """
+
+    def __init__(self, path, meta=None, flush_bytes=1 << 20, flush_interval=0.5):
+        self.path = path
+        self.flush_bytes = flush_bytes
+        self.flush_interval = flush_interval
+        self.records = 0
+        self.bytes = 0
+        self.error = None
+
+        meta = dict(meta or {})
+        meta.setdefault('wall_start_ns', time.time_ns())
+        meta.setdefault('mono_start_ns', time.monotonic_ns())
+        meta_bytes = json.dumps(meta, ensure_ascii=False).encode('utf-8')
+
+        self._file = open(path, 'wb')
+        self._index = open(index_path(path), 'wb')
+        self._file.write(CAPTURE_MAGIC + _META_LEN.pack(len(meta_bytes)) + meta_bytes)
+        self._index.write(INDEX_MAGIC)
+        self._offset = self._file.tell()
+
+        self._queue = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._run, name="CaptureWriter", daemon=True)
+        self._thread.start()
+
+    def write(self, data, t_ns=None):
+        """记录一个数据块，t_ns 默认为当前 time.monotonic_ns()"""
+        if data:
+            self._queue.put((time.monotonic_ns() if t_ns is None else t_ns, bytes(data)))
+
+    def close(self):
+        """写完队列中剩余的数据并关闭文件"""
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        data_buf = bytearray()
+        index_buf = bytearray()
+        last_flush = time.monotonic()
+        closing = False
+        while not closing:
+            try:
+                item = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                item = False
+            # 一次取完队列中已有的数据块
+            while item:
+                t_ns, data = item
+                index_buf += _INDEX_ENTRY.pack(t_ns, self._offset)
+                data_buf += _RECORD_HEADER.pack(t_ns, len(data))
+                data_buf += data
+                self._offset += _RECORD_HEADER.size + len(data)
+                self.records += 1
+                self.bytes += len(data)
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    item = False
+            if item is None:
+                closing = True
+
+            now = time.monotonic()
+            if closing or len(data_buf) >= self.flush_bytes or (data_buf and now - last_flush >= self.flush_interval):
+                self._flush(data_buf, index_buf)
+                last_flush = now
+        self._file.close()
+        self._index.close()
+
+    def _flush(self, data_buf, index_buf):
+        # 先写数据再写索引，中途退出时索引不会指向不存在的数据
+        try:
+            self._file.write(data_buf)
+            self._file.flush()
+            self._index.write(index_buf)
+            self._index.flush()
+        except OSError as e:
+            self.error = e
+            print(f"写入录制文件失败: {self.path}, 错误: {e}")
+        data_buf.clear()
+        index_buf.clear()
+
+
+class CaptureFile:
+    """只读打开的录制文件"""
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'rb')
+        size = os.fstat(self._file.fileno()).st_size
+        if size < len(CAPTURE_MAGIC) + _META_LEN.size:
+            self._file.close()
+            raise ValueError("不是有效的录制文件")
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mmap[:len(CAPTURE_MAGIC)] != CAPTURE_MAGIC:
+            self.close()
+            raise ValueError("不是有效的录制文件")
+        pos = len(CAPTURE_MAGIC)
+        (meta_len,) = _META_LEN.unpack_from(self._mmap, pos)
+        pos += _META_LEN.size
+        self.meta = json.loads(bytes(self._mmap[pos:pos + meta_len]).decode('utf-8'))
+        self._data_start = pos + meta_len
+        self.index = self._load_index()
+        self._stream_offsets = None
+        self.times = self.index['t']
+        self.offsets = self.index['offset']
+
+    def _load_index(self):
+        path = index_path(self.path)
+        size = len(self._mmap)
+        try:
+            with open(path, 'rb') as f:
+                valid = f.read(len(INDEX_MAGIC)) == INDEX_MAGIC
+            count = (os.path.getsize(path) - len(INDEX_MAGIC)) // _INDEX_DTYPE.itemsize if valid else 0
+        except OSError:
+            valid, count = False, 0
+        if not count:
+            return self._save_index(self._scan(self._data_start))
+        index = np.memmap(path, dtype=_INDEX_DTYPE, mode='r', offset=len(INDEX_MAGIC), shape=(count,))
+        # 最后一条索引对应的数据块完整时索引可用；其后还有数据（索引晚于数据写盘）则只补扫尾部
+        last_offset = int(index['offset'][-1])
+        if last_offset + _RECORD_HEADER.size > size:
+            return self._save_index(self._scan(self._data_start))
+        _, length = _RECORD_HEADER.unpack_from(self._mmap, last_offset)
+        end = last_offset + _RECORD_HEADER.size + length
+        if end > size:
+            return self._save_index(self._scan(self._data_start))
+        if end + _RECORD_HEADER.size <= size:
+            rest = self._scan(end)
+            if len(rest):
+                return self._save_index(np.concatenate([index, rest]))
+        return index
+
+    def _scan(self, pos):
+        """从 pos 开始按数据块头扫描，返回完整数据块的索引"""
+        mm = self._mmap
+        size = len(mm)
+        times, offsets = [], []
+        header_size = _RECORD_HEADER.size
+        while pos + header_size <= size:
+            t_ns, length = _RECORD_HEADER.unpack_from(mm, pos)
+            if pos + header_size + length > size:
+                break  # 最后一个数据块不完整
+            times.append(t_ns)
+            offsets.append(pos)
+            pos += header_size + length
+        index = np.empty(len(offsets), dtype=_INDEX_DTYPE)
+        index['t'] = times
+        index['offset'] = offsets
+        return index
+
+    def _save_index(self, index):
+        """把重新扫描得到的索引写回索引文件"""
+        try:
+            with open(index_path(self.path), 'wb') as f:
+                f.write(INDEX_MAGIC)
+                f.write(index.tobytes())
+        except OSError as e:
+            print(f"写入录制索引失败: {self.path}, 错误: {e}")
+        return index
+
+    def close(self):
+        if getattr(self, '_mmap', None) is not None:
+            self._mmap.close()
+            self._mmap = None
+        self._file.close()
+
+    def __len__(self):
+        return len(self.offsets)
+
+    @property
+    def duration_ns(self):
+        return int(self.times[-1] - self.times[0]) if len(self.times) else 0
+
+    def record(self, i):
+        """第 i 个数据块的 (时间戳, 数据 memoryview)，不拷贝"""
+        offset = int(self.offsets[i])
+        t_ns, length = _RECORD_HEADER.unpack_from(self._mmap, offset)
+        start = offset + _RECORD_HEADER.size
+        return t_ns, memoryview(self._mmap)[start:start + length]
+
+    def read_range(self, first, last):
+        """第 first..last-1 个数据块的数据拼接成 bytes"""
+        return b''.join(self.record(i)[1] for i in range(first, last))
+
+    def find_time(self, t_ns):
+        """时间戳 >= t_ns 的第一个数据块"""
+        return int(np.searchsorted(self.times, t_ns, side='left'))
+
+    @property
+    def stream_offsets(self):
+        """每个数据块在数据流（去掉块头后的全部数据）中的起始位置，最后一项为数据总长"""
+        if self._stream_offsets is None:
+            count = len(self)
+            ends = np.empty(count + 1, dtype=np.int64)
+            ends[0] = 0
+            if count:
+                lengths = np.empty(count, dtype=np.int64)
+                lengths[:-1] = np.diff(self.offsets.astype(np.int64)) - _RECORD_HEADER.size
+                lengths[-1] = self.record(count - 1)[1].nbytes
+                np.cumsum(lengths, out=ends[1:])
+            self._stream_offsets = ends
+        return self._stream_offsets
+
+    def locate(self, stream_pos):
+        """数据流位置 -> (数据块序号, 块内偏移)"""
+        starts = self.stream_offsets
+        block = int(np.searchsorted(starts, stream_pos, side='right')) - 1
+        return block, int(stream_pos - starts[block])
+
+    def search(self, pattern, start=0, batch_bytes=8 << 20):
+        """
+        从第 start 个数据块开始查找字节序列（可跨数据块），
+        返回 (数据块序号, 块内偏移)，找不到返回 None
+        """
+        pattern = bytes(pattern)
+        count = len(self)
+        if not pattern or start >= count:
+            return None
+        starts = self.stream_offsets
+        keep = len(pattern) - 1
+        carry = b''
+        first = start
+        while first < count:
+            # 每批约 batch_bytes，前面拼上上一批末尾 len(pattern)-1 个字节以匹配跨批的序列
+            last = int(np.searchsorted(starts, starts[first] + batch_bytes, side='left'))
+            last = min(max(last, first + 1), count)
+            data = carry + self.read_range(first, last)
+            found = data.find(pattern)
+            if found >= 0:
+                return self.locate(int(starts[first]) - len(carry) + found)
+            carry = data[len(data) - keep:] if keep else b''
+            first = last
+        return None
+
+
+class CaptureReplayReader:
+    """
+    回放录制文件，接口与 SerialReader 相同（fd / read(timeout) / poll() / cancel() / stats），
+    因此可以直接交给接收线程，走与实时接收完全相同的格式化与解析流程
+    speed: 回放倍速，0 表示不等待、尽快回放
+    """
+
+    MAX_CHUNK = 1 << 20
+    fd = None  # 没有可 select 的 fd，由多路复用线程按 due_in() 定时 poll()
+
+    def __init__(self, capture, speed=1.0, start=0):
+        self.capture = capture
+        self.speed = speed
+        self.stats = RateCounter()
+        self.position = start
+        self._seek = None
+        self._cancel = threading.Event()
+        self._restart_clock()
+
+    def _restart_clock(self):
+        self._wall_start = time.monotonic_ns()
+        self._capture_start = int(self.capture.times[self.position]) if self.position < len(self.capture) else 0
+
+    def seek(self, index):
+        """跳转到第 index 个数据块（可在其它线程调用）"""
+        self._seek = max(0, min(int(index), len(self.capture)))
+        self._cancel.set()
+
+    def set_speed(self, speed):
+        self._seek = self.position
+        self.speed = speed
+        self._cancel.set()
+
+    def cancel(self):
+        self._cancel.set()
+
+    @property
+    def finished(self):
+        return self.position >= len(self.capture)
+
+    def _apply_seek(self):
+        if self._seek is not None:
+            self.position, self._seek = self._seek, None
+            self._cancel.clear()
+            self._restart_clock()
+
+    def due_in(self):
+        """距离下一个数据块到回放时间的剩余时间(s)，已到期或回放结束时为 0"""
+        self._apply_seek()
+        if self.speed <= 0 or self.finished:
+            return 0.0
+        elapsed = (time.monotonic_ns() - self._wall_start) * self.speed
+        wait = int(self.capture.times[self.position]) - self._capture_start - elapsed
+        return max(0.0, wait / self.speed / 1e9)
+
+    def read(self, timeout=None):
+        """等待到下一个数据块的回放时间（最长 timeout），返回 poll() 的结果"""
+        wait = self.due_in()
+        if wait > 0:
+            if self._cancel.wait(min(wait, 0.1 if timeout is None else timeout)):
+                self._cancel.clear()
+        return self.poll()
+
+    def poll(self):
+        """返回已到回放时间的数据块（拼接），没有到期的数据返回 b''，回放结束返回 None"""
+        self._apply_seek()
+        capture = self.capture
+        count = len(capture)
+        if self.position >= count:
+            return None
+        if self.speed > 0:
+            due_time = self._capture_start + (time.monotonic_ns() - self._wall_start) * self.speed
+            last = int(np.searchsorted(capture.times, due_time, side='right'))
+            if last <= self.position:
+                return b''
+        else:
+            last = count
+
+        # 合并到期的数据块，单次最多 MAX_CHUNK 字节
+        woke = time.perf_counter()
+        first = self.position
+        starts = capture.stream_offsets
+        end = int(np.searchsorted(starts, starts[first] + self.MAX_CHUNK, side='left'))
+        end = max(min(end, last), first + 1)
+        data = capture.read_range(first, end)
+        self.position = end
+        self.stats.add(len(data), time.perf_counter() - woke)
+        return data
@@ -0,0 +1,510 @@
+"""
+波形数据解码
+
+串口数据流 -> 多通道数值（二维数组，每行一个采样，每列一个通道）。
+解码器都是增量的：未接收完整的行/帧留到下一次 feed，调用方可以按任意长度分块输入。
+"""
+import re
+import struct
+import warnings
+
+import numpy as np
+
+
+# ---------------------------------------------------------------- CRC
+# 与 User_code/component/crc8、crc16 模板一致（查表法，低位在前）
+
+def _reflected_table(poly, dtype):
+    table = np.arange(256, dtype=np.uint32)
+    for _ in range(8):
+        table = np.where(table & 1, (table >> 1) ^ poly, table >> 1)
+    return table.astype(dtype)
+
+
+CRC8_INIT = 0xFF
+CRC16_INIT = 0xFFFF
+CRC8_TABLE = _reflected_table(0x8C, np.uint8)      # 多项式 0x31（反射）
+CRC16_TABLE = _reflected_table(0x8408, np.uint16)  # 多项式 0x1021（反射）
+
+
+def crc8(data, crc=CRC8_INIT):
+    """同 CRC8_Calc"""
+    table = CRC8_TABLE
+    for b in data:
+        crc = int(table[crc ^ b])
+    return crc
+
+
+def crc16(data, crc=CRC16_INIT):
+    """同 CRC16_Calc"""
+    table = CRC16_TABLE
+    for b in data:
+        crc = (crc >> 8) ^ int(table[(crc ^ b) & 0xFF])
+    return crc
+
+
+def crc8_rows(frames):
+    """对 shape=(帧数, 长度) 的 uint8 数组逐行计算 CRC8，按列循环、每列对所有帧向量化"""
+    crc = np.full(frames.shape[0], CRC8_INIT, dtype=np.uint8)
+    for column in frames.T:
+        crc = CRC8_TABLE[crc ^ column]
+    return crc
+
+
+def crc16_rows(frames):
+    """对 shape=(帧数, 长度) 的 uint8 数组逐行计算 CRC16"""
+    crc = np.full(frames.shape[0], CRC16_INIT, dtype=np.uint16)
+    for column in frames.T:
+        crc = (crc >> 8) ^ CRC16_TABLE[(crc ^ column) & 0xFF]
+    return crc
+
+
+CRC_TYPES = {
+    # 名称: (校验字节数, 逐行计算函数)，校验值以小端存放在帧尾，覆盖帧头到负载末尾
+    'crc8': (1, crc8_rows),
+    'crc16': (2, crc16_rows),
+}
+
+
+class TextLineDecoder:
+    """
+    文本数值行解码，如 "1.2, 3.4, 5.6\\n"，也兼容 VOFA+ FireWater 的 "名称:1.2,3.4\\n"（前缀忽略）
+    分隔符在会话开始时按 SEPARATORS 顺序检测一次，之后整批行一次性转换为浮点数
+    """
+
+    SEPARATORS = (',', ' ', '\t', ';')
+    MAX_LINE_LENGTH = 4096  # 超过该长度仍未出现换行时丢弃，避免非文本数据无限累积
+    _PREFIX_RE = re.compile(r'^[^\n:]*:', re.MULTILINE)
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.separator = None
+        self.channels = 0
+        self.dropped_lines = 0
+        self._carry = b''
+
+    @classmethod
+    def detect_separator(cls, line):
+        """返回能把该行解析为数值的第一个分隔符，无法解析时返回 None"""
+        for separator in cls.SEPARATORS:
+            parts = [p.strip() for p in line.split(separator) if p.strip()]
+            if not parts:
+                continue
+            try:
+                for p in parts:
+                    float(p)
+            except ValueError:
+                continue
+            return separator
+        return None
+
+    def feed(self, data):
+        """
+        输入新数据，返回本次解析出的完整行 shape=(行数, 通道数) 的 float64 数组
+        通道数以本批最后一个有效行为准，与之不同的行丢弃并计入 dropped_lines
+        """
+        buf = self._carry + data if self._carry else bytes(data)
+        end = buf.rfind(b'\n')
+        if end < 0:
+            self._carry = buf if len(buf) <= self.MAX_LINE_LENGTH else b''
+            return self._empty()
+        self._carry = buf[end + 1:]
+        if len(self._carry) > self.MAX_LINE_LENGTH:
+            self._carry = b''
+
+        text = buf[:end].decode('ascii', errors='ignore')
+        if ':' in text:
+            text = self._PREFIX_RE.sub('', text)
+        if self.separator is None:
+            lines = [line for line in text.split('\n') if line.strip()]
+            for line in lines:
+                self.separator = self.detect_separator(line)
+                if self.separator is not None:
+                    break
+            if self.separator is None:
+                self.dropped_lines += len(lines)
+                return self._empty()
+
+        if self.separator not in (' ', '\t'):
+            text = text.replace(self.separator, ' ')
+        lines = [line for line in text.replace('\r', '').split('\n') if not line.isspace() and line]
+        if not lines:
+            return self._empty()
+
+        counts = np.fromiter(map(len, map(str.split, lines)), dtype=np.intp, count=len(lines))
+        flat = self._parse_floats(' '.join(lines), int(counts.sum()))
+        if flat is None:
+            # 批量转换失败，说明有损坏的行，逐行转换并丢弃损坏的行
+            return self._feed_lines(lines)
+
+        channels = int(counts[-1])
+        valid = counts == channels
+        if not valid.all():
+            self.dropped_lines += int((~valid).sum())
+            flat = flat[np.repeat(valid, counts)]
+        self.channels = channels
+        return flat.reshape(-1, channels)
+
+    @staticmethod
+    def _parse_floats(text, expected):
+        with warnings.catch_warnings():
+            # 旧版 NumPy 遇到非数值时只给出 DeprecationWarning 并返回已解析的部分
+            warnings.simplefilter('ignore', DeprecationWarning)
+            try:
+                values = np.fromstring(text, dtype=np.float64, sep=' ')
+            except ValueError:
+                return None
+        return values if values.size == expected else None
+
+    def _feed_lines(self, lines):
+        rows = []
+        for line in lines:
+            try:
+                rows.append([float(p) for p in line.split()])
+            except ValueError:
+                self.dropped_lines += 1
+        if not rows:
+            return self._empty()
+        channels = len(rows[-1])
+        valid = [row for row in rows if len(row) == channels]
+        self.dropped_lines += len(rows) - len(valid)
+        self.channels = channels
+        return np.array(valid, dtype=np.float64)
+
+    def _empty(self):
+        return np.empty((0, self.channels), dtype=np.float64)
+
+
+# ---------------------------------------------------------------- 二进制帧
+
+def find_pattern(arr, pattern, last=None):
+    """在 uint8 数组中查找字节序列的所有起始位置（只查找 <= last 的位置）"""
+    pattern = np.frombuffer(bytes(pattern), dtype=np.uint8)
+    if last is None:
+        last = arr.size - pattern.size
+    if last < 0:
+        return np.empty(0, dtype=np.intp)
+    pos = np.flatnonzero(arr[:last + 1] == pattern[0])
+    for i in range(1, pattern.size):
+        if not pos.size:
+            break
+        pos = pos[arr[pos + i] == pattern[i]]
+    return pos
+
+
+def select_frames(valid, frame_size, size):
+    """
+    从有效帧起始位置中选出互不重叠的帧：连续对齐的帧整段接受，断开时跳到下一个有效帧
+    valid: 递增的有效帧起始位置，size: 缓冲区长度
+    """
+    if valid.size <= 1 or np.all(np.diff(valid) >= frame_size):
+        return valid
+    is_valid = np.zeros(size, dtype=bool)
+    is_valid[valid] = True
+    chosen = []
+    pos = int(valid[0])
+    while True:
+        run = is_valid[pos:size:frame_size]
+        stop = int(np.argmin(run)) if not run.all() else run.size
+        chosen.append(np.arange(pos, pos + stop * frame_size, frame_size))
+        next_index = np.searchsorted(valid, pos + stop * frame_size)
+        if next_index >= valid.size:
+            break
+        pos = int(valid[next_index])
+    return np.concatenate(chosen)
+
+
+_STRUCT_TO_NUMPY = {
+    'b': 'i1', 'B': 'u1', '?': 'b1', 'h': 'i2', 'H': 'u2', 'i': 'i4', 'I': 'u4', 'l': 'i4', 'L': 'u4',
+    'q': 'i8', 'Q': 'u8', 'e': 'f2', 'f': 'f4', 'd': 'f8',
+}
+
+
+def struct_to_dtype(fmt):
+    """
+    struct 格式 -> (结构化 dtype, 通道数)，如 '<8f'、'<4h2f'、'<Bxhf'
+    只支持紧凑排列（字节序前缀为 < > = !），x 为填充字节，不产生通道
+    """
+    fmt = fmt.replace(' ', '')
+    if not fmt:
+        raise ValueError("负载格式为空")
+    order = fmt[0] if fmt[0] in '<>=!@' else '<'
+    if order == '@':
+        raise ValueError("不支持 '@'（本机对齐），请使用 '<' 或 '>'")
+    body = fmt[1:] if fmt[0] in '<>=!@' else fmt
+    prefix = '>' if order == '!' else order
+
+    fields = []
+    channels = 0
+    count = ''
+    for ch in body:
+        if ch.isdigit():
+            count += ch
+            continue
+        n = int(count) if count else 1
+        count = ''
+        if ch == 'x':
+            fields.append((f'pad{len(fields)}', 'V1', (n,)) if n > 1 else (f'pad{len(fields)}', 'V1'))
+        elif ch in _STRUCT_TO_NUMPY:
+            code = prefix + _STRUCT_TO_NUMPY[ch]
+            fields.append((f'ch{channels}', code, (n,)) if n > 1 else (f'ch{channels}', code))
+            channels += n
+        else:
+            raise ValueError(f"不支持的格式字符: {ch}")
+    if count:
+        raise ValueError(f"格式末尾缺少类型: {fmt}")
+    dtype = np.dtype(fields)
+    if dtype.itemsize != struct.calcsize(order + body):
+        raise ValueError(f"格式与 struct 长度不一致: {fmt}")
+    return dtype, channels
+
+
+def parse_hex_bytes(text):
+    """'A5 5A' / 'a55a' -> b'\xa5\x5a'"""
+    return bytes.fromhex(text.replace(' ', '').replace('0x', '').replace(',', ''))
+
+
+def make_frame_spec(header, payload, length_format=None, crc=None):
+    """
+    二进制帧格式：[帧头][长度字段(可选)][负载][CRC(可选)]
+        header:        帧头字节，如 b'\xA5\x5A'
+        payload:       负载的 struct 格式，如 '<8f'
+        length_format: 长度字段的 struct 格式（值为负载字节数），如 '<B'、'<H'，None 表示无长度字段
+        crc:           None / 'crc8' / 'crc16'
+    """
+    return {'header': bytes(header), 'payload': payload, 'length_format': length_format, 'crc': crc}
+
+
+class BinaryFrameDecoder:
+    """
+    定长二进制帧解码
+    在整批数据上向量化查找帧头、校验长度字段与 CRC，连续对齐的帧一次性接受；
+    遇到损坏数据时从下一个有效帧头重新同步，跨批次的不完整帧留到下次
+    """
+
+    def __init__(self, spec):
+        header = spec['header']
+        if not header:
+            raise ValueError("帧头不能为空")
+        self.spec = spec
+        self.header = header
+        self.payload_dtype, self.channels = struct_to_dtype(spec['payload'])
+        self.payload_size = self.payload_dtype.itemsize
+
+        self.length_format = spec.get('length_format')
+        self.length_size = struct.calcsize(self.length_format) if self.length_format else 0
+        self.length_dtype = None
+        if self.length_format:
+            self.length_dtype, _ = struct_to_dtype(self.length_format)
+            if len(self.length_dtype.names) != 1:
+                raise ValueError("长度字段只能是一个整数")
+
+        crc = spec.get('crc')
+        self.crc_size, self._crc_rows = CRC_TYPES[crc] if crc else (0, None)
+
+        self.payload_offset = len(header) + self.length_size
+        self.frame_size = self.payload_offset + self.payload_size + self.crc_size
+        self.reset()
+
+    def reset(self):
+        self.frames = 0
+        self.crc_errors = 0
+        self.skipped_bytes = 0
+        self._carry = b''
+
+    def _empty(self):
+        return np.empty((0, self.channels), dtype=np.float64)
+
+    def _candidates(self, arr):
+        """所有完整落在缓冲区内、帧头匹配的起始位置"""
+        return find_pattern(arr, self.header, arr.size - self.frame_size)
+
+    def _gather(self, arr, pos, offset, size):
+        return arr[pos[:, None] + (offset + np.arange(size))]
+
+    def _validate(self, arr, pos):
+        """按长度字段与 CRC 过滤候选帧"""
+        if pos.size and self.length_dtype is not None:
+            raw = self._gather(arr, pos, len(self.header), self.length_size)
+            lengths = raw.copy().view(self.length_dtype)[self.length_dtype.names[0]].ravel()
+            pos = pos[lengths == self.payload_size]
+        if pos.size and self._crc_rows is not None:
+            frames = self._gather(arr, pos, 0, self.frame_size)
+            body = self.frame_size - self.crc_size
+            expected = self._crc_rows(frames[:, :body])
+            trailer = frames[:, body:].copy().view('<u1' if self.crc_size == 1 else '<u2').ravel()
+            ok = expected == trailer
+            self.crc_errors += int(ok.size - ok.sum())
+            pos = pos[ok]
+        return pos
+
+    def feed(self, data):
+        """输入新数据，返回解码出的采样 shape=(帧数, 通道数)"""
+        buf = self._carry + data if self._carry else bytes(data)
+        arr = np.frombuffer(buf, dtype=np.uint8)
+
+        frames = select_frames(self._validate(arr, self._candidates(arr)), self.frame_size, arr.size)
+        end = int(frames[-1]) + self.frame_size if frames.size else 0
+        # 最后 frame_size - 1 个字节可能是下一帧的开头，其余不属于任何帧的字节丢弃
+        keep_from = max(end, arr.size - self.frame_size + 1)
+        self.skipped_bytes += keep_from - frames.size * self.frame_size
+        self._carry = buf[keep_from:]
+
+        if not frames.size:
+            return self._empty()
+        self.frames += frames.size
+        payload = self._gather(arr, frames, self.payload_offset, self.payload_size)
+        records = payload.view(self.payload_dtype).ravel()
+        return decode_records(records, self.channels)
+
+
+def decode_records(records, channels):
+    """结构化数组 -> shape=(记录数, 通道数) 的 float64 数组"""
+    out = np.empty((records.size, channels), dtype=np.float64)
+    column = 0
+    for name in records.dtype.names:
+        if name.startswith('pad'):
+            continue
+        values = records[name]
+        if values.ndim == 1:
+            out[:, column] = values
+            column += 1
+        else:
+            out[:, column:column + values.shape[1]] = values
+            column += values.shape[1]
+    return out
+
+
+# ---------------------------------------------------------------- VOFA+
+
+JUSTFLOAT_TAIL = b'\x00\x00\x80\x7f'  # 0x7F800000 小端
+
+
+class JustFloatDecoder:
+    """
+    VOFA+ JustFloat：每帧为 N 个小端 float32 + 帧尾 00 00 80 7F
+    通道数由相邻帧尾的间距自动检测；连续对齐的帧直接用 np.frombuffer 视图读取，不逐帧拷贝
+    """
+
+    MIN_TAILS = 3                   # 检测通道数所需的最少帧尾数
+    MAX_CHANNELS = 64               # 与 device/vofa 的 MAX_CHANNEL 一致
+    MAX_CARRY = 64 * 1024
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.channels = 0
+        self.frame_size = 0
+        self.frames = 0
+        self.skipped_bytes = 0
+        self._carry = b''
+
+    @classmethod
+    def detect_frame_size(cls, tails):
+        """相邻帧尾间距的众数即帧长，无法确定时返回 0"""
+        if tails.size < cls.MIN_TAILS:
+            return 0
+        gaps = np.diff(tails)
+        gaps = gaps[(gaps % 4 == 0) & (gaps >= 8) & (gaps <= 4 * cls.MAX_CHANNELS + 4)]
+        if not gaps.size:
+            return 0
+        values, counts = np.unique(gaps, return_counts=True)
+        best = int(np.argmax(counts))
+        # 至少一半的间距一致才认为是 JustFloat 数据
+        return int(values[best]) if counts[best] * 2 >= tails.size - 1 else 0
+
+    def _empty(self):
+        return np.empty((0, self.channels), dtype=np.float64)
+
+    def feed(self, data):
+        """输入新数据，返回解码出的采样 shape=(帧数, 通道数)"""
+        buf = self._carry + data if self._carry else bytes(data)
+        arr = np.frombuffer(buf, dtype=np.uint8)
+        tails = find_pattern(arr, JUSTFLOAT_TAIL)
+
+        if not self.frame_size:
+            self.frame_size = self.detect_frame_size(tails)
+            if not self.frame_size:
+                self._carry = buf[-self.MAX_CARRY:]
+                return self._empty()
+            self.channels = self.frame_size // 4 - 1
+
+        frame_size = self.frame_size
+        starts = tails + 4 - frame_size
+        frames = select_frames(starts[starts >= 0], frame_size, arr.size)
+        if not frames.size and self.detect_frame_size(tails) not in (0, frame_size):
+            # 通道数变化，重新检测
+            self.reset()
+            return self.feed(buf)
+
+        end = int(frames[-1]) + frame_size if frames.size else 0
+        keep_from = max(end, arr.size - frame_size + 1)
+        self.skipped_bytes += keep_from - frames.size * frame_size
+        self._carry = buf[keep_from:]
+        if not frames.size:
+            return self._empty()
+        self.frames += frames.size
+
+        # 按连续段读取：每段是 float32 的 (帧数, 通道数 + 1) 视图，去掉帧尾列
+        breaks = np.flatnonzero(np.diff(frames) != frame_size) + 1
+        columns = self.channels + 1
+        out = np.empty((frames.size, self.channels), dtype=np.float64)
+        row = 0
+        for run in np.split(frames, breaks):
+            view = np.frombuffer(buf, dtype='<f4', count=run.size * columns, offset=int(run[0]))
+            out[row:row + run.size] = view.reshape(run.size, columns)[:, :self.channels]
+            row += run.size
+        return out
+
+
+class AutoDecoder:
+    """
+    自动识别波形数据格式：先缓存数据，检测到 JustFloat 帧尾规律时使用 JustFloatDecoder，
+    否则数据以可打印文本为主时使用 TextLineDecoder（兼容 FireWater）
+    """
+
+    DETECT_BYTES = 64 * 1024  # 超过该长度仍无法判断时按文本处理
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.decoder = None
+        self._pending = b''
+
+    @property
+    def channels(self):
+        return self.decoder.channels if self.decoder is not None else 0
+
+    @property
+    def name(self):
+        if isinstance(self.decoder, JustFloatDecoder):
+            return 'JustFloat'
+        if isinstance(self.decoder, TextLineDecoder):
+            return '文本'
+        return ''
+
+    def _detect(self, buf):
+        arr = np.frombuffer(buf, dtype=np.uint8)
+        if JustFloatDecoder.detect_frame_size(find_pattern(arr, JUSTFLOAT_TAIL)):
+            return JustFloatDecoder()
+        newlines = int(np.count_nonzero(arr == 0x0A))
+        if newlines >= 2:
+            printable = np.count_nonzero((arr >= 0x20) & (arr < 0x7F) | (arr == 0x0A) | (arr == 0x0D) | (arr == 0x09))
+            if printable >= arr.size * 0.95:
+                return TextLineDecoder()
+        if len(buf) >= self.DETECT_BYTES:
+            return TextLineDecoder()
+        return None
+
+    def feed(self, data):
+        if self.decoder is None:
+            self._pending += data
+            self.decoder = self._detect(self._pending)
+            if self.decoder is None:
+                return np.empty((0, 0), dtype=np.float64)
+            data, self._pending = self._pending, b''
+        return self.decoder.feed(data)
@@ -0,0 +1,77 @@
+"""
+串口接收数据的文本格式化
+
+在接收线程中运行：按显示设置的不可变快照把数据块整体转换为 HEX/文本（bytes.hex、增量 UTF-8 解码），
+不逐字节拼接字符串；格式化结果先累积，由调用方按帧率（默认 60Hz）一次性交给界面。
+"""
+import codecs
+import time
+from collections import namedtuple
+from datetime import datetime
+
+# 显示设置快照，由界面线程整体替换，接收线程只读
+DisplaySettings = namedtuple('DisplaySettings', ['hex_mode', 'timestamp'])
+DEFAULT_DISPLAY_SETTINGS = DisplaySettings(hex_mode=True, timestamp=True)
+
+FRAME_INTERVAL = 1.0 / 60
+
+
+def format_hex(data):
+    """b'\\x01\\xab' -> '01 AB'"""
+    return data.hex(' ').upper()
+
+
+def format_timestamp(when=None):
+    """[时:分:秒.毫秒] """
+    when = datetime.now() if when is None else when
+    return when.strftime("[%H:%M:%S.%f")[:-3] + "] "
+
+
+class ReceiveFormatter:
+    """
+    接收数据格式化与合并
+    feed() 格式化一个数据块并暂存，take() 取出自上次以来的全部文本
+    """
+
+    def __init__(self, settings=None, frame_interval=FRAME_INTERVAL):
+        self.settings = settings or DEFAULT_DISPLAY_SETTINGS
+        self.frame_interval = frame_interval
+        self._pending = []
+        self._last_take = 0.0
+        # 多字节字符可能被拆在两个数据块中，用增量解码器保留不完整的尾部
+        self._decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+
+    def set_settings(self, settings):
+        if settings.hex_mode != self.settings.hex_mode:
+            self._decoder.reset()
+        self.settings = settings
+
+    def feed(self, data, when=None):
+        settings = self.settings
+        if settings.hex_mode:
+            text = format_hex(data)
+        else:
+            text = self._decoder.decode(data)
+        if not text:
+            return
+        if settings.timestamp:
+            self._pending.append(format_timestamp(when))
+        self._pending.append(text)
+        self._pending.append('\n')
+
+    def has_pending(self):
+        return bool(self._pending)
+
+    def due_in(self, now=None):
+        """距离下一次可以交付的剩余时间(s)，没有待交付数据时返回 None"""
+        if not self._pending:
+            return None
+        now = time.perf_counter() if now is None else now
+        return max(0.0, self._last_take + self.frame_interval - now)
+
+    def take(self, now=None):
+        """取出暂存的文本，并记录交付时间"""
+        self._last_take = time.perf_counter() if now is None else now
+        text = ''.join(self._pending)
+        self._pending.clear()
+        return text
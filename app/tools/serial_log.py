@@ -0,0 +1,230 @@
+"""
+串口接收日志
+
+按行保存接收文本的环形缓冲，行数与字符数都有上限。
+行按 BLOCK_LINES 行一块存放，只有最后一块在追加，写满的块不再修改；
+淘汰按整块进行（保留 max_lines - BLOCK_LINES ~ max_lines 行），追加与淘汰都是 O(1)（按行计）。
+行号为全局递增的绝对行号，被淘汰的行不会改变其余行的行号。
+
+搜索索引按块增量建立：写满的块第一次被搜索时拼接为一个字符串并记录每行起始位置，之后复用；
+LogMatcher 对整块文本做一次正则扫描，再由位置换算出行号，不必对每一行单独调用。
+写满的块不会再变，后台线程可以直接读取（search_lines），不需要与追加加锁。
+"""
+import re
+from bisect import bisect_right
+from collections import deque
+from itertools import accumulate
+
+
+class _LogBlock:
+    """一块日志行"""
+
+    __slots__ = ('first_line', 'lines', 'chars', '_index', '_lower')
+
+    def __init__(self, first_line):
+        self.first_line = first_line
+        self.lines = []
+        self.chars = 0
+        self._index = None
+        self._lower = None
+
+    def index(self):
+        """(整块文本, 每行起始位置)，只对写满的块调用，结果缓存"""
+        if self._index is None:
+            self._index = ('\n'.join(self.lines), [0, *accumulate(len(line) + 1 for line in self.lines)])
+        return self._index
+
+    def lower_text(self):
+        """小写的整块文本（忽略大小写的子串查找用），结果缓存"""
+        if self._lower is None:
+            self._lower = _lower(self.index()[0])
+        return self._lower
+
+
+def _lower(text):
+    # 个别字符转小写后长度会变化，此时返回 None，改用正则查找以保证位置与原文一致
+    lower = text.lower()
+    return lower if len(lower) == len(text) else None
+
+
+class LogBuffer:
+    """接收日志环形缓冲"""
+
+    BLOCK_LINES = 4096
+
+    def __init__(self, max_lines=200000, max_chars=16 * 1024 * 1024):
+        self.max_lines = max_lines
+        self.max_chars = max_chars
+        self.blocks = deque()
+        self.total_lines = 0
+        self.total_chars = 0
+        self.first_line = 0  # blocks[0] 第一行的绝对行号
+        self._partial = ''   # 尚未以换行结束的尾部
+
+    @property
+    def end_line(self):
+        """下一行的绝对行号"""
+        return self.first_line + self.total_lines
+
+    def __len__(self):
+        return self.total_lines
+
+    def append(self, text):
+        """追加文本，返回新增的完整行数"""
+        if not text:
+            return 0
+        parts = text.split('\n')
+        if self._partial:
+            parts[0] = self._partial + parts[0]
+        self._partial = parts.pop()
+
+        blocks = self.blocks
+        pos = 0
+        while pos < len(parts):
+            block = blocks[-1] if blocks else None
+            if block is None or len(block.lines) == self.BLOCK_LINES:
+                block = _LogBlock(self.end_line)
+                blocks.append(block)
+            take = parts[pos:pos + self.BLOCK_LINES - len(block.lines)]
+            chars = sum(map(len, take))
+            block.lines.extend(take)
+            block.chars += chars
+            self.total_lines += len(take)
+            self.total_chars += chars
+            pos += len(take)
+        self._trim()
+        return len(parts)
+
+    def _trim(self):
+        blocks = self.blocks
+        while len(blocks) > 1 and (self.total_lines > self.max_lines or self.total_chars > self.max_chars):
+            block = blocks.popleft()
+            self.total_lines -= len(block.lines)
+            self.total_chars -= block.chars
+            self.first_line += len(block.lines)
+
+    def get(self, line_no):
+        """按绝对行号取行，已淘汰的行返回 None"""
+        index = line_no - self.first_line
+        if not 0 <= index < self.total_lines:
+            return None
+        block, offset = divmod(index, self.BLOCK_LINES)
+        return self.blocks[block].lines[offset]
+
+    def tail(self, count):
+        """最后 count 行"""
+        parts = []
+        for block in reversed(self.blocks):
+            if count <= 0:
+                break
+            lines = block.lines
+            parts.append(lines[-count:] if count < len(lines) else lines)
+            count -= len(lines)
+        parts.reverse()
+        return [line for lines in parts for line in lines]
+
+    def snapshot(self):
+        """
+        当前各块及其行数 [(块, 行数), ...]，供后台线程搜索：
+        写满的块不再变化；最后一块之后追加的行不在本次快照内（绝对行号 >= 快照时的 end_line）
+        """
+        return [(block, len(block.lines)) for block in list(self.blocks)]
+
+    def clear(self):
+        self.first_line = self.end_line
+        self.blocks.clear()
+        self.total_lines = 0
+        self.total_chars = 0
+        self._partial = ''
+
+
+class LogMatcher:
+    """
+    日志行匹配：子串或正则，默认忽略大小写
+    正则以 MULTILINE 编译，^ 与 $ 匹配每一行的开头与结尾；正则错误时抛出 re.error
+    子串查找用 str.find（忽略大小写时在缓存的小写文本中查找），比正则引擎快
+    """
+
+    def __init__(self, pattern, regex=False, ignore_case=True):
+        flags = re.MULTILINE | (re.IGNORECASE if ignore_case else 0)
+        self.pattern = pattern
+        self.regex = re.compile(pattern if regex else re.escape(pattern), flags)
+        self.ignore_case = ignore_case
+        # 不含换行的非空子串才能用 find（含换行时可能跨行命中）
+        self.needle = None
+        if not regex and pattern and '\n' not in pattern:
+            self.needle = _lower(pattern) if ignore_case else pattern
+
+    def search_text(self, text, starts, lower=None):
+        """
+        在多行拼接的文本中查找，starts 为每行起始位置（末尾多一个结束位置）
+        lower: 小写的文本（可选，忽略大小写的子串查找时使用）
+        返回匹配的行下标；每行命中一次后直接跳到下一行，匹配很密集时也只扫描一遍
+        每行单独判断是否匹配，跨行的正则匹配不算命中
+        """
+        find = None
+        if self.needle is not None:
+            if not self.ignore_case:
+                find = text.find
+            else:
+                if lower is None:
+                    lower = _lower(text)
+                if lower is not None:
+                    find = lower.find
+        needle = self.needle
+        search = self.regex.search
+        count = len(starts) - 1
+        result = []
+        pos = 0
+        while count:
+            if find is not None:
+                start = find(needle, pos)
+                if start < 0:
+                    break
+            else:
+                match = search(text, pos)
+                if match is None:
+                    break
+                start = match.start()
+            line = bisect_right(starts, start) - 1
+            line_end = starts[line + 1] - 1
+            # 正则（\s、[^...] 等）可能越过行尾匹配到下一行：只在本行范围内重新查找一次，本行不匹配时不计入
+            if find is None and match.end() > line_end and search(text, start, line_end) is None:
+                if line + 1 >= count:
+                    break
+                pos = starts[line + 1]
+                continue
+            result.append(line)
+            if line + 1 >= count:
+                break
+            pos = starts[line + 1]
+        return result
+
+    def match_lines(self, lines):
+        """一组行中匹配的行下标"""
+        if not lines:
+            return []
+        starts = [0, *accumulate(len(line) + 1 for line in lines)]
+        return self.search_text('\n'.join(lines), starts)
+
+    def search_lines(self, snapshot, should_stop=None):
+        """
+        在 LogBuffer.snapshot() 的各块中查找，逐块产出 [(绝对行号, 行), ...]
+        should_stop: 返回 True 时提前结束（搜索条件已改变）
+        """
+        for block, count in snapshot:
+            if should_stop is not None and should_stop():
+                return
+            lower = None
+            if count == len(block.lines) == LogBuffer.BLOCK_LINES:
+                text, starts = block.index()
+                lines = block.lines
+                if self.needle is not None and self.ignore_case:
+                    lower = block.lower_text()
+            else:
+                lines = block.lines[:count]
+                starts = [0, *accumulate(len(line) + 1 for line in lines)]
+                text = '\n'.join(lines)
+            indices = self.search_text(text, starts, lower)
+            if indices:
+                yield [(block.first_line + i, lines[i]) for i in indices]
@@ -0,0 +1,268 @@
+"""
+多串口接收的 I/O 多路复用
+
+一个线程用 selectors 同时等待所有串口的 fd，哪个可读就读空哪个（SerialReader.drain），
+不再为每个串口单独开一个线程。增删数据源通过 socketpair 唤醒 select，立即生效。
+没有 fd 的数据源（Windows 串口、录制回放）每轮调用 poll()：
+数据源提供 due_in() 时最长等待到其下一次到期，否则最长等待 POLL_INTERVAL。
+
+SerialReceiver 是在此之上的接收循环（文本格式化、统计、录制），界面与基准测试共用。
+"""
+import queue
+import selectors
+import socket
+import threading
+import time
+
+from app.tools.serial_format import DEFAULT_DISPLAY_SETTINGS, ReceiveFormatter
+
+
+class SerialMultiplexer:
+    """
+    多数据源接收
+    数据源需要有 fd 属性：fd 不为 None 时可读后调用 drain(woke)，否则定时调用 poll()
+    （poll 返回 None 表示数据源已结束）
+    """
+
+    POLL_INTERVAL = 0.005
+    REMOVE_TIMEOUT = 1.0
+
+    def __init__(self):
+        self.selector = selectors.DefaultSelector()
+        self.readers = {}   # key -> 数据源
+        self._polled = {}   # 没有 fd 的数据源
+        self._pending = queue.SimpleQueue()
+        self._wake_r, self._wake_w = socket.socketpair()
+        self._wake_r.setblocking(False)
+        self._wake_w.setblocking(False)
+        self.selector.register(self._wake_r, selectors.EVENT_READ, None)
+
+    def add(self, key, reader):
+        """添加数据源（可在其它线程调用，下一轮 poll 生效）"""
+        self._pending.put((key, reader, None))
+        self.wake()
+
+    def remove(self, key, wait=False):
+        """
+        移除数据源（可在其它线程调用）
+        wait=True 时等到接收线程确认不再访问该数据源后返回，之后可以安全关闭串口
+        """
+        done = threading.Event() if wait else None
+        self._pending.put((key, None, done))
+        self.wake()
+        if done is not None:
+            done.wait(self.REMOVE_TIMEOUT)
+
+    def wake(self):
+        """唤醒阻塞中的 poll"""
+        try:
+            self._wake_w.send(b'\0')
+        except OSError:
+            pass  # 缓冲区已满，说明已有未处理的唤醒
+
+    def close(self):
+        self._apply_pending()
+        self.selector.close()
+        self._wake_r.close()
+        self._wake_w.close()
+
+    def _apply_pending(self):
+        while True:
+            try:
+                key, reader, done = self._pending.get_nowait()
+            except queue.Empty:
+                return
+            self._detach(key)
+            if reader is not None:
+                self.readers[key] = reader
+                if reader.fd is None:
+                    self._polled[key] = reader
+                else:
+                    self.selector.register(reader.fd, selectors.EVENT_READ, key)
+            if done is not None:
+                done.set()
+
+    def _detach(self, key):
+        reader = self.readers.pop(key, None)
+        if reader is None:
+            return
+        if self._polled.pop(key, None) is None:
+            try:
+                self.selector.unregister(reader.fd)
+            except (KeyError, ValueError, OSError):
+                pass
+
+    def _wait_time(self, timeout):
+        for reader in self._polled.values():
+            due_in = getattr(reader, 'due_in', None)
+            wait = due_in() if due_in is not None else self.POLL_INTERVAL
+            if timeout is None or wait < timeout:
+                timeout = wait
+        return timeout
+
+    def poll(self, timeout=None):
+        """
+        等待任一数据源有数据（最长 timeout 秒），返回 [(key, data), ...]
+        data 为 None 表示该数据源已结束或读取出错，已自动移除
+        """
+        self._apply_pending()
+        try:
+            events = self.selector.select(self._wait_time(timeout))
+        except OSError as e:
+            # 串口在别处被关闭等情况，下一轮 _apply_pending 后恢复
+            print(f"串口等待错误: {e}")
+            time.sleep(self.POLL_INTERVAL)
+            return []
+
+        woke = time.perf_counter()
+        results = []
+        for selector_key, _ in events:
+            key = selector_key.data
+            if key is None:
+                self._clear_wake()
+                continue
+            reader = self.readers.get(key)
+            if reader is None:
+                continue
+            try:
+                data = reader.drain(woke)
+            except Exception as e:
+                print(f"串口读取错误: {key}, 错误: {e}")
+                self._detach(key)
+                results.append((key, None))
+                continue
+            if data:
+                results.append((key, data))
+
+        for key, reader in list(self._polled.items()):
+            try:
+                data = reader.poll()
+            except Exception as e:
+                print(f"串口读取错误: {key}, 错误: {e}")
+                data = None
+            if data is None:
+                self._detach(key)
+                results.append((key, None))
+            elif data:
+                results.append((key, data))
+        return results
+
+    def _clear_wake(self):
+        try:
+            while self._wake_r.recv(4096):
+                pass
+        except OSError:
+            pass
+
+
+def _ignore(*args):
+    pass
+
+
+class SerialReceiver:
+    """
+    接收循环（不依赖 Qt）：SerialMultiplexer 等待所有数据源，每个数据源有独立的文本格式化器
+    界面中由 SerialReadThread 在线程里运行（回调即发射信号），基准测试直接在普通线程中运行
+    回调: on_raw(会话名, 原始数据) / on_text(会话名, 文本) / on_stats(会话名, 统计) / on_finished(会话名)
+    """
+
+    STATS_INTERVAL = 1.0  # 接收统计上报间隔(s)
+
+    def __init__(self, display_settings=None, on_raw=None, on_text=None, on_stats=None, on_finished=None):
+        self.mux = SerialMultiplexer()
+        self.on_raw = on_raw or _ignore
+        self.on_text = on_text or _ignore
+        self.on_stats = on_stats or _ignore
+        self.on_finished = on_finished or _ignore
+        self._settings = display_settings or DEFAULT_DISPLAY_SETTINGS
+        self._sources = {}  # 会话名 -> {'reader', 'formatter', 'capture_writer'}
+        self._capture_lock = threading.Lock()  # 接收循环写入录制数据与更换 writer 互斥
+        self._running = False  # 接收循环运行中
+        self._stop = False
+
+    def add_source(self, name, reader):
+        """添加一个数据源（SerialReader 或 CaptureReplayReader），可在其它线程调用"""
+        self._sources[name] = {
+            'reader': reader,
+            'formatter': ReceiveFormatter(self._settings),
+            'capture_writer': None,
+        }
+        self.mux.add(name, reader)
+
+    def remove_source(self, name):
+        """移除数据源，返回后接收循环不再读取该串口，可以安全关闭"""
+        self.mux.remove(name, wait=self._running)
+        self._sources.pop(name, None)
+
+    def set_capture_writer(self, name, writer):
+        """
+        录制某个数据源（writer 为 None 时停止），可在其它线程调用
+        返回后接收循环不会再向原来的 writer 写入，可以安全关闭它
+        """
+        source = self._sources.get(name)
+        if source is not None:
+            with self._capture_lock:
+                source['capture_writer'] = writer
+
+    def set_display_settings(self, settings):
+        """整体替换显示设置快照"""
+        self._settings = settings
+
+    def run(self):
+        """接收循环，直到 stop()"""
+        self._running = True
+        last_stats = time.perf_counter()
+        while not self._stop:
+            sources = list(self._sources.items())
+            # 阻塞等待任一串口有数据，有待显示文本时最长等一帧
+            timeout = self.STATS_INTERVAL
+            for _, source in sources:
+                due = source['formatter'].due_in()
+                if due is not None and due < timeout:
+                    timeout = due
+
+            for name, raw_data in self.mux.poll(timeout):
+                source = self._sources.get(name)
+                if source is None:
+                    continue
+                if raw_data is None:
+                    self._flush(name, source)
+                    self.on_finished(name)
+                    continue
+                with self._capture_lock:
+                    writer = source['capture_writer']
+                    if writer is not None:
+                        writer.write(raw_data)
+                self.on_raw(name, raw_data)
+                formatter = source['formatter']
+                if self._settings is not formatter.settings:
+                    formatter.set_settings(self._settings)
+                formatter.feed(raw_data)
+
+            # 每个数据源每帧最多提交一次文本
+            now = time.perf_counter()
+            for name, source in sources:
+                formatter = source['formatter']
+                if formatter.due_in(now) == 0.0:
+                    self.on_text(name, formatter.take(now))
+
+            if now - last_stats >= self.STATS_INTERVAL:
+                last_stats = now
+                for name, source in sources:
+                    self.on_stats(name, source['reader'].stats.snapshot())
+
+        for name, source in list(self._sources.items()):
+            self._flush(name, source)
+        self._running = False
+
+    def _flush(self, name, source):
+        if source['formatter'].has_pending():
+            self.on_text(name, source['formatter'].take())
+
+    def stop(self):
+        """请求退出接收循环（可在其它线程调用）"""
+        self._stop = True
+        self.mux.wake()
+
+    def close(self):
+        self.mux.close()
@@ -0,0 +1,185 @@
+"""
+串口接收
+
+有可 select 的文件描述符时（Linux/macOS），阻塞在串口 fd 上等待数据（超时取串口的 timeout），
+被唤醒后用非阻塞 os.read 一次读空内核缓冲区，读块大小按实际流量自适应；
+没有 fd 时（Windows）退化为带超时的 ser.read 阻塞等待首字节，再按 in_waiting 读空。
+空闲时线程不占用 CPU，也没有轮询带来的固定延迟。
+"""
+import errno
+import os
+import select
+import time
+
+try:
+    import serial
+    SerialException = serial.SerialException
+except ImportError:  # 基准测试等场景可以直接用 fd
+    SerialException = OSError
+
+# 唤醒后仍然可读时继续读的次数上限，避免持续高速流入时迟迟不交付
+_MAX_DRAIN_READS = 16
+
+
+class RateCounter:
+    """
+    接收统计：累计字节数/读取次数，以及两次 snapshot 之间的 bytes/s、reads/s 与最大延迟
+    延迟指从 fd 可读（被唤醒）到这一块数据读完交给调用方所用的时间
+    """
+
+    def __init__(self):
+        self.total_bytes = 0
+        self.total_reads = 0
+        self._window_start = time.perf_counter()
+        self._window_bytes = 0
+        self._window_reads = 0
+        self._window_max_latency = 0.0
+        self.max_latency = 0.0
+
+    def add(self, nbytes, latency):
+        self.total_bytes += nbytes
+        self.total_reads += 1
+        self._window_bytes += nbytes
+        self._window_reads += 1
+        if latency > self._window_max_latency:
+            self._window_max_latency = latency
+        if latency > self.max_latency:
+            self.max_latency = latency
+
+    def snapshot(self):
+        """
+        返回统计并开始新的统计窗口:
+        {'bytes_per_sec', 'reads_per_sec', 'max_latency_ms'(窗口内), 'peak_latency_ms'(累计),
+         'total_bytes', 'total_reads'}
+        """
+        now = time.perf_counter()
+        elapsed = max(now - self._window_start, 1e-9)
+        stats = {
+            'bytes_per_sec': self._window_bytes / elapsed,
+            'reads_per_sec': self._window_reads / elapsed,
+            'max_latency_ms': self._window_max_latency * 1000.0,
+            'peak_latency_ms': self.max_latency * 1000.0,
+            'total_bytes': self.total_bytes,
+            'total_reads': self.total_reads,
+        }
+        self._window_start = now
+        self._window_bytes = 0
+        self._window_reads = 0
+        self._window_max_latency = 0.0
+        return stats
+
+
+class SerialReader:
+    """
+    单个串口的事件驱动读取器
+    read() 阻塞到有数据或超时，返回本次读到的全部数据（超时返回 b''）
+    """
+
+    MIN_CHUNK = 4096
+    MAX_CHUNK = 1 << 20
+
+    def __init__(self, ser, timeout=None):
+        self.ser = ser
+        self.timeout = timeout if timeout is not None else (getattr(ser, 'timeout', None) or 0.1)
+        self.chunk_size = self.MIN_CHUNK
+        self.stats = RateCounter()
+        self.fd = self._get_fd(ser)
+        # pyserial 的 cancel_read 会写这个管道，用于在 stop 时立即唤醒 select
+        self._abort_fd = getattr(ser, 'pipe_abort_read_r', None)
+
+    @staticmethod
+    def _get_fd(ser):
+        if isinstance(ser, int):
+            return ser
+        if os.name != 'posix':
+            return None
+        try:
+            fd = ser.fileno()
+        except (AttributeError, OSError, ValueError):
+            fd = getattr(ser, 'fd', None)
+        return fd if isinstance(fd, int) and fd >= 0 else None
+
+    def cancel(self):
+        """唤醒阻塞中的 read（停止线程时使用）"""
+        cancel_read = getattr(self.ser, 'cancel_read', None)
+        if cancel_read is not None:
+            try:
+                cancel_read()
+            except Exception:
+                pass
+
+    def read(self, timeout=None):
+        """timeout: 本次最长等待时间(s)，默认使用串口超时"""
+        if self.fd is None:
+            return self._read_fallback()
+
+        watch = [self.fd] if self._abort_fd is None else [self.fd, self._abort_fd]
+        try:
+            ready, _, _ = select.select(watch, [], [], self.timeout if timeout is None else timeout)
+        except InterruptedError:
+            return b''
+        if self._abort_fd is not None and self._abort_fd in ready:
+            os.read(self._abort_fd, 1000)
+            return b''
+        if not ready:
+            return b''
+        woke = time.perf_counter()
+        return self.drain(woke)
+
+    def drain(self, woke=None):
+        """fd 可读时调用：非阻塞读空当前可读数据"""
+        if woke is None:
+            woke = time.perf_counter()
+        chunks = []
+        for _ in range(_MAX_DRAIN_READS):
+            try:
+                data = os.read(self.fd, self.chunk_size)
+            except BlockingIOError:
+                break
+            except OSError as e:
+                if e.errno in (errno.EAGAIN, errno.EINTR):
+                    break
+                raise SerialException(f"read failed: {e}")
+            if not data:
+                if not chunks:
+                    # 与 pyserial 一致：可读但读不到数据说明设备已断开
+                    raise SerialException("device reports readiness to read but returned no data")
+                break
+            chunks.append(data)
+            if len(data) < self.chunk_size:
+                break
+            # 读满说明流量大于当前块大小，扩大下一次读的块
+            if self.chunk_size < self.MAX_CHUNK:
+                self.chunk_size *= 2
+
+        data = chunks[0] if len(chunks) == 1 else b''.join(chunks)
+        if data:
+            self._shrink_chunk(len(data))
+            self.stats.add(len(data), time.perf_counter() - woke)
+        return data
+
+    def _shrink_chunk(self, nbytes):
+        # 流量下降后逐步缩小块大小，避免长期持有大缓冲
+        if nbytes * 4 < self.chunk_size and self.chunk_size > self.MIN_CHUNK:
+            self.chunk_size //= 2
+
+    def poll(self):
+        """不阻塞地读取已到达的数据（没有 fd 时由多路复用线程定时调用）"""
+        woke = time.perf_counter()
+        waiting = self.ser.in_waiting
+        if not waiting:
+            return b''
+        data = self.ser.read(min(waiting, self.MAX_CHUNK))
+        self.stats.add(len(data), time.perf_counter() - woke)
+        return data
+
+    def _read_fallback(self):
+        ser = self.ser
+        first = ser.read(1)  # 串口超时内阻塞等待首字节
+        if not first:
+            return b''
+        woke = time.perf_counter()
+        waiting = ser.in_waiting
+        data = first + ser.read(min(waiting, self.MAX_CHUNK)) if waiting else first
+        self.stats.add(len(data), time.perf_counter() - woke)
+        return data
@@ -0,0 +1,80 @@
+"""
+串口会话
+
+每个会话有独立的波形解析流水线：解码器 -> 时间戳 -> ChannelStore，同时增量更新各通道的统计（ChannelStats），
+设置了触发（Trigger）时对新采样做触发检测。
+所有会话的时间戳取自同一个时钟（time.time() 毫秒），不同串口的数据可以画在同一条时间轴上对齐比较。
+"""
+import time
+
+import numpy as np
+
+from app.tools.channel_stats import ChannelStats
+from app.tools.channel_store import ChannelStore
+from app.tools.serial_decoders import AutoDecoder
+
+
+class SerialSession:
+    """
+    一个串口（或一个录制回放）会话
+    ser: 已打开的串口，回放时为 None；reader: 交给接收线程的数据源
+    """
+
+    def __init__(self, name, ser=None, reader=None, decoder=None, capacity=1_000_000, stats_window=10000):
+        self.name = name
+        self.ser = ser
+        self.reader = reader
+        self.decoder = decoder or AutoDecoder()
+        self.store = ChannelStore(capacity)
+        self.stats = ChannelStats(stats_window)
+        self.trigger = None  # 波形触发（Trigger），None 为不触发
+        self.last_sample_time = None
+
+    @property
+    def is_open(self):
+        """可以发送数据的串口会话"""
+        return self.ser is not None and self.ser.is_open
+
+    def set_decoder(self, decoder):
+        self.decoder = decoder
+        self.last_sample_time = None
+
+    def feed(self, raw_data, now=None):
+        """解析一块原始数据，返回新增的采样数"""
+        samples = self.decoder.feed(raw_data)
+        if len(samples):
+            self.append_samples(samples, now)
+        return len(samples)
+
+    def append_samples(self, samples, now=None):
+        """
+        追加一批采样 shape=(采样数, 通道数)，同一批的时间戳在上一批与当前时刻之间均匀分布
+        now: 当前时刻(ms)，默认 time.time() * 1000
+        """
+        num_samples, num_channels = samples.shape
+        store = self.store
+        if store.channels != num_channels:
+            store.set_channels(num_channels)
+
+        current_time = time.time() * 1000 if now is None else now
+        last_time = self.last_sample_time
+        if last_time is None or not 0 < current_time - last_time < 1000:
+            last_time = current_time - num_samples
+        timestamps = np.linspace(last_time, current_time, num_samples + 1)[1:]
+        self.last_sample_time = current_time
+        store.append(timestamps, samples)
+        self.stats.update(timestamps, samples)
+        if self.trigger is not None:
+            self.trigger.process(store, num_samples)
+
+    def clear(self):
+        self.store.clear()
+        self.stats.reset()
+        if self.trigger is not None:
+            self.trigger.reset(self.store)
+        self.decoder.reset()
+        self.last_sample_time = None
+
+    def close(self):
+        if self.ser is not None:
+            self.ser.close()
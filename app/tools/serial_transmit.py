@@ -0,0 +1,214 @@
+"""
+串口定时发送
+
+发送内容在开始前一次性编码为字节（每帧已包含行尾），发送线程只做定时与 write：
+计划时间按绝对时刻累加（next += 间隔），不会因为每次 sleep 的误差累积漂移；
+先 sleep 到计划时间前 SPIN_TIME，再忙等到计划时刻，1 ms 间隔也能保持较小的抖动。
+
+发送脚本：多条命令用 ';' 或换行分隔，按顺序循环发送，每条一帧
+    htop;cali_gyro             交替发送两条命令
+    set_kp {0:1:0.1}           参数扫描：{起始:结束:步长}（含结束值），展开为 11 帧
+    @wait 500                  在上一帧之后额外等待 500 ms
+    # 注释                     忽略
+"""
+import re
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+_SWEEP_RE = re.compile(r'\{\s*(-?[\d.]+)\s*:\s*(-?[\d.]+)\s*(?::\s*(-?[\d.]+)\s*)?\}')
+_WAIT_RE = re.compile(r'^@wait\s+([\d.]+)$')
+MAX_SCRIPT_FRAMES = 100000
+
+
+def parse_hex(text):
+    """'AA 01 bb' -> b'\\xaa\\x01\\xbb'，忽略空白，格式错误时抛出 ValueError"""
+    return bytes.fromhex(text)
+
+
+def encode_frame(text, hex_mode=False, line_ending=''):
+    """编码一帧：内容与行尾合并为一个 bytes，发送时只需一次 write"""
+    data = parse_hex(text) if hex_mode else text.encode()
+    return data + line_ending.encode() if line_ending else data
+
+
+def expand_sweep(command):
+    """展开命令中的 {起始:结束:步长} 参数扫描（可有多个，按嵌套顺序展开）"""
+    match = _SWEEP_RE.search(command)
+    if match is None:
+        return [command]
+    start, stop = float(match.group(1)), float(match.group(2))
+    step = float(match.group(3)) if match.group(3) else 1.0
+    if step == 0 or (stop - start) / step < 0:
+        raise ValueError(f"参数扫描范围无效: {match.group(0)}")
+    count = int(np.floor((stop - start) / step + 1e-9)) + 1
+    if count > MAX_SCRIPT_FRAMES:
+        raise ValueError(f"参数扫描展开后超过 {MAX_SCRIPT_FRAMES} 帧: {match.group(0)}")
+    head, tail = command[:match.start()], command[match.end():]
+    commands = []
+    for value in start + step * np.arange(count):
+        # 消除浮点累加误差，如 0.30000000000000004 -> 0.3
+        commands.extend(expand_sweep(f"{head}{float(f'{value:.10g}'):g}{tail}"))
+        if len(commands) > MAX_SCRIPT_FRAMES:
+            raise ValueError(f"脚本展开后超过 {MAX_SCRIPT_FRAMES} 帧")
+    return commands
+
+
+def compile_script(script, hex_mode=False, line_ending='', interval=0.01):
+    """
+    编译发送脚本，返回 [(帧字节, 发送后到下一帧的间隔(s)), ...]
+    interval: 帧间隔(s)
+    """
+    steps = []
+    leading_wait = 0.0
+    for part in re.split(r'[;\n]', script):
+        part = part.strip()
+        if not part or part.startswith('#'):
+            continue
+        wait = _WAIT_RE.match(part)
+        if wait:
+            seconds = float(wait.group(1)) / 1000
+            if steps:
+                data, delay = steps[-1]
+                steps[-1] = (data, delay + seconds)
+            else:
+                leading_wait += seconds
+            continue
+        for command in expand_sweep(part):
+            try:
+                steps.append((encode_frame(command, hex_mode, line_ending), interval))
+            except ValueError:
+                raise ValueError(f"HEX格式错误: {command}")
+        if len(steps) > MAX_SCRIPT_FRAMES:
+            raise ValueError(f"脚本展开后超过 {MAX_SCRIPT_FRAMES} 帧")
+    if not steps:
+        raise ValueError("没有可发送的内容")
+    if leading_wait:
+        # 循环发送时，开头的等待相当于最后一帧之后的等待
+        data, delay = steps[-1]
+        steps[-1] = (data, delay + leading_wait)
+    return steps
+
+
+class TransmitStats:
+    """
+    发送统计：两次 snapshot 之间的帧率、字节率与抖动（实际发送时刻相对计划时刻的延后）
+    """
+
+    WINDOW = 10000  # 计算抖动分位数保留的最近样本数
+
+    def __init__(self):
+        self.total_frames = 0
+        self.total_bytes = 0
+        self.missed = 0  # 落后超过一个间隔而跳过的帧数
+        self._window_start = time.perf_counter()
+        self._window_frames = 0
+        self._window_bytes = 0
+        self._lateness = deque(maxlen=self.WINDOW)
+
+    def add(self, lateness, nbytes):
+        self.total_frames += 1
+        self.total_bytes += nbytes
+        self._window_frames += 1
+        self._window_bytes += nbytes
+        self._lateness.append(lateness)
+
+    def snapshot(self):
+        """
+        返回统计并开始新的统计窗口:
+        {'frames_per_sec', 'bytes_per_sec', 'jitter_mean_ms', 'jitter_p99_ms', 'jitter_max_ms',
+         'total_frames', 'total_bytes', 'missed'}
+        """
+        now = time.perf_counter()
+        elapsed = max(now - self._window_start, 1e-9)
+        lateness = np.array(self._lateness) * 1000.0
+        stats = {
+            'frames_per_sec': self._window_frames / elapsed,
+            'bytes_per_sec': self._window_bytes / elapsed,
+            'jitter_mean_ms': float(lateness.mean()) if lateness.size else 0.0,
+            'jitter_p99_ms': float(np.percentile(lateness, 99)) if lateness.size else 0.0,
+            'jitter_max_ms': float(lateness.max()) if lateness.size else 0.0,
+            'total_frames': self.total_frames,
+            'total_bytes': self.total_bytes,
+            'missed': self.missed,
+        }
+        self._window_start = now
+        self._window_frames = 0
+        self._window_bytes = 0
+        self._lateness.clear()
+        return stats
+
+
+class TransmitScheduler:
+    """
+    定时发送线程
+    write: 发送一帧的函数（每帧调用一次）；steps: compile_script 的结果
+    repeat: 是否循环发送；为 False 时发送一遍后结束
+    """
+
+    SPIN_TIME = 0.0005  # 计划时刻前改为忙等的时间(s)
+
+    def __init__(self, write, steps, repeat=True):
+        self.write = write
+        self.steps = steps
+        self.repeat = repeat
+        self.stats = TransmitStats()
+        self.error = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="TransmitScheduler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        steps = self.steps
+        stats = self.stats
+        write = self.write
+        index = 0
+        next_time = time.perf_counter()
+        while True:
+            # 先 sleep 到计划时刻前 SPIN_TIME，再忙等到计划时刻
+            remaining = next_time - time.perf_counter()
+            if remaining > self.SPIN_TIME and self._stop.wait(remaining - self.SPIN_TIME):
+                break
+            if self._stop.is_set():
+                break
+            while time.perf_counter() < next_time:
+                pass
+
+            data, delay = steps[index]
+            sent = time.perf_counter()
+            try:
+                write(data)
+            except Exception as e:
+                self.error = e
+                print(f"定时发送失败: {e}")
+                break
+            stats.add(sent - next_time, len(data))
+
+            index += 1
+            if index == len(steps):
+                if not self.repeat:
+                    break
+                index = 0
+            next_time += delay
+            # 落后超过一个间隔（如写阻塞）时跳过错过的帧并保持原有相位，不集中补发
+            behind = time.perf_counter() - next_time
+            if behind > delay > 0:
+                skipped = int(behind / delay)
+                stats.missed += skipped
+                next_time += skipped * delay
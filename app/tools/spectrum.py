@@ -0,0 +1,124 @@
+"""
+波形通道的频谱
+
+对每个通道最近的采样做加窗 rFFT：最近 size + (frames - 1) * size / 2 个采样切成 50% 重叠的帧，
+所有通道、所有帧组成一个 (通道数, 帧数, size) 的数组（步长视图，不复制），一次 np.fft.rfft 算完，
+各帧的幅度谱取平均（Welch 平均，降低噪声方差）。
+窗函数数组按 (类型, 长度) 缓存复用；ChannelStore 没有新采样时直接返回上次的结果。
+
+采样率默认由时间戳估计（时间戳为毫秒）；会话的时间戳按批到达时刻插值，
+需要精确频率时应填写下位机的实际采样率。
+"""
+from functools import lru_cache
+
+import numpy as np
+
+WINDOWS = ('hann', 'hamming', 'blackman', 'rect')
+
+
+@lru_cache(maxsize=32)
+def window_function(name, size):
+    """窗函数（只读数组，按类型与长度缓存）"""
+    if name == 'hann':
+        window = np.hanning(size)
+    elif name == 'hamming':
+        window = np.hamming(size)
+    elif name == 'blackman':
+        window = np.blackman(size)
+    elif name == 'rect':
+        window = np.ones(size)
+    else:
+        raise ValueError(f"未知的窗函数: {name}")
+    window.flags.writeable = False
+    return window
+
+
+@lru_cache(maxsize=32)
+def _amplitude_scale(name, size):
+    # 单边幅度谱：按窗的相干增益归一化，正弦信号的峰值即其幅值
+    scale = np.full(size // 2 + 1, 2.0 / window_function(name, size).sum())
+    scale[0] /= 2
+    if size % 2 == 0:
+        scale[-1] /= 2
+    scale.flags.writeable = False
+    return scale
+
+
+def spectrum(samples, sample_rate, size=1024, window='hann', frames=1, db=False):
+    """
+    计算多通道幅度谱
+    samples: shape=(通道数, n)，使用最后 size + (frames - 1) * size // 2 个采样；不足 size 时返回 None
+    返回 (频率 shape=(size // 2 + 1,), 幅度 shape=(通道数, size // 2 + 1))
+    """
+    samples = np.asarray(samples)
+    n = samples.shape[1]
+    if n < size:
+        return None
+    hop = max(size // 2, 1)
+    frames = max(1, min(frames, (n - size) // hop + 1))
+    needed = size + (frames - 1) * hop
+    data = np.asarray(samples[:, n - needed:], dtype=np.float64)
+    # (通道数, 帧数, size) 的步长视图
+    segments = np.lib.stride_tricks.sliding_window_view(data, size, axis=1)[:, ::hop]
+    # 去掉每帧的直流分量再加窗，避免直流泄漏淹没低频
+    segments = segments - segments.mean(axis=2, keepdims=True)
+    segments *= window_function(window, size)
+    amplitude = np.abs(np.fft.rfft(segments, axis=2)).mean(axis=1)
+    amplitude *= _amplitude_scale(window, size)
+    if db:
+        amplitude = 20 * np.log10(np.maximum(amplitude, 1e-12))
+    return np.fft.rfftfreq(size, 1.0 / sample_rate), amplitude
+
+
+def estimate_sample_rate(timestamps):
+    """由毫秒时间戳估计采样率(Hz)，无法估计时返回 None"""
+    if len(timestamps) < 2:
+        return None
+    span = timestamps[-1] - timestamps[0]
+    return (len(timestamps) - 1) * 1000.0 / span if span > 0 else None
+
+
+class SpectrumAnalyzer:
+    """
+    按会话缓存的频谱计算：ChannelStore 的累计采样数与参数都没有变化时返回上次的结果
+    sample_rate 为 None 时由时间戳估计
+    """
+
+    def __init__(self, size=1024, window='hann', frames=4, db=True, sample_rate=None):
+        self.size = size
+        self.window = window
+        self.frames = frames
+        self.db = db
+        self.sample_rate = sample_rate
+        self._cache = {}  # 会话名 -> (store.total, 参数, 结果)
+
+    def set_params(self, **params):
+        for name, value in params.items():
+            setattr(self, name, value)
+
+    def clear(self, name=None):
+        if name is None:
+            self._cache.clear()
+        else:
+            self._cache.pop(name, None)
+
+    def compute(self, name, store):
+        """
+        计算会话 store（ChannelStore）所有通道的频谱
+        返回 (频率, 幅度 shape=(通道数, size // 2 + 1), 采样率)，采样不足时返回 None
+        """
+        params = (self.size, self.window, self.frames, self.db, self.sample_rate, store.channels)
+        cached = self._cache.get(name)
+        if cached is not None and cached[0] == store.total and cached[1] == params:
+            return cached[2]
+
+        needed = self.size + (self.frames - 1) * max(self.size // 2, 1)
+        timestamps, samples = store.tail(needed)
+        result = None
+        sample_rate = self.sample_rate or estimate_sample_rate(timestamps)
+        if sample_rate:
+            computed = spectrum(samples, sample_rate, self.size, self.window, self.frames, self.db)
+            if computed is not None:
+                result = (computed[0], computed[1], sample_rate)
+        self._cache[name] = (store.total, params, result)
+        return result
@@ -65,6 +65,11 @@ def update_cmake_sources(cmake_file, c_files):
         if re.search(pattern, content, re.DOTALL | re.MULTILINE):
             new_content = re.sub(pattern, sources_section, content, flags=re.DOTALL | re.MULTILINE)
             
+            # 内容未变化时不写回，避免触发CMake重新配置
+            if new_content == content:
+                print("✅ CMakeLists.txt中的源文件列表无变化")
+                return True
+            
             # 写回文件
             with open(cmake_file, 'w', encoding='utf-8') as f:
                 f.write(new_content)
@@ -101,6 +106,9 @@ def update_cmake_includes(cmake_file, user_dir):
     try:
         if re.search(pattern, content, re.DOTALL | re.MULTILINE):
             new_content = re.sub(pattern, include_section, content, flags=re.DOTALL | re.MULTILINE)
+            if new_content == content:
+                print("✅ CMakeLists.txt中的include路径无变化")
+                return True
             with open(cmake_file, 'w', encoding='utf-8') as f:
                 f.write(new_content)
             print("✅ 成功更新CMakeLists.txt中的include路径")
@@ -0,0 +1,124 @@
+"""
+用户代码区域的解析与合并
+
+用户区域格式（区域名不区分大小写）：
+    /* USER REGION_NAME BEGIN */
+    用户代码...
+    /* USER REGION_NAME END */
+
+一次线性扫描找出所有 BEGIN/END 标记再按名称配对，合并时按偏移拼接，
+不使用跨区域的反向引用正则，也不对区域内容做字符串替换，多MB的文件也能即时合并。
+配对规则与原先的正则一致：BEGIN 与其后第一个同名 END 配对，区域内部的其它标记属于区域内容。
+"""
+import re
+
+_MARKER_RE = re.compile(r"/\*\s*USER\s+([A-Za-z0-9_\s]+?)\s+(BEGIN|END)\s*\*/", re.IGNORECASE)
+
+
+def _region_key(name):
+    return name.strip().upper()
+
+
+def scan_user_regions(code):
+    """
+    扫描代码中的用户区域
+    返回 (regions, unmatched)：
+        regions:   [(区域名, 内容起始偏移, 内容结束偏移), ...]，按出现顺序
+        unmatched: [{'name': 区域名, 'marker': 'BEGIN'/'END', 'line': 行号}, ...] 未配对的标记
+    """
+    if not code:
+        return [], []
+
+    # 标记: (区域名, 是否BEGIN, 标记起始, 标记结束)
+    markers = [
+        (_region_key(m.group(1)), m.group(2).upper() == 'BEGIN', m.start(), m.end())
+        for m in _MARKER_RE.finditer(code)
+    ]
+    # 每个区域名的 END 标记下标，配合单调前进的指针查找“其后第一个同名 END”
+    ends = {}
+    for index, (name, is_begin, _, _) in enumerate(markers):
+        if not is_begin:
+            ends.setdefault(name, []).append(index)
+    end_cursor = dict.fromkeys(ends, 0)
+
+    regions = []
+    unmatched = []
+    index = 0
+    while index < len(markers):
+        name, is_begin, start, end = markers[index]
+        if not is_begin:
+            # 配对成功的 END 会被整体跳过，扫描到的 END 都是未配对的
+            unmatched.append({'name': name, 'marker': 'END', 'start': start})
+            index += 1
+            continue
+
+        candidates = ends.get(name, ())
+        cursor = end_cursor.get(name, 0)
+        while cursor < len(candidates) and candidates[cursor] < index:
+            cursor += 1
+        if cursor < len(candidates):
+            end_cursor[name] = cursor + 1
+            end_index = candidates[cursor]
+            regions.append((name, end, markers[end_index][2]))
+            # 区域内部的标记属于区域内容
+            index = end_index + 1
+        else:
+            end_cursor[name] = cursor
+            unmatched.append({'name': name, 'marker': 'BEGIN', 'start': start})
+            index += 1
+
+    # 偏移转行号，unmatched 按偏移递增，逐段累计换行数
+    line, pos = 1, 0
+    for item in unmatched:
+        start = item.pop('start')
+        line += code.count('\n', pos, start)
+        pos = start
+        item['line'] = line
+    return regions, unmatched
+
+
+def extract_user_regions(code):
+    """提取所有用户区域，返回 {区域名(大写): 区域内容}，同名区域以最后一个为准"""
+    regions, _ = scan_user_regions(code)
+    return {name: code[body_start:body_end] for name, body_start, body_end in regions}
+
+
+def merge_user_regions(new_code, old_code):
+    """
+    将旧代码中的用户区域内容拼接到新代码的同名区域中
+    返回 (合并后的代码, 报告)，报告格式:
+        {'preserved': [保留了旧内容的区域名],
+         'orphaned':  [旧文件中有内容、但新代码中已不存在的区域名（这些内容不会出现在输出中）],
+         'unmatched': [新/旧代码中未配对的标记，见 scan_user_regions]}
+    """
+    report = {'preserved': [], 'orphaned': [], 'unmatched': []}
+    old_regions, old_unmatched = scan_user_regions(old_code)
+    if not old_regions and not old_unmatched:
+        return new_code, report
+
+    old_bodies = {name: old_code[body_start:body_end] for name, body_start, body_end in old_regions}
+    new_regions, new_unmatched = scan_user_regions(new_code)
+    report['unmatched'] = (
+        [dict(item, source='old') for item in old_unmatched] +
+        [dict(item, source='new') for item in new_unmatched]
+    )
+
+    pieces = []
+    pos = 0
+    new_names = set()
+    for name, body_start, body_end in new_regions:
+        new_names.add(name)
+        old_body = old_bodies.get(name)
+        if old_body is None:
+            continue
+        pieces.append(new_code[pos:body_start])
+        pieces.append(old_body)
+        pos = body_end
+        report['preserved'].append(name)
+    pieces.append(new_code[pos:])
+
+    report['orphaned'] = [
+        name for name, body in old_bodies.items()
+        if name not in new_names and body.strip()
+    ]
+    return ''.join(pieces), report
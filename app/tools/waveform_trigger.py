@@ -0,0 +1,129 @@
+"""
+波形触发（示波器式采集）
+
+每批采样写入 ChannelStore 后调用 Trigger.process：对触发通道的新采样做一次 NumPy 比较，
+用 argmax 找到第一个满足条件的位置，不逐个采样判断。
+触发后等到触发点之后再收到 post 个采样，从 ChannelStore 复制 [触发点 - pre, 触发点 + post) 作为冻结的片段，
+采集不中断；单次模式采集一个片段后停止，自动模式立即重新等待下一次触发。
+
+采样序号指 ChannelStore 的累计采样序号（store.total 计数），不随环形存储搬移而变化。
+"""
+import numpy as np
+
+# 触发类型 -> 说明
+TRIGGER_TYPES = {
+    'rising': '上升沿',
+    'falling': '下降沿',
+    'both': '双边沿',
+    'above': '高于',
+    'below': '低于',
+}
+
+
+class Trigger:
+    """
+    单通道触发
+    kind: TRIGGER_TYPES 之一；边沿触发在相邻两个采样跨过 level 时触发，电平触发在采样满足条件时触发
+    pre/post: 触发点之前/之后保留的采样数；mode: 'single' 单次，'auto' 自动重新触发
+    """
+
+    def __init__(self, channel=0, level=0.0, kind='rising', pre=500, post=500, mode='auto'):
+        if kind not in TRIGGER_TYPES:
+            raise ValueError(f"未知的触发类型: {kind}")
+        if mode not in ('single', 'auto'):
+            raise ValueError(f"未知的触发模式: {mode}")
+        self.channel = channel
+        self.level = level
+        self.kind = kind
+        self.pre = max(int(pre), 0)
+        self.post = max(int(post), 1)
+        self.mode = mode
+        self.state = 'idle'  # idle / armed（等待触发）/ triggered（采集触发后的采样）/ stopped（单次已完成）
+        self.segment = None  # 最近一次采集的片段
+        self.segment_id = 0  # 每采集一个片段加一，界面据此判断是否有新片段
+        self._earliest = 0   # 允许触发的最小采样序号（保证触发前有 pre 个采样）
+        self._prev = None    # 上一批最后一个采样，用于跨批的边沿判断
+        self._trigger_index = 0
+        self._trigger_time = 0.0
+
+    def arm(self, store):
+        """开始等待触发：只检测之后到达的采样，且触发点之前至少有 pre 个采样"""
+        self.state = 'armed'
+        self._earliest = max(store.total, store.total - len(store) + self.pre)
+        self._prev = None
+
+    def disarm(self):
+        self.state = 'idle'
+
+    def process(self, store, count):
+        """store 刚追加了 count 个采样后调用"""
+        if self.state not in ('armed', 'triggered') or self.channel >= store.channels:
+            return
+        total = store.total
+        t, y = store.range(total - count, total)
+        x = y[self.channel]
+        base = total - x.size
+        pos = 0
+        while True:
+            if self.state == 'triggered':
+                end = self._trigger_index + self.post
+                if total < end:
+                    break
+                self._capture(store)
+                if self.mode == 'single':
+                    self.state = 'stopped'
+                    break
+                # 自动模式：从本次片段结束处继续检测
+                self.state = 'armed'
+                pos = max(pos, end - base)
+                self._earliest = max(self._earliest, end)
+            start = max(pos, self._earliest - base)
+            if start >= x.size:
+                break
+            hit = self._detect(x, start)
+            if hit < 0:
+                break
+            self._trigger_index = base + hit
+            self._trigger_time = float(t[hit])
+            self.state = 'triggered'
+            pos = hit + 1
+        if x.size:
+            self._prev = x[-1]
+
+    def _detect(self, x, start):
+        """x[start:] 中第一个满足触发条件的下标，没有时返回 -1"""
+        values = x[start:]
+        level = self.level
+        if self.kind == 'above':
+            condition = values > level
+        elif self.kind == 'below':
+            condition = values < level
+        else:
+            previous = x[start - 1] if start > 0 else self._prev
+            before = np.empty_like(values)
+            before[0] = values[0] if previous is None else previous
+            before[1:] = values[:-1]
+            if self.kind == 'rising':
+                condition = (before < level) & (values >= level)
+            elif self.kind == 'falling':
+                condition = (before > level) & (values <= level)
+            else:
+                condition = ((before < level) & (values >= level)) | ((before > level) & (values <= level))
+        hit = int(np.argmax(condition))
+        return start + hit if condition[hit] else -1
+
+    def _capture(self, store):
+        t, y = store.range(self._trigger_index - self.pre, self._trigger_index + self.post)
+        self.segment = {
+            't': t.copy(),
+            'y': y.copy(),
+            'trigger_time': self._trigger_time,
+            'trigger_index': self._trigger_index,
+        }
+        self.segment_id += 1
+
+    def reset(self, store):
+        """数据被清空后（store.total 归零）重新开始等待触发"""
+        self.segment = None
+        if self.state in ('armed', 'triggered'):
+            self.arm(store)
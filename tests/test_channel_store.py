@@ -0,0 +1,55 @@
+"""波形通道存储的 min/max 抽取：结果与逐采样计算一致，缩放到大范围时整块只读块统计"""
+import numpy as np
+import pytest
+
+from app.tools.channel_store import ChannelStore
+
+COUNT = 1_000_000
+CHANNELS = 16
+
+
+@pytest.fixture(scope='module')
+def filled_store():
+    samples = np.random.default_rng(0).normal(size=(COUNT, CHANNELS)).astype(np.float32)
+    store = ChannelStore(COUNT, CHANNELS)
+    store.append(np.arange(COUNT, dtype=np.float64), samples)
+    return store, samples
+
+
+@pytest.mark.parametrize('first, last, width', [
+    (0, COUNT - 1, 1500),            # 全部数据
+    (100_000, 800_000, 1500),        # 每个区间 1~2 个块
+    (123, 123 + 256 * 1500 + 77, 1500),  # 每个区间刚好一个块，头尾不对齐
+    (5_000, 300_000, 1500),          # 不足一个块，按原始数据分组
+    (777, 900_777, 7),               # 每个区间很多块
+])
+def test_decimate_matches_samples(filled_store, first, last, width):
+    store, samples = filled_store
+    x, y = store.decimate(width, first, last)
+    visible = samples[first:last + 1].T
+    assert x[0] == first and x[-1] == last
+    assert np.all(np.diff(x) >= 0)
+    np.testing.assert_array_equal(y.min(axis=1), visible.min(axis=1))
+    np.testing.assert_array_equal(y.max(axis=1), visible.max(axis=1))
+    # 每个区间的 (min, max) 落在该区间的采样范围内
+    starts = x[0:-1:2].astype(np.int64)
+    ends = np.append(starts[1:], last + 1)
+    for i in (0, len(starts) // 2, len(starts) - 1):
+        part = samples[starts[i]:ends[i]].T
+        np.testing.assert_array_equal(y[:, 2 * i], part.min(axis=1))
+        np.testing.assert_array_equal(y[:, 2 * i + 1], part.max(axis=1))
+
+
+def test_decimate_zoomed_reads_only_partial_blocks():
+    """每个区间至少一个块时，整块只读块的最小/最大值，原始数据只读头尾不完整的块"""
+    block = ChannelStore.BLOCK
+    count = 1000 * block
+    store = ChannelStore(count, 2)
+    store.append(np.arange(count, dtype=np.float64), np.zeros((count, 2), dtype=np.float32))
+    first, last = 1000, 150_000
+    # 把整块范围内的原始数据改掉而不更新块统计：若抽取读取了这些采样，结果中会出现该值
+    whole = slice(-(-first // block) * block, (last + 1) // block * block)
+    store._y[:, whole] = 1e9
+    x, y = store.decimate(100, first, last)
+    assert x[0] == first
+    assert y.max() == 0
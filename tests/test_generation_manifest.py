@@ -0,0 +1,49 @@
+"""增量生成清单：生成所依赖的项目文件（中断文件）出现或变化时任务需要重新执行"""
+from app.tools.code_generator import CodeGenerator
+from app.tools.generation_manifest import GenerationManifest
+from app.tools.project_generator import patch_uart_interrupts
+
+IT_CODE = """/* USER CODE BEGIN Includes */
+/* USER CODE END Includes */
+void USART1_IRQHandler(void)
+{
+  /* USER CODE BEGIN USART1_IRQn 0 */
+  /* USER CODE END USART1_IRQn 0 */
+  HAL_UART_IRQHandler(&huart1);
+  /* USER CODE BEGIN USART1_IRQn 1 */
+  /* USER CODE END USART1_IRQn 1 */
+}
+"""
+
+
+def _generate(project, manifest):
+    """模拟 bsp_uart 任务：不是最新时执行并记录"""
+    if manifest.is_up_to_date('bsp_uart', {}):
+        return False
+    with CodeGenerator.recording() as record:
+        patch_uart_interrupts(str(project), ['USART1'])
+    manifest.record('bsp_uart', {}, (), record)
+    return True
+
+
+def test_missing_interrupt_file_created_later(tmp_path):
+    (tmp_path / "test.ioc").write_text("Mcu.UserName=STM32F407IGHx\n", encoding="utf-8")
+    it_path = tmp_path / "Core" / "Src" / "stm32f4xx_it.c"
+    it_path.parent.mkdir(parents=True)
+    manifest = GenerationManifest(str(tmp_path))
+
+    # 中断文件不存在：记录为依赖（哈希 None），再次生成视为最新
+    assert _generate(tmp_path, manifest)
+    assert manifest.entries['bsp_uart']['files'] == {'Core/Src/stm32f4xx_it.c': None}
+    assert not _generate(tmp_path, manifest)
+
+    # CubeMX 生成中断文件后清单失效，重新生成时插入 BSP_UART_IRQHandler
+    it_path.write_text(IT_CODE, encoding="utf-8")
+    assert _generate(tmp_path, manifest)
+    assert it_path.read_text(encoding="utf-8").count("BSP_UART_IRQHandler(&huart1);") == 1
+    assert not _generate(tmp_path, manifest)
+
+    # 中断文件被外部修改（如 CubeMX 重新生成）后同样重新执行
+    it_path.write_text(IT_CODE, encoding="utf-8")
+    assert _generate(tmp_path, manifest)
+    assert "BSP_UART_IRQHandler(&huart1);" in it_path.read_text(encoding="utf-8")
@@ -0,0 +1,24 @@
+"""接收日志的行匹配：每行单独判断，正则不能越过行尾匹配到下一行"""
+from app.tools.serial_log import LogBuffer, LogMatcher
+
+LINES = ['status ok', 'ERR 1', 'fine', 'ok  ERR 2', 'ok\tfine']
+
+
+def test_regex_does_not_match_across_lines():
+    assert LogMatcher(r'ok\s+ERR', regex=True).match_lines(LINES) == [3]
+    assert LogMatcher(r'ok[^x]*fine', regex=True).match_lines(LINES) == [4]
+    assert LogMatcher(r'fine\n', regex=True).match_lines(LINES) == []
+
+
+def test_regex_matches_later_in_line_after_crossing_match():
+    # 第一次命中越过行尾，同一行后面还有行内的匹配
+    lines = ['a ok', 'ERR', 'ok ERR a ok', 'ERR']
+    assert LogMatcher(r'ok\s+ERR', regex=True).match_lines(lines) == [2]
+
+
+def test_search_lines_uses_line_bounds():
+    log = LogBuffer()
+    log.append('\n'.join(LINES * 2000) + '\n')
+    matcher = LogMatcher(r'ok\s+err', regex=True)
+    found = [line for chunk in matcher.search_lines(log.snapshot()) for line, _ in chunk]
+    assert found == [i * len(LINES) + 3 for i in range(2000)]
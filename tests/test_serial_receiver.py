@@ -0,0 +1,62 @@
+"""接收循环更换录制 writer：set_capture_writer 返回后不再有数据写入原来的 writer"""
+import threading
+import time
+
+from app.tools.serial_mux import SerialReceiver
+
+
+class _Stats:
+    def snapshot(self):
+        return {}
+
+
+class _BusySource:
+    """没有 fd 的数据源，每轮都有数据"""
+
+    fd = None
+
+    def __init__(self):
+        self.stats = _Stats()
+
+    def due_in(self):
+        return 0.0
+
+    def poll(self):
+        return b'x'
+
+
+class _Writer:
+    def __init__(self):
+        self.closed = False
+        self.written = threading.Event()
+        self.late = 0
+
+    def write(self, data):
+        self.written.set()
+        time.sleep(0.001)  # 写入尚未返回时原 writer 不能被关闭
+        if self.closed:
+            self.late += 1
+
+    def close(self):
+        self.closed = True
+
+
+def test_no_write_after_writer_removed():
+    receiver = SerialReceiver()
+    receiver.add_source('busy', _BusySource())
+    thread = threading.Thread(target=receiver.run)
+    thread.start()
+    try:
+        writers = []
+        for _ in range(20):
+            writer = _Writer()
+            receiver.set_capture_writer('busy', writer)
+            assert writer.written.wait(1.0)  # 接收循环正在向它写入时更换
+            receiver.set_capture_writer('busy', None)
+            writer.close()
+            writers.append(writer)
+    finally:
+        receiver.stop()
+        thread.join()
+        receiver.close()
+    assert sum(writer.late for writer in writers) == 0